@@ -75,7 +75,18 @@ export const getPosition = async (positionId: string): Promise<StackResponse<Pos
 
 export const getActiveElection = async (): Promise<StackResponse<ElectionPositions | null>> => {
   try {
-    const { data } = await stackbase.get("/elections/active/");
+    // The election itself is public and cached; has-voted flags come from a personal endpoint
+    const [{ data }, voted] = await Promise.all([
+      stackbase.get("/elections/active/"),
+      stackbase.get("/elections/active/ballot-status/").catch(() => null),
+    ]);
+    const votedPositions = new Set<string>(voted?.data?.data?.voted_positions ?? []);
+    if (data?.data?.positions) {
+      data.data.positions = data.data.positions.map((position: Position) => ({
+        ...position,
+        has_voted: votedPositions.has(position.id),
+      }));
+    }
     return data;
   } catch (error: any) {
     console.error("Error fetching active election:", error);
@@ -12,8 +12,10 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 
 from botocore.config import Config
+from django.core.exceptions import ImproperlyConfigured
 
 import dj_database_url
 from dotenv import load_dotenv
@@ -115,6 +117,30 @@ db_config = dj_database_url.config(default=os.getenv('DATABASE_URL'))
 if db_config:
     DATABASES['default'] = cast(dict[str, Any], dict(db_config))
 
+# Cache shared by every process. The eligible-candidate index, voter-roll tokens,
+# ballot status, vote pacing and the version counters behind ETags are invalidated
+# by whichever process saves a change, so production needs REDIS_URL: a per-process
+# cache would leave the other workers serving stale data, and a database cache would
+# add several queries to every vote. Only DEBUG runs and the test runner, each a
+# single process, fall back to the in-process cache.
+REDIS_URL = os.getenv('REDIS_URL')
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+elif DEBUG or TESTING:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    raise ImproperlyConfigured("REDIS_URL must be set when DEBUG is off.")
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -195,6 +221,49 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 
+# Vote ingestion: 'sync' writes each vote on the request thread; 'queued' spools
+# validated votes to a local SQLite file drained by `manage.py commit_votes`.
+VOTE_INGESTION_MODE = os.getenv('VOTE_INGESTION_MODE', 'sync')
+VOTE_SPOOL_PATH = os.getenv('VOTE_SPOOL_PATH', os.path.join(BASE_DIR, 'vote_spool.sqlite3'))
+
+# Security-audit buffering (LoginAttempt / VoteAttempt). The default of 1 writes
+# each record with its request, as serverless instances may be frozen or recycled
+# before a buffer is flushed. Batching is opt-in for hosts with long-lived workers:
+# records are then bulk-written every AUDIT_BUFFER_SIZE records or AUDIT_FLUSH_INTERVAL seconds.
+AUDIT_BUFFER_SIZE = int(os.getenv('AUDIT_BUFFER_SIZE', '1'))
+AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', '2'))
+AUDIT_BUFFER_MAX = int(os.getenv('AUDIT_BUFFER_MAX', '5000'))
+
+# Rows per (position, candidate) in VoteTally; >1 spreads hot-candidate updates across rows.
+VOTE_TALLY_SHARDS = int(os.getenv('VOTE_TALLY_SHARDS', '1'))
+
+# Live results stream: how often each process checks for committed votes, and
+# the idle keep-alive interval, in seconds.
+LIVE_RESULTS_POLL_INTERVAL = float(os.getenv('LIVE_RESULTS_POLL_INTERVAL', '1'))
+LIVE_RESULTS_HEARTBEAT = int(os.getenv('LIVE_RESULTS_HEARTBEAT', '15'))
+
+# Student CSV imports: rows per chunk (one existence query and one bulk insert each),
+# where background-job uploads and error reports are kept, and whether jobs run on a
+# worker thread (disable on serverless hosts and run `manage.py run_import_jobs`).
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '1000'))
+IMPORT_DIR = os.getenv('IMPORT_DIR', os.path.join(BASE_DIR, 'imports'))
+IMPORT_IN_THREAD = os.getenv('IMPORT_IN_THREAD', 'True') == 'True'
+
+# Processes that hash passwords for bulk credential resets (voting.hashing). 1 hashes
+# in the calling process, which serverless deploys need; hosts with long-lived
+# workers can set it to their core count.
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '1'))
+# Largest credential reset served within a request (each password takes a fraction of
+# a second to hash); larger resets run with `manage.py reset_credentials`.
+CREDENTIAL_RESET_MAX = int(os.getenv('CREDENTIAL_RESET_MAX', '100'))
+
+# Paginated list totals: exact counts are cached this many seconds per filter set;
+# unfiltered tables the planner estimates at COUNT_ESTIMATE_THRESHOLD rows or more
+# report the estimate instead (PostgreSQL only), flagged count_approximate.
+COUNT_CACHE_TIMEOUT = int(os.getenv('COUNT_CACHE_TIMEOUT', '30'))
+COUNT_ESTIMATE_THRESHOLD = int(os.getenv('COUNT_ESTIMATE_THRESHOLD', '100000'))
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -210,6 +279,10 @@ STORAGES = {
     },
 }
 
+# Lifetime in seconds of the signed URLs the storage hands out for pictures;
+# cached responses embedding them must be revalidated well within it.
+SIGNED_URL_EXPIRE = int(os.getenv('SIGNED_URL_EXPIRE', '3600'))
+
 STORAGES = {
     "default": {
         "BACKEND": "storages.backends.s3.S3Storage",
@@ -219,6 +292,7 @@ STORAGES = {
             "bucket_name": os.getenv("AWS_STORAGE_BUCKET_NAME"),
             "region_name": os.getenv("AWS_REGION"),
             "endpoint_url": os.getenv("AWS_ENDPOINT_URL"),
+            "querystring_expire": SIGNED_URL_EXPIRE,
             "client_config": Config(
                 request_checksum_calculation="when_required", 
                 response_checksum_validation="when_required",
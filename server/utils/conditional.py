@@ -0,0 +1,153 @@
+"""
+Conditional GET for read-only API endpoints.
+
+Every tracked model has a version counter in the shared cache, bumped after
+each committed save or delete (see ``track``; bulk writes that bypass signals
+call ``bump`` themselves). A view's ETag is derived from the versions of the
+models its response is built from, the request path and query parameters and,
+for per-user responses, the user; responses carrying signed media URLs also
+include the signed-URL window (``url_window``), so a client never revalidates
+into links that have expired. Clients revalidating with ``If-None-Match``
+get a 304 straight after authentication, before the view runs a single query.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.cache import patch_vary_headers
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+
+def version_key(model):
+    return f"model_version_{model._meta.label_lower}"
+
+
+def _initial_version():
+    # Never restart at a small number after a cache flush, so old ETags cannot match again
+    return time.time_ns()
+
+
+def bump_key(key):
+    """Increment a version counter now, reseeding it if it was evicted."""
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), None)
+
+
+def bump(*models):
+    """Mark the models changed once the current transaction commits."""
+    keys = [version_key(model) for model in models]
+    transaction.on_commit(lambda: [bump_key(key) for key in keys])
+
+
+def track(model, ignore_fields=()):
+    """
+    Bump a model's version on every save and delete. Saves that only touch
+    ``ignore_fields`` (bookkeeping no response shows) are not counted.
+    """
+    ignored = frozenset(ignore_fields)
+
+    def saved(sender, update_fields=None, **kwargs):
+        if update_fields is None or not set(update_fields) <= ignored:
+            bump(sender)
+
+    def deleted(sender, **kwargs):
+        bump(sender)
+
+    uid = version_key(model)
+    post_save.connect(saved, sender=model, weak=False, dispatch_uid=f"conditional_save_{uid}")
+    post_delete.connect(deleted, sender=model, weak=False, dispatch_uid=f"conditional_delete_{uid}")
+
+
+def versions(keys):
+    """Current values of the given version keys, initialising missing ones."""
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    for key in missing:
+        cache.add(key, _initial_version(), None)
+    if missing:
+        found.update(cache.get_many(missing))
+    return [found.get(key) for key in keys]
+
+
+def url_window(now=None):
+    """
+    Return (window, seconds_left) of the signed-URL window containing ``now``.
+    Windows last half the signed-URL lifetime, so a payload served during one
+    keeps working pictures until at least the end of the next; responses put
+    the window in their ETag and expire with it.
+    """
+    period = max(1, settings.SIGNED_URL_EXPIRE // 2)
+    now = int(time.time() if now is None else now)
+    return now // period, period - now % period
+
+
+class NotModified(APIException):
+    status_code = status.HTTP_304_NOT_MODIFIED
+    default_detail = ''
+
+
+class ConditionalResponseMixin:
+    """
+    Adds ETag/304 handling and Cache-Control headers to a viewset's read actions.
+
+    ``conditional_models`` are the models the responses are built from and
+    ``conditional_version_keys`` any other version counters in the cache
+    (e.g. the vote tally version). Set ``conditional_per_user`` when the
+    response differs between users and ``conditional_signed_urls`` when it
+    contains signed media URLs. Anonymous responses are marked public for
+    ``conditional_max_age`` seconds; authenticated ones are private.
+    """
+    conditional_actions = ('list',)
+    conditional_models = ()
+    conditional_version_keys = ()
+    conditional_per_user = False
+    conditional_signed_urls = False
+    conditional_max_age = 60
+
+    conditional_etag = None
+
+    def get_conditional_etag(self, request):
+        keys = [version_key(model) for model in self.conditional_models] + list(self.conditional_version_keys)
+        user = request.user
+        parts = {
+            'versions': versions(keys),
+            'path': request.path,
+            'params': sorted(request.query_params.lists()),
+            'user': [user.pk, user.is_staff] if self.conditional_per_user and user.is_authenticated else None,
+            'window': url_window()[0] if self.conditional_signed_urls else None,
+        }
+        return '"%s"' % hashlib.sha1(json.dumps(parts, default=str).encode()).hexdigest()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in ('GET', 'HEAD') and self.action in self.conditional_actions:
+            self.conditional_etag = self.get_conditional_etag(request)
+            if self.conditional_etag in request.headers.get('If-None-Match', ''):
+                raise NotModified()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.conditional_etag and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = self.conditional_etag
+            if request.user.is_authenticated:
+                response['Cache-Control'] = 'private, no-cache'
+            else:
+                max_age = self.conditional_max_age
+                if self.conditional_signed_urls:
+                    max_age = min(max_age, url_window()[1])
+                response['Cache-Control'] = f'public, max-age={max_age}'
+            patch_vary_headers(response, ['Authorization'])
+        return response
@@ -0,0 +1,75 @@
+"""
+Totals for paginated lists.
+
+``total(queryset)`` serves exact counts from a short-lived cache entry keyed
+by the query's SQL and parameters, so repeated page loads with the same filters
+count once per ``COUNT_CACHE_TIMEOUT`` seconds. An unfiltered query over a
+table the PostgreSQL planner estimates at ``COUNT_ESTIMATE_THRESHOLD`` rows or
+more is not counted at all: the ``pg_class.reltuples`` estimate is returned and
+marked approximate.
+"""
+import hashlib
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+Total = namedtuple('Total', ['count', 'approximate'])
+
+
+def _is_unfiltered(queryset):
+    query = queryset.query
+    return not query.where and not query.distinct and not query.combinator and not query.is_sliced
+
+
+def estimate(model, using='default'):
+    """Planner row estimate of the model's table, or None where unavailable."""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [connection.ops.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    # -1 until the table has been vacuumed or analyzed
+    return row[0] if row and row[0] >= 0 else None
+
+
+def total(queryset, cached=True):
+    """
+    Return Total(count, approximate) for the queryset. ``cached=False`` counts
+    afresh, for callers that cache the whole page under their own versioning.
+    """
+    threshold = getattr(settings, 'COUNT_ESTIMATE_THRESHOLD', 100000)
+    if _is_unfiltered(queryset):
+        estimated = estimate(queryset.model, queryset.db)
+        if estimated is not None and estimated >= threshold:
+            return Total(estimated, True)
+
+    if not cached:
+        return Total(queryset.count(), False)
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return Total(0, False)
+    signature = hashlib.sha1(repr((queryset.db, sql, params)).encode()).hexdigest()
+    key = f"count_{queryset.model._meta.label_lower}_{signature}"
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, getattr(settings, 'COUNT_CACHE_TIMEOUT', 30))
+    return Total(count, False)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Admin paginator counting through ``total`` (use with show_full_result_count = False)."""
+
+    @cached_property
+    def count(self):
+        return total(self.object_list).count
@@ -1,6 +1,15 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
+from .counting import total
+
 
 class StackPagination(PageNumberPagination):
     page_size = 20
@@ -17,3 +26,146 @@ class StackPagination(PageNumberPagination):
             'previous': self.get_previous_link(),
             'data': data
         })
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder drops microseconds past milliseconds; cursors must be exact
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values, reverse=False):
+    raw = json.dumps({'v': values, 'r': reverse}, cls=_CursorEncoder)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (values, reverse) of an opaque cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return list(data['v']), bool(data.get('r'))
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise InvalidCursor(cursor)
+
+
+def _value(item, field):
+    return item[field] if isinstance(item, dict) else getattr(item, field)
+
+
+class KeysetPaginator:
+    """
+    Cursor (keyset) pagination over a stable ordering such as ('-voted_at', '-id').
+    The last field must be unique and none of them nullable. A cursor holds the
+    ordering values of the row it continues from, so each page is a range
+    condition on the ordering instead of an OFFSET the database has to skip.
+    """
+
+    def __init__(self, ordering):
+        self.fields = [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+
+    def cursor_for(self, item, reverse=False):
+        return encode_cursor([_value(item, field) for field, _ in self.fields], reverse)
+
+    def _beyond(self, values, reverse):
+        # (a, b) after (x, y) in ordering (a, b) is: a > x OR (a = x AND b > y)
+        condition = Q()
+        for i, (field, descending) in enumerate(self.fields):
+            lookup = 'lt' if descending != reverse else 'gt'
+            branch = Q(**{f'{field}__{lookup}': values[i]})
+            for (previous, _), value in zip(self.fields[:i], values):
+                branch &= Q(**{previous: value})
+            condition |= branch
+        return condition
+
+    def page(self, queryset, page_size, cursor=None):
+        """Return (items, next_cursor, previous_cursor) for the page after (or before) ``cursor``."""
+        values, reverse = decode_cursor(cursor) if cursor else (None, False)
+        if values is not None and len(values) != len(self.fields):
+            raise InvalidCursor(cursor)
+
+        queryset = queryset.order_by(*[
+            ('-' if descending != reverse else '') + field for field, descending in self.fields
+        ])
+        if values is not None:
+            queryset = queryset.filter(self._beyond(values, reverse))
+        items = list(queryset[:page_size + 1])
+        more = len(items) > page_size
+        items = items[:page_size]
+        if reverse:
+            items.reverse()
+
+        has_next, has_previous = (values is not None, more) if reverse else (more, values is not None)
+        next_cursor = self.cursor_for(items[-1]) if items and has_next else None
+        previous_cursor = self.cursor_for(items[0], reverse=True) if items and has_previous else None
+        return items, next_cursor, previous_cursor
+
+
+def _flag(value, default=True):
+    if value is None:
+        return default
+    return value.lower() not in {'false', '0', 'no'}
+
+
+def paginate(request, queryset, ordering, page_size=20, max_page_size=100, size_param='page_size', cached_count=True):
+    """
+    Paginate a list endpoint and return (items, envelope), where ``envelope``
+    holds the ResponseMixin pagination arguments.
+
+    With a ``cursor`` query parameter (empty for the first page) the list is
+    paged by keyset over ``ordering``; otherwise by ``page`` number as before.
+    Either way the envelope carries opaque ``next_cursor``/``previous_cursor``
+    values. The total comes from ``utils.counting`` (cached, or estimated
+    and flagged ``count_approximate`` on huge unfiltered tables), and
+    ``count=false`` skips it.
+    """
+    params = request.query_params
+    try:
+        page_size = max(1, min(int(params.get(size_param, page_size)), max_page_size))
+    except ValueError:
+        pass
+    counted = total(queryset, cached_count) if _flag(params.get('count')) else None
+    counts = {
+        'count': counted.count if counted else None,
+        'count_approximate': True if counted and counted.approximate else None,
+    }
+    paginator = KeysetPaginator(ordering)
+
+    if 'cursor' in params:
+        items, next_cursor, previous_cursor = paginator.page(queryset, page_size, params.get('cursor') or None)
+        return items, {
+            **counts,
+            'next_cursor': next_cursor,
+            'previous_cursor': previous_cursor,
+        }
+
+    try:
+        page = max(int(params.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    start = (page - 1) * page_size
+    items = list(queryset.order_by(*ordering)[start:start + page_size + 1])
+    has_next = len(items) > page_size
+    items = items[:page_size]
+
+    base_url = request.build_absolute_uri(request.path)
+
+    def build_url(number):
+        query = request.GET.copy()
+        query['page'] = str(number)
+        query[size_param] = str(page_size)
+        return f"{base_url}?{query.urlencode()}"
+
+    return items, {
+        **counts,
+        'next': build_url(page + 1) if has_next else None,
+        'previous': build_url(page - 1) if page > 1 else None,
+        'next_cursor': paginator.cursor_for(items[-1]) if has_next else None,
+        'previous_cursor': paginator.cursor_for(items[0], reverse=True) if items and page > 1 else None,
+    }
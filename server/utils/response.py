@@ -17,8 +17,11 @@ class ResponseMixin:
         status=None,
         error=None,
         count=None,
+        count_approximate=None,
         next=None,
-        previous=None
+        previous=None,
+        next_cursor=None,
+        previous_cursor=None
     ):
         """
         Standard response format for API endpoints
@@ -32,10 +35,16 @@ class ResponseMixin:
         
         if count is not None:
             response_data["count"] = count
+        if count_approximate is not None:
+            response_data["count_approximate"] = count_approximate
         if next is not None:
             response_data["next"] = next
         if previous is not None:
             response_data["previous"] = previous
+        if next_cursor is not None:
+            response_data["next_cursor"] = next_cursor
+        if previous_cursor is not None:
+            response_data["previous_cursor"] = previous_cursor
             
         return Response(data=response_data, status= status or status_code)
     
\ No newline at end of file
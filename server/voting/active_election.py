@@ -0,0 +1,93 @@
+"""
+Public view of the active election.
+
+Everything ``/elections/active/`` returns is the same for every visitor except
+the per-voter ``has_voted`` flags, which are served separately (see
+``ElectionViewSet.active_ballot_status``). The public part is rendered once
+into a JSON body and kept in the shared cache under the election content
+version, so a request costs one cache read and a matching ``If-None-Match`` is
+answered without touching the database.
+
+The content version is bumped by the signals in ``voting.signals`` whenever an
+election, position or nomination changes. The positions' vote counts are the
+only part that moves with every vote, so they are allowed to lag by up to
+``VOTE_COUNTS_TTL`` seconds: the body is re-rendered at most that often, and
+its ETag only changes when the counts (or the signed-URL window of the
+pictures it embeds) actually did. "No active election" is cached too, until
+the next scheduled start of an activated election.
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from utils import conditional
+
+from .models import Election
+from .serializers import ActiveElectionSerializer, PositionSerializer
+
+VERSION_KEY = 'active_election_version'
+CACHE_TIMEOUT = 60 * 60
+VOTE_COUNTS_TTL = 30
+MESSAGE = "Active election retrieved successfully."
+
+
+def invalidate():
+    """Mark the cached active election stale once the current transaction commits."""
+    transaction.on_commit(lambda: conditional.bump_key(VERSION_KEY))
+
+
+def _keys():
+    content = conditional.versions([VERSION_KEY])[0]
+    return f"active_election_none_{content}", f"active_election_public_{content}", content
+
+
+def _seconds_until(moment, now):
+    return max(1, min(CACHE_TIMEOUT, int((moment - now).total_seconds())))
+
+
+def render(election):
+    """Return (body, vote_counts) of the public view of ``election``."""
+    positions = list(election.positions.all())
+    context = PositionSerializer.bulk_context(positions)
+    data = ActiveElectionSerializer(election, context=context).data
+    for position in data['positions']:
+        position.pop('has_voted', None)
+    body = JSONRenderer().render({"message": MESSAGE, "data": data, "status": 200, "error": None})
+    return body, context['vote_counts']
+
+
+def lookup():
+    """
+    Return the cached public entry: ``{'election_id': None}`` when no election
+    is running, else ``{'election_id', 'etag', 'body'}``. Raises
+    ``Election.MultipleObjectsReturned`` (uncached) on a misconfiguration.
+    """
+    none_key, public_key, version = _keys()
+    cached = cache.get_many([none_key, public_key])
+    if none_key in cached:
+        return cached[none_key]
+    if public_key in cached:
+        return cached[public_key]
+
+    now = timezone.now()
+    try:
+        election = Election.objects.prefetch_related('positions') \
+                                   .get(is_active=True, start_date__lte=now, end_date__gte=now)
+    except Election.DoesNotExist:
+        entry = {'election_id': None}
+        upcoming = Election.objects.filter(is_active=True, start_date__gt=now) \
+                                   .order_by('start_date').values_list('start_date', flat=True).first()
+        cache.set(none_key, entry, _seconds_until(upcoming or now + timedelta(seconds=CACHE_TIMEOUT), now))
+        return entry
+
+    body, vote_counts = render(election)
+    window, window_left = conditional.url_window()
+    counts = hashlib.sha1(json.dumps(sorted((str(k), v) for k, v in vote_counts.items())).encode()).hexdigest()[:12]
+    entry = {'election_id': election.pk, 'etag': f'"{election.pk}-{version}-{window}-{counts}"', 'body': body}
+    cache.set(public_key, entry, min(VOTE_COUNTS_TTL, window_left, _seconds_until(election.end_date, now)))
+    return entry
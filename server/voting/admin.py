@@ -4,7 +4,10 @@ from django.utils.html import format_html
 from django.db.models import Count
 from django.utils import timezone
 from datetime import timedelta
+from utils.counting import EstimatedCountPaginator
+
 from .models import Student, Election, Position, Candidate, Vote, IPRestriction, LoginAttempt, VoteAttempt, DeviceFingerprint, PasswordChangeAttempt
+from . import tally
 
 
 @admin.register(Student)
@@ -70,11 +73,14 @@ class ElectionAdmin(admin.ModelAdmin):
     positions_count.short_description = 'Positions'
     
     def votes_count(self, obj):
-        return Vote.objects.filter(position__election=obj).count()
+        return obj.tally_votes
     votes_count.short_description = 'Total Votes'
+    votes_count.admin_order_field = 'tally_votes'
     
     def get_queryset(self, request):
-        return super().get_queryset(request).prefetch_related('positions')
+        return super().get_queryset(request).prefetch_related('positions').annotate(
+            tally_votes=tally.election_votes_subquery()
+        )
 
 
 @admin.register(Position)
@@ -94,8 +100,9 @@ class PositionAdmin(admin.ModelAdmin):
         return obj.candidates.count()
     enhancements_count.short_description = 'Candidates'
     def votes_count(self, obj):
-        return obj.votes.count()
+        return obj.tally_votes
     votes_count.short_description = 'Votes'
+    votes_count.admin_order_field = 'tally_votes'
     
     def eligible_candidates_count(self, obj):
         # previously derived algorithmically; now nominations
@@ -103,7 +110,9 @@ class PositionAdmin(admin.ModelAdmin):
     eligible_candidates_count.short_description = 'Eligible Students'
     
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('election').prefetch_related('candidates')
+        return super().get_queryset(request).select_related('election').prefetch_related('candidates').annotate(
+            tally_votes=tally.position_votes_subquery()
+        )
 
 @admin.register(Candidate)
 class CandidateAdmin(admin.ModelAdmin):
@@ -134,8 +143,9 @@ class CandidateAdmin(admin.ModelAdmin):
     election.admin_order_field = 'position__election__name'
     
     def votes_received(self, obj):
-        return Vote.objects.filter(student_voted_for=obj.student, position=obj.position).count()
+        return obj.tally_votes
     votes_received.short_description = 'Votes'
+    votes_received.admin_order_field = 'tally_votes'
     
     def photo_preview(self, obj):
         if obj.photo:
@@ -146,7 +156,7 @@ class CandidateAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         return super().get_queryset(request).select_related(
             'student', 'position', 'position__election'
-        )
+        ).annotate(tally_votes=tally.candidate_votes_subquery())
 
 
 @admin.register(Vote)
@@ -157,6 +167,8 @@ class VoteAdmin(admin.ModelAdmin):
     ordering = ('-voted_at',)
     readonly_fields = ('id', 'voted_at')
     date_hierarchy = 'voted_at'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     def voter_matric(self, obj):
         return obj.voter.matric_number
@@ -227,6 +239,8 @@ class LoginAttemptAdmin(admin.ModelAdmin):
     search_fields = ('ip_address', 'matric_number')
     readonly_fields = ('ip_address', 'user_agent', 'matric_number', 'success', 'timestamp')
     date_hierarchy = 'timestamp'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     def user_agent_preview(self, obj):
         if obj.user_agent:
@@ -251,6 +265,8 @@ class VoteAttemptAdmin(admin.ModelAdmin):
     search_fields = ('voter__matric_number', 'ip_address', 'position__name')
     readonly_fields = ('voter', 'ip_address', 'position', 'success', 'reason', 'timestamp', 'user_agent')
     date_hierarchy = 'timestamp'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     def voter_info(self, obj):
         if obj.voter:
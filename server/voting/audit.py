@@ -0,0 +1,140 @@
+"""
+Buffered security-audit writes.
+
+By default (``AUDIT_BUFFER_SIZE = 1``) each LoginAttempt and VoteAttempt is
+written as it is recorded; batching is opt-in. Deployments with long-lived
+workers may raise the size: rows are then collected in a per-process buffer and written with
+``bulk_create`` once ``AUDIT_BUFFER_SIZE`` records are pending or the oldest
+has waited ``AUDIT_FLUSH_INTERVAL`` seconds. The buffer is flushed at
+interpreter shutdown, and when it already holds ``AUDIT_BUFFER_MAX`` records
+(e.g. the database is unreachable) new records are written synchronously
+instead.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import Position, VoteAttempt
+
+logger = logging.getLogger(__name__)
+
+
+class AuditWriter:
+    def __init__(self, size=50, interval=2.0, max_pending=5000):
+        self.size = size
+        self.interval = interval
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = []
+        self._oldest = None
+        self._flusher = None
+        atexit.register(self.flush)
+
+    def record(self, instance):
+        if self.size <= 1:
+            self._write(type(instance), [instance])
+            return
+
+        with self._lock:
+            overflow = len(self._pending) >= self.max_pending
+            if not overflow:
+                self._pending.append(instance)
+                if self._oldest is None:
+                    self._oldest = time.monotonic()
+                due = len(self._pending) >= self.size
+        if overflow:
+            logger.warning("[AUDIT] Buffer full, writing record synchronously")
+            instance.save()
+            return
+
+        self._ensure_flusher()
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write every pending record. Returns the number of records written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending, self._oldest = self._pending, [], None
+            if not batch:
+                return 0
+
+            by_model = {}
+            for instance in batch:
+                by_model.setdefault(type(instance), []).append(instance)
+
+            written = 0
+            for model, records in by_model.items():
+                written += self._write(model, records, requeue=True)
+            return written
+
+    def _write(self, model, records, requeue=False):
+        if model is VoteAttempt:
+            records = self._drop_unknown_positions(records)
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(records, batch_size=500)
+            return len(records)
+        except Exception as e:
+            logger.error(f"[AUDIT] Failed to write {len(records)} {model.__name__} record(s): {str(e)}")
+            if requeue:
+                self._requeue(records)
+            return 0
+
+    def _drop_unknown_positions(self, records):
+        # Failed votes are logged with the raw position id from the request; records
+        # built from a validated Position instance need no lookup
+        unverified = {r.position_id for r in records if not VoteAttempt.position.is_cached(r)}
+        if not unverified:
+            return records
+        known = set(Position.objects.filter(id__in=unverified).values_list('id', flat=True))
+        return [r for r in records if VoteAttempt.position.is_cached(r) or r.position_id in known]
+
+    def _requeue(self, records):
+        with self._lock:
+            room = self.max_pending - len(self._pending)
+            if room > 0:
+                self._pending[:0] = records[:room]
+                self._oldest = self._oldest or time.monotonic()
+
+    def _ensure_flusher(self):
+        if self._flusher is None or not self._flusher.is_alive():
+            with self._lock:
+                if self._flusher is None or not self._flusher.is_alive():
+                    self._flusher = threading.Thread(target=self._run, name='audit-flusher', daemon=True)
+                    self._flusher.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                due = self._oldest is not None and time.monotonic() - self._oldest >= self.interval
+            if due:
+                try:
+                    self.flush()
+                finally:
+                    connection.close()
+
+
+_writer = None
+
+
+def get_writer():
+    global _writer
+    if _writer is None:
+        _writer = AuditWriter(
+            size=getattr(settings, 'AUDIT_BUFFER_SIZE', 1),
+            interval=getattr(settings, 'AUDIT_FLUSH_INTERVAL', 2.0),
+            max_pending=getattr(settings, 'AUDIT_BUFFER_MAX', 5000),
+        )
+    return _writer
+
+
+def record(instance):
+    """Queue an unsaved LoginAttempt/VoteAttempt for writing."""
+    get_writer().record(instance)
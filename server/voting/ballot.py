@@ -0,0 +1,51 @@
+"""
+In-memory ballot validation.
+
+A ``BallotSnapshot`` loads an election, its positions, the eligible-candidate
+index and the voter's existing votes once, so that every selection on a full ballot
+can be checked without further queries.
+"""
+from django.utils import timezone
+
+from .models import Election, Position
+from . import ballot_status, eligibility, voter_roll
+
+
+class BallotSnapshot:
+    def __init__(self, election, positions, candidates, voted_positions):
+        self.election = election
+        self.positions = positions  # {position_id: Position}
+        self.candidates = candidates  # {position_id: frozenset(student_ids)}
+        self.voted_positions = voted_positions  # {position_id, ...}
+
+    @classmethod
+    def load(cls, election_id, voter):
+        """Return a snapshot for ``election_id`` or None if the election does not exist."""
+        election = Election.objects.filter(id=election_id).first()
+        if not election:
+            return None
+
+        positions = {p.id: p for p in Position.objects.filter(election=election)}
+
+        index = eligibility.get_eligible_candidate_ids_many(positions)
+        candidates = {position_id: index[str(position_id)] for position_id in positions}
+
+        voted_positions = ballot_status.voted_positions(voter.id, election.id)
+        return cls(election, positions, candidates, voted_positions)
+
+    def voter_error(self, voter):
+        """Election-wide checks; returns an error message or None."""
+        election = self.election
+        if not election.is_active or not (election.start_date <= timezone.now() <= election.end_date):
+            return "This election is not currently active."
+        return voter_roll.get_roll(election).voter_error(election, voter.id)
+
+    def selection_error(self, position_id, student_id):
+        """Per-position checks; returns an error message or None."""
+        if position_id not in self.positions:
+            return "Position does not belong to this election."
+        if position_id in self.voted_positions:
+            return "You have already voted for this position."
+        if student_id not in self.candidates.get(position_id, ()):
+            return "Selected student is not nominated for this position."
+        return None
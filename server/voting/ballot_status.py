@@ -0,0 +1,62 @@
+"""
+Per-voter ballot status.
+
+The set of positions a voter has already voted on in an election, loaded with
+one query and kept in the shared cache. Each entry is tagged with the voter's
+generation counter; a committed vote or a deleted one bumps the counter with
+an atomic ``incr``, so concurrent writers never overwrite each other and the
+next read reloads the set from the database.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Vote
+
+CACHE_TIMEOUT = 60 * 60 * 12
+
+
+def _cache_key(election_id, voter_id):
+    return f"ballot_status_{election_id}_{voter_id}"
+
+
+def _generation_key(election_id, voter_id):
+    return f"ballot_status_gen_{election_id}_{voter_id}"
+
+
+def voted_positions(voter_id, election_id):
+    """Return the frozenset of position ids the voter has voted on in the election."""
+    key, generation_key = _cache_key(election_id, voter_id), _generation_key(election_id, voter_id)
+    found = cache.get_many([key, generation_key])
+    generation = found.get(generation_key, 0)
+    entry = found.get(key)
+    if entry is not None and entry[0] == generation:
+        return entry[1]
+
+    # Read after the generation, so a vote committed in between is either loaded or bumps it again
+    positions = frozenset(
+        Vote.objects.filter(voter_id=voter_id, position__election_id=election_id)
+        .values_list('position_id', flat=True)
+    )
+    cache.set(key, (generation, positions), CACHE_TIMEOUT)
+    return positions
+
+
+def has_voted(voter_id, position):
+    return position.id in voted_positions(voter_id, position.election_id)
+
+
+def forget(voter_id, election_id):
+    """Make the next read reload the voter's status from the database."""
+    generation_key = _generation_key(election_id, voter_id)
+    try:
+        cache.incr(generation_key)
+    except ValueError:
+        if not cache.add(generation_key, 1, None):
+            cache.incr(generation_key)
+
+
+def mark_voted(voter_id, election_id, position_ids):
+    """Record new votes once the surrounding transaction commits."""
+    if not position_ids:
+        return
+    transaction.on_commit(lambda: forget(voter_id, election_id))
@@ -0,0 +1,76 @@
+"""
+Bulk credential resets.
+
+``reset`` gives every student of a queryset (``students_for`` a level, or an
+election's voter roll) a new initial password and clears ``has_changed_password``, so each
+student has to set their own password again before they can vote. Students
+are processed ``CHUNK_SIZE`` at a time: the chunk's passwords are hashed on
+the voting.hashing process pool and written with one ``bulk_update``. The
+whole reset is one transaction, so a request killed before the new passwords
+are handed out leaves every student's old password in place. Staff accounts
+are never reset this way.
+
+Hashing takes a fraction of a second per password, so the reset-credentials
+endpoint only serves resets of up to ``CREDENTIAL_RESET_MAX`` students; larger
+ones run with ``manage.py reset_credentials`` on a host without a request
+timeout.
+"""
+from itertools import islice
+
+from django.db import transaction
+
+from utils import conditional
+
+from .models import Student
+from . import hashing, voter_roll
+
+CHUNK_SIZE = 1000
+CSV_HEADER = ['Matric Number', 'Full Name', 'Password']
+
+
+def students_for(level=None, election=None, include_changed=False):
+    """
+    Students of a level, or of an election's voter roll. Students who already
+    set their own password are left out unless ``include_changed``.
+    """
+    students = Student.objects.filter(level=level) if election is None else voter_roll.eligible_students(election)
+    if not include_changed:
+        students = students.filter(has_changed_password=False)
+    return students.filter(is_staff=False)
+
+
+def reset(students, random_passwords=True):
+    """
+    Reset the passwords of ``students``. Random passwords are returned as
+    [(matric_number, full_name, password)], the only copy of them; otherwise
+    the state of origin becomes the password again and only the count is
+    meaningful.
+    """
+    rows = iter(list(
+        students.filter(is_staff=False).order_by('matric_number').values_list('pk', 'matric_number', 'full_name', 'state_of_origin')
+    ))
+    credentials = []
+    with hashing.pool() as executor, transaction.atomic():
+        while True:
+            chunk = list(islice(rows, CHUNK_SIZE))
+            if not chunk:
+                break
+            passwords = [
+                hashing.generate_password() if random_passwords else (state or 'password123')
+                for _, _, _, state in chunk
+            ]
+            hashes = hashing.hash_passwords(passwords, executor)
+            updated = [
+                Student(pk=pk, password=hashed, has_changed_password=False)
+                for (pk, _, _, _), hashed in zip(chunk, hashes)
+            ]
+            Student.objects.bulk_update(updated, ['password', 'has_changed_password'], batch_size=CHUNK_SIZE)
+            credentials.extend(
+                (matric, name, password) for (_, matric, name, _), password in zip(chunk, passwords)
+            )
+
+    if credentials:
+        # bulk_update bypasses signals; has_changed_password is part of every voter roll
+        voter_roll.invalidate_open_rolls()
+        conditional.bump(Student)
+    return credentials
@@ -0,0 +1,77 @@
+"""
+Eligible-candidate index.
+
+Keeps, per position, a frozenset of the ids of active students nominated for
+it in the shared cache (see ``CACHES`` in settings). Vote validation and nomination checks become a set
+membership test instead of the Candidate/Student JOIN + DISTINCT behind
+``Position.get_eligible_candidates``.
+
+The index for an election is built when the election is activated and is
+invalidated by the signals in ``voting.signals`` whenever Candidate rows or a
+student's status change.
+"""
+from django.core.cache import cache
+
+from .models import Candidate, Position
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _cache_key(position_id):
+    return f"eligible_candidates_{position_id}"
+
+
+def _load(position_ids):
+    """Query the nominated active students for the given positions (one query)."""
+    index = {str(pid): set() for pid in position_ids}
+    rows = Candidate.objects.filter(
+        position_id__in=list(index),
+        student__status='active',
+    ).values_list('position_id', 'student_id')
+    for position_id, student_id in rows:
+        index[str(position_id)].add(student_id)
+    return {pid: frozenset(ids) for pid, ids in index.items()}
+
+
+def get_eligible_candidate_ids_many(position_ids):
+    """Return {str(position_id): frozenset(student_ids)} using the cache, loading misses in one query."""
+    keys = {_cache_key(pid): str(pid) for pid in position_ids}
+    cached = cache.get_many(list(keys))
+    index = {keys[key]: ids for key, ids in cached.items()}
+    missing = [pid for pid in keys.values() if pid not in index]
+    if missing:
+        loaded = _load(missing)
+        cache.set_many({_cache_key(pid): ids for pid, ids in loaded.items()}, CACHE_TIMEOUT)
+        index.update(loaded)
+    return index
+
+
+def get_eligible_candidate_ids(position_id):
+    return get_eligible_candidate_ids_many([position_id])[str(position_id)]
+
+
+def is_eligible_candidate(position_id, student_id):
+    return student_id in get_eligible_candidate_ids(position_id)
+
+
+def build_election_index(election):
+    """(Re)build the index for every position of an election, e.g. on activation."""
+    position_ids = list(Position.objects.filter(election=election).values_list('id', flat=True))
+    loaded = _load(position_ids)
+    cache.set_many({_cache_key(pid): ids for pid, ids in loaded.items()}, CACHE_TIMEOUT)
+    return loaded
+
+
+def invalidate_positions(position_ids):
+    keys = [_cache_key(pid) for pid in position_ids if pid]
+    if keys:
+        cache.delete_many(keys)
+
+
+def invalidate_student(student_id):
+    """Drop the index of every position the student is nominated for."""
+    invalidate_positions(Candidate.objects.filter(student_id=student_id).values_list('position_id', flat=True))
+
+
+def invalidate_all():
+    invalidate_positions(Position.objects.values_list('id', flat=True))
@@ -0,0 +1,91 @@
+"""
+Password hashing for bulk credential operations.
+
+PBKDF2 is deliberately slow (a fraction of a second per password), so hashing
+one password per student for tens of thousands of students in a single process
+takes the better part of an hour. ``hash_passwords`` spreads the work over a
+pool of ``PASSWORD_HASH_WORKERS`` processes; small batches, and deployments
+configured with one worker, hash in-process. Every hash gets its own salt.
+
+Workers are spawned rather than forked (the callers run on request and import
+threads) and set Django up from the inherited environment.
+"""
+import logging
+import math
+import multiprocessing
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+
+logger = logging.getLogger(__name__)
+
+# Below this many passwords, starting worker processes costs more than it saves
+MIN_PARALLEL = 16
+# Unambiguous characters for generated passwords (no 0/O, 1/l/I)
+ALPHABET = 'abcdefghjkmnpqrstuvwxyzABCDEFGHJKLMNPQRSTUVWXYZ23456789'
+
+
+def _workers():
+    return max(1, getattr(settings, 'PASSWORD_HASH_WORKERS', 1))
+
+
+def _init_worker():
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def _hash_batch(passwords):
+    return [make_password(password) for password in passwords]
+
+
+@contextmanager
+def pool():
+    """A process pool for several ``hash_passwords`` calls, or None with one worker."""
+    workers = _workers()
+    if workers == 1:
+        yield None
+        return
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+    )
+    try:
+        yield executor
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def hash_passwords(passwords, executor=None):
+    """
+    Return the hashes of ``passwords``, in order. Pass an ``executor`` from
+    ``pool()`` to reuse its workers across calls; otherwise a pool is started
+    for this call when the batch is large enough to benefit.
+    """
+    passwords = list(passwords)
+    workers = _workers()
+    if workers == 1 or len(passwords) < MIN_PARALLEL:
+        return _hash_batch(passwords)
+    if executor is None:
+        with pool() as executor:
+            return hash_passwords(passwords, executor)
+
+    # A few batches per worker keeps every core busy until the end
+    size = math.ceil(len(passwords) / (workers * 4))
+    batches = [passwords[i:i + size] for i in range(0, len(passwords), size)]
+    try:
+        return [hashed for batch in executor.map(_hash_batch, batches) for hashed in batch]
+    except BrokenProcessPool as e:
+        logger.error(f"[HASHING] Worker pool failed, hashing in-process: {str(e)}")
+        return _hash_batch(passwords)
+
+
+def generate_password(length=10):
+    """A random initial password."""
+    return ''.join(secrets.choice(ALPHABET) for _ in range(length))
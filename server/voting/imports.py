@@ -0,0 +1,429 @@
+"""
+Student CSV imports.
+
+Rows are read from a text stream and processed ``IMPORT_CHUNK_SIZE`` at a
+time: each chunk is normalised, checked against existing matric numbers with
+one query and written with one ``bulk_create``, so memory stays flat however
+large the roster is. ``StudentViewSet.bulk_import`` runs this inline for small
+files; with ``background=true`` the upload is streamed to ``IMPORT_DIR`` and
+processed as an ``ImportJob`` on a worker thread (or by the ``run_import_jobs``
+command where threads do not outlive the request), recording progress and an
+error report as it goes.
+
+Students log in first with their state of origin, which is hashed once per
+state and shared: the password itself is the same for every student of a
+state, and hashing it per student would only add one PBKDF2 run per row.
+Students choose their own password before they can vote (see
+voting.credentials for random initial passwords).
+"""
+import csv
+import logging
+import os
+import threading
+from collections import Counter, namedtuple
+from datetime import datetime
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from utils import conditional
+
+from .models import ImportJob, Student
+from . import voter_roll
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ('matric_number', 'full_name', 'state_of_origin')
+DATE_FORMATS = ['%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%d.%m.%Y']
+DATE_LABELS = {'%Y-%m-%d': 'YYYY-MM-DD', '%d-%m-%Y': 'DD-MM-YYYY', '%d/%m/%Y': 'DD/MM/YYYY', '%d.%m.%Y': 'DD.MM.YYYY'}
+GENDERS = {'male', 'female', 'other'}
+LEVELS = {level for level, _ in Student.LEVEL_CHOICES}
+
+Progress = namedtuple('Progress', ['rows', 'created', 'errors'])
+
+
+class ImportFileError(ValueError):
+    """The file cannot be imported at all (e.g. required columns are missing)."""
+
+
+def _chunk_size():
+    return max(1, int(getattr(settings, 'IMPORT_CHUNK_SIZE', 1000)))
+
+
+def missing_columns(fieldnames):
+    header = {name.lower().strip() for name in (fieldnames or [])}
+    return [field for field in REQUIRED_FIELDS if field not in header]
+
+
+def _parses(value, fmt):
+    try:
+        datetime.strptime(value, fmt)
+        return True
+    except ValueError:
+        return False
+
+
+def detect_date_format(values, sample_size=50):
+    """The accepted format that parses most of a sample of the values, or None."""
+    sample = [value for value in values if value][:sample_size]
+    if not sample:
+        return None
+    scores = {fmt: sum(_parses(value, fmt) for value in sample) for fmt in DATE_FORMATS}
+    best = max(DATE_FORMATS, key=scores.get)
+    return best if scores[best] else None
+
+
+def _date_formats(date_format):
+    """Accepted formats, the file's own (see detect_date_format) first."""
+    if not date_format:
+        return DATE_FORMATS
+    return [date_format] + [fmt for fmt in DATE_FORMATS if fmt != date_format]
+
+
+def _date_message(value, fmt):
+    accepted = ', '.join(DATE_LABELS[f] for f in DATE_FORMATS)
+    if fmt:
+        return f"Unrecognized date_of_birth '{value}' (accepted: {accepted}; this file mostly uses {DATE_LABELS[fmt]})"
+    return f"Unrecognized date_of_birth '{value}' (accepted: {accepted})"
+
+
+def normalize_row(raw, options):
+    """
+    Return (row, messages) for one CSV record: the cleaned row, or None when it
+    must be rejected, and any problems found on the way.
+    """
+    row = {k.lower().strip(): (v.strip() if isinstance(v, str) else v) for k, v in raw.items() if k}
+    missing = [field for field in REQUIRED_FIELDS if not row.get(field)]
+    if missing:
+        return None, [f"Missing required field(s): {', '.join(missing)}"]
+
+    messages = []
+    default_level = options['default_level']
+    row['matric_number'] = row['matric_number'].upper()
+    level_raw = row.get('level')
+    if level_raw:
+        try:
+            row['level'] = int(level_raw)
+        except ValueError:
+            messages.append(f"Invalid level '{level_raw}' -> using default {default_level}")
+            row['level'] = default_level
+    else:
+        row['level'] = default_level
+    gender = (row.get('gender') or 'other').lower()
+    row['gender'] = gender if gender in {'male', 'female', 'other'} else 'other'
+
+    dob_raw = row.get('date_of_birth') or ''
+    row['date_of_birth'] = None
+    if dob_raw:
+        # The file's own format first; rows in another accepted format still parse
+        date_format = options.get('date_format')
+        for fmt in _date_formats(date_format):
+            try:
+                row['date_of_birth'] = datetime.strptime(dob_raw, fmt).date()
+                break
+            except ValueError:
+                continue
+        else:
+            message = _date_message(dob_raw, date_format)
+            if options['strict_dates']:
+                return None, messages + [message]
+            messages.append(message + ' -> stored as NULL')
+    return row, messages
+
+
+class _Passwords:
+    """Initial password hashes of a list of rows (the student's state of origin)."""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def __call__(self, rows):
+        states = [row.get('state_of_origin') or 'password123' for row in rows]
+        for state in states:
+            if state not in self.hashes:
+                self.hashes[state] = make_password(state)
+        return [self.hashes[state] for state in states]
+
+
+def _create(rows, passwords, report):
+    """Create the chunk's students that do not exist yet; returns how many were created."""
+    existing = set(
+        Student.objects.filter(matric_number__in=[row['matric_number'] for _, row in rows])
+        .values_list('matric_number', flat=True)
+    )
+    new_rows = []
+    for line, row in rows:
+        if row['matric_number'] in existing:
+            report(line, row['matric_number'], f"Student {row['matric_number']} already exists")
+            continue
+        new_rows.append(row)
+    students = []
+    for row, password in zip(new_rows, passwords(new_rows)):
+        students.append(Student(
+            matric_number=row['matric_number'],
+            full_name=row['full_name'],
+            level=row['level'],
+            gender=row['gender'],
+            state_of_origin=row.get('state_of_origin') or '',
+            email=row.get('email') or None,
+            phone_number=row.get('phone_number') or None,
+            password=password,
+            date_of_birth=row['date_of_birth'],
+        ))
+    if students:
+        with transaction.atomic():
+            Student.objects.bulk_create(students, batch_size=1000)
+    return len(students)
+
+
+def import_rows(stream, options, report):
+    """
+    Import the students of a CSV text stream chunk by chunk, yielding a
+    Progress after each chunk. ``report(line, matric_number, message)``
+    receives every problem found. Raises ImportFileError if the header lacks
+    a required column.
+    """
+    reader = csv.DictReader(stream)
+    missing = missing_columns(reader.fieldnames)
+    if missing:
+        raise ImportFileError(f"Missing required columns: {', '.join(missing)}")
+
+    seen = set()
+    problems = 0
+    progress = Progress(0, 0, 0)
+
+    def note(line, matric, message):
+        nonlocal problems
+        problems += 1
+        report(line, matric, message)
+
+    records = enumerate(reader, start=2)
+    chunk = list(islice(records, _chunk_size()))
+    if chunk and 'date_format' not in options:
+        date_column = next((name for name in reader.fieldnames if name.lower().strip() == 'date_of_birth'), None)
+        if date_column:
+            options = {**options, 'date_format': detect_date_format(
+                (raw.get(date_column) or '').strip() for _, raw in chunk
+            )}
+    passwords = _Passwords()
+    try:
+        while chunk:
+            rows = []
+            for line, raw in chunk:
+                row, messages = normalize_row(raw, options)
+                matric = row['matric_number'] if row else (raw.get('matric_number') or '').strip().upper()
+                for message in messages:
+                    note(line, matric, message)
+                if row is None:
+                    continue
+                if matric in seen:
+                    note(line, matric, f"Duplicate matric number {matric} in file")
+                    continue
+                seen.add(matric)
+                rows.append((line, row))
+
+            created = 0
+            if rows:
+                try:
+                    created = _create(rows, passwords, note)
+                except Exception as e:
+                    logger.error(f"[IMPORT] Chunk at row {chunk[0][0]} failed: {str(e)}")
+                    note(chunk[0][0], '', f"Rows {chunk[0][0]}-{chunk[-1][0]} failed: {str(e)}")
+            progress = Progress(progress.rows + len(chunk), progress.created + created, problems)
+            yield progress
+            chunk = list(islice(records, _chunk_size()))
+    finally:
+        if progress.created:
+            # bulk_create bypasses signals; open elections must see the new students
+            voter_roll.invalidate_open_rolls()
+            conditional.bump(Student)
+
+
+def validate(stream, options):
+    """
+    Dry run: report every problem an import of the CSV text stream would hit,
+    without writing anything. Rows are checked a column at a time per chunk
+    (the file's detected date format tried first, set lookups for gender and
+    level, a running index of matric numbers and one existence query per
+    chunk). Dates in another accepted format are flagged, not rejected.
+    Returns a summary with every issue; ``severity`` is 'error' for rows the
+    import would reject and 'warning' for rows it would import adjusted.
+    """
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    missing = missing_columns(header)
+    if missing:
+        raise ImportFileError(f"Missing required columns: {', '.join(missing)}")
+    positions = {name.lower().strip(): index for index, name in enumerate(header)}
+
+    def column(rows, name):
+        index = positions.get(name)
+        if index is None:
+            return [''] * len(rows)
+        return [row[index].strip() if index < len(row) else '' for row in rows]
+
+    issues = []
+    rejected = set()
+    first_seen = {}
+    date_format = options.get('date_format')
+    total = 0
+
+    def issue(line, matric, field, code, message, severity='error'):
+        issues.append({
+            'row': line, 'matric_number': matric, 'field': field,
+            'code': code, 'severity': severity, 'message': message,
+        })
+        if severity == 'error':
+            rejected.add(line)
+
+    while True:
+        chunk = list(islice(reader, _chunk_size()))
+        if not chunk:
+            break
+        lines = range(total + 2, total + 2 + len(chunk))
+        total += len(chunk)
+        matrics = [value.upper() for value in column(chunk, 'matric_number')]
+
+        required = {field: column(chunk, field) for field in REQUIRED_FIELDS}
+        for field, values in required.items():
+            for line, matric, value in zip(lines, matrics, values):
+                if not value:
+                    issue(line, matric, field, 'missing_field', f"Missing required field: {field}")
+
+        for line, matric, value in zip(lines, matrics, column(chunk, 'level')):
+            if not value:
+                continue
+            try:
+                level = int(value)
+            except ValueError:
+                issue(line, matric, 'level', 'invalid_level',
+                      f"Invalid level '{value}' -> using default {options['default_level']}", 'warning')
+                continue
+            if level not in LEVELS:
+                issue(line, matric, 'level', 'unknown_level', f"Level {value} is not a recognised level", 'warning')
+
+        for line, matric, value in zip(lines, matrics, column(chunk, 'gender')):
+            if value and value.lower() not in GENDERS:
+                issue(line, matric, 'gender', 'unknown_gender', f"Unknown gender '{value}' -> stored as other", 'warning')
+
+        dates = column(chunk, 'date_of_birth')
+        if 'date_format' not in options and lines[0] == 2:
+            # Detected from the first chunk, as import_rows does
+            date_format = detect_date_format(dates)
+        for line, matric, value in zip(lines, matrics, dates):
+            if not value:
+                continue
+            parsed_with = next((fmt for fmt in _date_formats(date_format) if _parses(value, fmt)), None)
+            if parsed_with is not None:
+                if date_format and parsed_with != date_format:
+                    # Imported as read, but day and month may have been swapped by whoever wrote it
+                    issue(line, matric, 'date_of_birth', 'mixed_date_format',
+                          f"date_of_birth '{value}' is {DATE_LABELS[parsed_with]}; "
+                          f"this file mostly uses {DATE_LABELS[date_format]}", 'warning')
+            else:
+                if options['strict_dates']:
+                    issue(line, matric, 'date_of_birth', 'invalid_date', _date_message(value, date_format))
+                else:
+                    issue(line, matric, 'date_of_birth', 'invalid_date',
+                          _date_message(value, date_format) + ' -> stored as NULL', 'warning')
+
+        # The first valid occurrence of a matric number is the one imported
+        candidates = {}
+        for line, matric in zip(lines, matrics):
+            if line in rejected:
+                continue
+            if matric in first_seen:
+                issue(line, matric, 'matric_number', 'duplicate_in_file',
+                      f"Duplicate matric number {matric} in file (first on row {first_seen[matric]})")
+                continue
+            first_seen[matric] = line
+            candidates[matric] = line
+        existing = Student.objects.filter(matric_number__in=list(candidates)) \
+            .values_list('matric_number', flat=True)
+        for matric in existing:
+            issue(candidates[matric], matric, 'matric_number', 'already_exists', f"Student {matric} already exists")
+
+    issues.sort(key=lambda entry: entry['row'])
+    return {
+        'total_rows': total,
+        'valid_rows': total - len(rejected),
+        'rejected_rows': len(rejected),
+        'warning_count': sum(entry['severity'] == 'warning' for entry in issues),
+        'date_format': DATE_LABELS.get(date_format),
+        'issue_counts': dict(Counter(entry['code'] for entry in issues)),
+        'issues': issues,
+    }
+
+
+def parse_options(data):
+    return {
+        'default_level': int(data.get('default_level', 500)),
+        'strict_dates': str(data.get('strict_dates', 'false')).lower() in {'1', 'true', 'yes'},
+    }
+
+
+def create_job(upload, user, options):
+    """Stream an uploaded CSV to IMPORT_DIR and register an ImportJob for it."""
+    directory = settings.IMPORT_DIR
+    os.makedirs(directory, exist_ok=True)
+    job = ImportJob(created_by=user if user.is_authenticated else None, file_name=upload.name, options=options)
+    job.file_path = os.path.join(directory, f"{job.pk}.csv")
+    job.error_report_path = os.path.join(directory, f"{job.pk}.errors.csv")
+    with open(job.file_path, 'wb') as destination:
+        for piece in upload.chunks():
+            destination.write(piece)
+    job.save()
+    return job
+
+
+def start(job):
+    """Run the job on a worker thread once the current transaction commits."""
+    if getattr(settings, 'IMPORT_IN_THREAD', True):
+        transaction.on_commit(
+            lambda: threading.Thread(target=run, args=(job.pk,), name=f"import-{job.pk}", daemon=True).start()
+        )
+
+
+def run(job_id):
+    """Process a pending job to completion, updating its progress after every chunk."""
+    try:
+        claimed = ImportJob.objects.filter(pk=job_id, status='pending') \
+            .update(status='running', started_at=timezone.now())
+        if not claimed:
+            return
+        job = ImportJob.objects.get(pk=job_id)
+        try:
+            with open(job.file_path, newline='', encoding='utf-8') as source, \
+                    open(job.error_report_path, 'w', newline='', encoding='utf-8') as errors:
+                writer = csv.writer(errors)
+                writer.writerow(['row', 'matric_number', 'error'])
+
+                def report(line, matric, message):
+                    writer.writerow([line, matric, message])
+
+                for progress in import_rows(source, job.options, report):
+                    errors.flush()
+                    ImportJob.objects.filter(pk=job.pk).update(
+                        processed_rows=progress.rows, created_count=progress.created, error_count=progress.errors
+                    )
+            ImportJob.objects.filter(pk=job.pk).update(
+                status='completed', finished_at=timezone.now(),
+                message="Import completed.",
+            )
+        except (ImportFileError, UnicodeDecodeError, csv.Error) as e:
+            ImportJob.objects.filter(pk=job.pk).update(status='failed', finished_at=timezone.now(), message=str(e))
+        except Exception as e:
+            logger.error(f"[IMPORT] Job {job_id} failed: {str(e)}")
+            ImportJob.objects.filter(pk=job.pk).update(
+                status='failed', finished_at=timezone.now(), message="Import failed."
+            )
+        else:
+            try:
+                os.remove(job.file_path)
+            except OSError:
+                pass
+    finally:
+        connection.close()
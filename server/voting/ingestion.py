@@ -0,0 +1,194 @@
+"""
+Write-behind vote ingestion.
+
+With ``VOTE_INGESTION_MODE = 'queued'`` a validated vote is appended to a local
+SQLite (WAL) spool instead of being written to the main database on the
+request thread. The voter gets the receipt id back immediately; the
+``commit_votes`` management command drains the spool in batches through
+``repository.insert_votes`` and records the outcome per receipt.
+
+The receipt id doubles as the primary key of the resulting Vote row, so a
+batch replayed after a crash between the database commit and the spool
+update is recognised as already committed. A batch the database rejects is
+split until the offending votes are isolated; those are marked ``failed``
+and left in the spool for inspection while the rest keep draining.
+"""
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, transaction
+
+from .models import Vote, VoteAttempt
+from . import repository, tally
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+COMMITTED = 'committed'
+DUPLICATE = 'duplicate'
+FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vote_spool (
+    receipt_id TEXT PRIMARY KEY,
+    voter_id TEXT NOT NULL,
+    position_id TEXT NOT NULL,
+    candidate_id TEXT NOT NULL,
+    ip_address TEXT,
+    user_agent TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'pending',
+    queued_at REAL NOT NULL,
+    committed_at REAL,
+    UNIQUE (voter_id, position_id)
+);
+CREATE INDEX IF NOT EXISTS vote_spool_status ON vote_spool (status, queued_at);
+"""
+
+
+def is_queued():
+    return getattr(settings, 'VOTE_INGESTION_MODE', 'sync') == 'queued'
+
+
+class VoteSpool:
+    """Durable local queue of validated votes, one SQLite connection per thread."""
+
+    def __init__(self, path=None):
+        self.path = str(path or settings.VOTE_SPOOL_PATH)
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=FULL')
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, voter_id, position_id, candidate_id, ip_address=None, user_agent=''):
+        """Spool a vote. Returns the receipt id, or None if this voter already spooled this position."""
+        receipt_id = str(uuid.uuid4())
+        cursor = self.connection.execute(
+            "INSERT OR IGNORE INTO vote_spool "
+            "(receipt_id, voter_id, position_id, candidate_id, ip_address, user_agent, queued_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (receipt_id, str(voter_id), str(position_id), str(candidate_id), ip_address, user_agent or '', time.time()),
+        )
+        return receipt_id if cursor.rowcount else None
+
+    def is_spooled(self, voter_id, position_id):
+        row = self.connection.execute(
+            "SELECT 1 FROM vote_spool WHERE voter_id = ? AND position_id = ? AND status != ?",
+            (str(voter_id), str(position_id), DUPLICATE),
+        ).fetchone()
+        return row is not None
+
+    def pending(self, limit):
+        return self.connection.execute(
+            "SELECT * FROM vote_spool WHERE status = ? ORDER BY queued_at LIMIT ?",
+            (PENDING, limit),
+        ).fetchall()
+
+    def mark(self, receipt_ids, status):
+        if not receipt_ids:
+            return
+        now = time.time()
+        self.connection.executemany(
+            "UPDATE vote_spool SET status = ?, committed_at = ? WHERE receipt_id = ?",
+            [(status, now, rid) for rid in receipt_ids],
+        )
+
+    def status(self, receipt_id):
+        row = self.connection.execute(
+            "SELECT * FROM vote_spool WHERE receipt_id = ?", (str(receipt_id),)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def purge(self, older_than_seconds):
+        """Delete settled receipts older than the given age; failed ones are kept. Returns the number removed."""
+        cursor = self.connection.execute(
+            "DELETE FROM vote_spool WHERE status IN (?, ?) AND committed_at < ?",
+            (COMMITTED, DUPLICATE, time.time() - older_than_seconds),
+        )
+        return cursor.rowcount
+
+
+_spool = None
+
+
+def get_spool():
+    global _spool
+    if _spool is None:
+        _spool = VoteSpool()
+    return _spool
+
+
+def _commit(spool, rows):
+    receipts = [row['receipt_id'] for row in rows]
+    with transaction.atomic():
+        writes = repository.insert_votes([
+            Vote(
+                id=row['receipt_id'],
+                voter_id=row['voter_id'],
+                position_id=row['position_id'],
+                student_voted_for_id=row['candidate_id'],
+            )
+            for row in rows
+        ])
+        inserted = {row['receipt_id'] for row, (_, status) in zip(rows, writes) if status == repository.CREATED}
+        # Receipts whose vote already exists were committed by an earlier pass that stopped before marking them
+        replayed = {
+            str(pk) for pk in Vote.objects.filter(
+                id__in=[rid for rid in receipts if rid not in inserted]
+            ).values_list('id', flat=True)
+        }
+        # The rest are duplicates: votes the voter had already cast
+        tally.record_votes([
+            (row['position_id'], row['candidate_id']) for row in rows if row['receipt_id'] in inserted
+        ])
+        VoteAttempt.objects.bulk_create([
+            VoteAttempt(
+                voter_id=row['voter_id'],
+                ip_address=row['ip_address'],
+                position_id=row['position_id'],
+                success=row['receipt_id'] in inserted,
+                reason='' if row['receipt_id'] in inserted else 'Duplicate vote discarded by committer.',
+                user_agent=row['user_agent'],
+            )
+            for row in rows if row['receipt_id'] not in replayed
+        ])
+
+    committed = inserted | replayed
+    duplicates = [rid for rid in receipts if rid not in committed]
+    spool.mark(list(committed), COMMITTED)
+    spool.mark(duplicates, DUPLICATE)
+    return len(committed), len(duplicates), 0
+
+
+def _commit_or_split(spool, rows):
+    try:
+        return _commit(spool, rows)
+    except (IntegrityError, DataError):
+        if len(rows) == 1:
+            logger.exception("Spooled vote %s was rejected by the database; marked failed.", rows[0]['receipt_id'])
+            spool.mark([rows[0]['receipt_id']], FAILED)
+            return 0, 0, 1
+    middle = len(rows) // 2
+    first = _commit_or_split(spool, rows[:middle])
+    second = _commit_or_split(spool, rows[middle:])
+    return tuple(a + b for a, b in zip(first, second))
+
+
+def commit_pending(spool, batch_size=500):
+    """Move one batch of spooled votes into the database. Returns (committed, duplicates, failed)."""
+    rows = spool.pending(batch_size)
+    if not rows:
+        return 0, 0, 0
+    return _commit_or_split(spool, rows)
@@ -0,0 +1,104 @@
+"""
+Qualified-candidate listings.
+
+The public listings of students who may stand for a position and of their
+nominations are paginated projections built with ``.values()`` rather than
+full serializers. Each page is cached under the Student and Candidate versions
+(see utils.conditional), so it is rebuilt only after one of them changes.
+Cache keys use only the recognised query parameters, so arbitrary parameters
+cannot fill the cache.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db.models import F
+
+from utils import conditional
+from utils.pagination import paginate
+
+from .models import Candidate, Student
+from . import results
+
+CACHE_TIMEOUT = 60 * 5
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+PARAMS = ('gender', 'page', 'page_size', 'cursor', 'count')
+
+
+def _gender(request):
+    gender = request.query_params.get('gender')
+    return gender if gender in ('male', 'female') else None
+
+
+def _cached_page(request, kind, build):
+    params = {name: request.query_params.get(name) for name in PARAMS if name in request.query_params}
+    signature = json.dumps([
+        conditional.versions([conditional.version_key(Student), conditional.version_key(Candidate)]),
+        request.get_host(), params,
+    ])
+    key = f"qualified_{kind}_{hashlib.sha1(signature.encode()).hexdigest()}"
+    page = cache.get(key)
+    if page is None:
+        page = build()
+        cache.set(key, page, CACHE_TIMEOUT)
+    return page
+
+
+def _picture(request, name):
+    return request.build_absolute_uri(results.picture_url(name)) if name else None
+
+
+def qualified_students(request):
+    """Return (rows, pagination) of active final-year students."""
+    def build():
+        queryset = Student.objects.filter(level=500, status='active')
+        gender = _gender(request)
+        if gender:
+            queryset = queryset.filter(gender=gender)
+        queryset = queryset.annotate(photo=results.display_picture()).values('id', 'full_name', 'matric_number', 'gender', 'photo')
+        rows, pagination = paginate(
+            request, queryset, ('full_name', 'id'), page_size=PAGE_SIZE, max_page_size=MAX_PAGE_SIZE, cached_count=False
+        )
+        return [
+            {
+                'id': row['id'],
+                'full_name': row['full_name'],
+                'matric_number': row['matric_number'],
+                'gender': row['gender'],
+                'picture': _picture(request, row['photo']),
+            }
+            for row in rows
+        ], pagination
+
+    return _cached_page(request, 'students', build)
+
+
+def qualified_nominations(request):
+    """Return (rows, pagination) of the nominations of active final-year students."""
+    def build():
+        queryset = Candidate.objects.filter(student__level=500, student__status='active')
+        gender = _gender(request)
+        if gender:
+            queryset = queryset.filter(student__gender=gender)
+        queryset = queryset.values(
+            'id', 'student_id', 'position_id', 'alias', 'photo', 'created_at',
+            full_name=F('student__full_name'), position_name=F('position__name'),
+        )
+        rows, pagination = paginate(
+            request, queryset, ('-created_at', 'id'), page_size=PAGE_SIZE, max_page_size=MAX_PAGE_SIZE, cached_count=False
+        )
+        return [
+            {
+                'id': row['id'],
+                'student': row['student_id'],
+                'full_name': row['full_name'],
+                'alias': row['alias'],
+                'position': row['position_id'],
+                'position_name': row['position_name'],
+                'photo': _picture(request, row['photo']),
+            }
+            for row in rows
+        ], pagination
+
+    return _cached_page(request, 'nominations', build)
@@ -0,0 +1,181 @@
+"""
+Live tally and turnout stream.
+
+Each process runs at most one ``Broadcaster`` per watched election. It polls
+the tally version (one cache read per interval, see voting.tally) and only
+when votes have been committed runs one aggregation, diffs it against the
+previous state and pushes the changes to every subscriber. A new subscriber
+first receives the full state. Watchers therefore cost one aggregation per
+update per process, however many of them there are.
+
+The version lives in the shared cache (see ``CACHES`` in settings); with the
+in-process cache of DEBUG runs only votes committed by the same process are
+noticed.
+"""
+import asyncio
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Sum
+
+from .models import Vote, VoterRoll, VoteTally
+from . import tally
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_BACKLOG = 100
+
+
+def load_state(election_id):
+    """Current per-candidate counts and turnout of an election."""
+    rows = VoteTally.objects.filter(position__election_id=election_id) \
+        .values('position_id', 'candidate_id').annotate(votes=Sum('count'))
+    tallies = {(str(row['position_id']), str(row['candidate_id'])): row['votes'] for row in rows}
+    voters = Vote.objects.filter(position__election_id=election_id).values('voter_id').distinct().count()
+    roll = VoterRoll.objects.filter(election_id=election_id).values('total').first()
+    eligible = roll['total'] if roll else None
+    return {
+        'tallies': tallies,
+        'total_votes': sum(tallies.values()),
+        'turnout': {
+            'voters': voters,
+            'eligible_voters': eligible,
+            'percentage': round(voters / eligible * 100, 2) if eligible else None,
+        },
+    }
+
+
+def _tally_entries(tallies, previous=None):
+    entries = []
+    for (position_id, candidate_id), votes in tallies.items():
+        before = previous.get((position_id, candidate_id), 0) if previous is not None else None
+        if before == votes:
+            continue
+        entry = {'position': position_id, 'candidate': candidate_id, 'votes': votes}
+        if before is not None:
+            entry['delta'] = votes - before
+        entries.append(entry)
+    return entries
+
+
+def snapshot_event(state):
+    return {
+        'tallies': _tally_entries(state['tallies']),
+        'total_votes': state['total_votes'],
+        'turnout': state['turnout'],
+    }
+
+
+def delta_event(previous, state):
+    """Changes between two states, or None if nothing changed."""
+    entries = _tally_entries(state['tallies'], previous['tallies'])
+    # Candidates that dropped out of the tally (votes deleted) are reported at zero
+    for position_id, candidate_id in previous['tallies'].keys() - state['tallies'].keys():
+        votes = previous['tallies'][(position_id, candidate_id)]
+        entries.append({'position': position_id, 'candidate': candidate_id, 'votes': 0, 'delta': -votes})
+    if not entries and previous['turnout'] == state['turnout']:
+        return None
+    return {
+        'tallies': entries,
+        'total_votes': state['total_votes'],
+        'turnout': state['turnout'],
+    }
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+class Broadcaster:
+    """Single publisher of one election's live updates within this process."""
+
+    def __init__(self, election_id, interval):
+        self.election_id = election_id
+        self.interval = interval
+        self.subscribers = set()
+        self.needs_snapshot = set()
+        self.state = None
+        self.version = object()
+        self.task = None
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_BACKLOG)
+        self.subscribers.add(queue)
+        self.needs_snapshot.add(queue)
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+        self.needs_snapshot.discard(queue)
+
+    def publish(self, queue, event, data):
+        try:
+            queue.put_nowait((event, data))
+        except asyncio.QueueFull:
+            # A subscriber that fell behind is resynchronised with a full snapshot
+            while not queue.empty():
+                queue.get_nowait()
+            self.needs_snapshot.add(queue)
+
+    async def run(self):
+        try:
+            while self.subscribers:
+                version = await cache.aget(tally.VERSION_KEY)
+                if version != self.version or self.state is None:
+                    self.version = version
+                    previous, self.state = self.state, await sync_to_async(load_state)(self.election_id)
+                    delta = delta_event(previous, self.state) if previous is not None else None
+                    if delta:
+                        for queue in self.subscribers - self.needs_snapshot:
+                            self.publish(queue, 'delta', delta)
+                if self.needs_snapshot:
+                    snapshot = snapshot_event(self.state)
+                    pending, self.needs_snapshot = self.needs_snapshot, set()
+                    for queue in pending:
+                        self.publish(queue, 'snapshot', snapshot)
+                await asyncio.sleep(self.interval)
+        except Exception as e:
+            logger.error(f"[LIVE] Broadcaster for election {self.election_id} failed: {str(e)}")
+            for queue in self.subscribers:
+                self.publish(queue, 'error', {'detail': "Live updates are unavailable."})
+        finally:
+            if _broadcasters.get(self.election_id) is self:
+                del _broadcasters[self.election_id]
+
+
+_broadcasters = {}
+
+
+def get_broadcaster(election_id):
+    broadcaster = _broadcasters.get(election_id)
+    if broadcaster is None:
+        broadcaster = _broadcasters[election_id] = Broadcaster(
+            election_id, getattr(settings, 'LIVE_RESULTS_POLL_INTERVAL', 1.0)
+        )
+    return broadcaster
+
+
+async def stream(election_id):
+    """Server-sent events for one subscriber, with a keep-alive comment when idle."""
+    heartbeat = getattr(settings, 'LIVE_RESULTS_HEARTBEAT', 15)
+    broadcaster = get_broadcaster(election_id)
+    queue = broadcaster.subscribe()
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                event, data = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_event(event, data)
+            if event == 'error':
+                break
+    finally:
+        broadcaster.unsubscribe(queue)
@@ -0,0 +1,61 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+
+from voting.ingestion import get_spool, commit_pending
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Drain the write-behind vote spool into the database in batches (VOTE_INGESTION_MODE='queued')."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Votes committed per transaction')
+        parser.add_argument('--interval', type=float, default=0.5, help='Seconds to sleep when the spool is empty')
+        parser.add_argument('--once', action='store_true', help='Drain what is pending and exit')
+        parser.add_argument('--purge-after', type=int, default=24, help='Delete settled receipts older than N hours')
+
+    def handle(self, *args, **options):
+        spool = get_spool()
+        batch_size = options['batch_size']
+        purge_after = options['purge_after'] * 3600
+        self.stdout.write(self.style.SUCCESS(f"Committing spooled votes from {spool.path}..."))
+
+        total_committed = total_duplicates = total_failed = 0
+        last_purge = time.monotonic()
+        try:
+            while True:
+                try:
+                    committed, duplicates, failed = commit_pending(spool, batch_size)
+                except DatabaseError:
+                    # Bad votes are set aside by commit_pending; this is the database itself, so retry later
+                    if options['once']:
+                        raise
+                    logger.exception("Committing spooled votes failed; retrying.")
+                    close_old_connections()
+                    time.sleep(options['interval'])
+                    continue
+                total_committed += committed
+                total_duplicates += duplicates
+                total_failed += failed
+                if committed or duplicates or failed:
+                    self.stdout.write(
+                        f"Committed {committed} vote(s), discarded {duplicates} duplicate(s), {failed} failed."
+                    )
+                    if committed + duplicates + failed == batch_size:
+                        continue  # more may be waiting; skip the sleep
+                if options['once']:
+                    break
+                if time.monotonic() - last_purge > 3600:
+                    spool.purge(purge_after)
+                    last_purge = time.monotonic()
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. {total_committed} committed, {total_duplicates} duplicate(s) discarded, {total_failed} failed."
+        ))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from voting.models import Election
+from voting import snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Freeze the results of concluded elections into result snapshots. "
+        "Run it at election end (e.g. from cron); elections already frozen are skipped unless --force is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--election', type=str, help='Only freeze this election id')
+        parser.add_argument('--force', action='store_true', help='Re-freeze elections that already have a snapshot')
+
+    def handle(self, *args, **options):
+        elections = Election.objects.filter(end_date__lte=timezone.now()).select_related('result_snapshot')
+        if options.get('election'):
+            elections = elections.filter(id=options['election'])
+            if not elections.exists():
+                raise CommandError(f"Concluded election {options['election']} not found.")
+
+        frozen = 0
+        for election in elections:
+            current = getattr(election, 'result_snapshot', None)
+            if current and current.election_end == election.end_date and not options['force']:
+                continue
+            snapshots.freeze(election)
+            frozen += 1
+            self.stdout.write(f"Froze results of '{election.name}'.")
+
+        self.stdout.write(self.style.SUCCESS(f"Froze {frozen} election(s)."))
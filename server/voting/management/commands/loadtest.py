@@ -0,0 +1,246 @@
+import json
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from urllib import error as urlerror, request as urlrequest
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from voting.models import Candidate, Election, LoginAttempt, Position, Student
+from voting import active_election, eligibility, voter_roll
+
+DATE_OF_BIRTH = date(2000, 1, 1)
+INITIAL_PASSWORD = 'loadtest-initial'
+
+
+class Recorder:
+    """Thread-safe latency and status collector, keyed by endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+
+    def add(self, endpoint, seconds, status):
+        with self._lock:
+            self.samples.setdefault(endpoint, []).append((seconds, status))
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the election-day flow (login -> change password -> fetch active election -> cast ballot) "
+        "against a running server with many concurrent clients and report throughput and latency per endpoint. "
+        "Seeds its own students, election, positions and candidates in the server's database and removes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000/api/v1', help='API base URL of the server under test')
+        parser.add_argument('--students', type=int, default=200, help='Number of voters to seed')
+        parser.add_argument('--positions', type=int, default=5, help='Positions in the seeded election')
+        parser.add_argument('--candidates', type=int, default=4, help='Candidates per position')
+        parser.add_argument('--concurrency', type=int, default=20, help='Concurrent clients')
+        parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded data instead of deleting it')
+
+    def handle(self, *args, **options):
+        self.base_url = options['url'].rstrip('/')
+        self.timeout = options['timeout']
+        self.recorder = Recorder()
+        self.phase_seconds = {}
+
+        now = timezone.now()
+        ongoing = Election.objects.filter(is_active=True, start_date__lte=now, end_date__gte=now).first()
+        if ongoing:
+            # Password changes are refused while an election is running, and only one may be active
+            raise CommandError(f"Election '{ongoing.name}' is active; run the load test outside an election.")
+
+        run = uuid.uuid4().hex[:6].upper()
+        self.stdout.write(f"Seeding load test run {run}...")
+        election, students, candidates = self.seed(run, options)
+        try:
+            self.run_phase(
+                "Pre-election (login, change password)", self.pre_election_client,
+                students, options['concurrency']
+            )
+
+            Election.objects.filter(pk=election.pk).update(is_active=True)
+            election.is_active = True
+            active_election.invalidate()
+            eligibility.build_election_index(election)
+            voter_roll.materialize(election)
+
+            self.run_phase(
+                "Election (login, fetch active election, cast ballot)",
+                lambda student: self.voting_client(student, candidates),
+                students, options['concurrency']
+            )
+            self.report()
+        finally:
+            if options['keep']:
+                self.stdout.write(f"Keeping seeded data (election {election.id}, matric prefix LT/{run}/).")
+            else:
+                self.cleanup(run, election)
+
+    def seed(self, run, options):
+        now = timezone.now()
+        password = make_password(INITIAL_PASSWORD)
+        students = Student.objects.bulk_create([
+            Student(
+                matric_number=f"LT/{run}/{i:05d}",
+                full_name=f"Load Test {i}",
+                level=500,
+                state_of_origin='Load Test',
+                date_of_birth=DATE_OF_BIRTH,
+                gender=random.choice(['male', 'female']),
+                password=password,
+            )
+            for i in range(options['students'])
+        ], batch_size=500)
+
+        election = Election.objects.create(
+            name=f"Load test {run}",
+            start_date=now - timedelta(minutes=1),
+            end_date=now + timedelta(hours=2),
+            is_active=False,
+        )
+        positions = Position.objects.bulk_create([
+            Position(name=f"Load test position {i}", election=election)
+            for i in range(options['positions'])
+        ])
+        nominees = students[:max(1, options['candidates'])]
+        Candidate.objects.bulk_create([
+            Candidate(student=student, position=position)
+            for position in positions for student in nominees
+        ])
+        candidates = {str(position.id): [str(student.id) for student in nominees] for position in positions}
+        self.stdout.write(
+            f"Seeded {len(students)} students, {len(positions)} positions, {len(nominees)} candidates per position."
+        )
+        return election, students, candidates
+
+    def cleanup(self, run, election):
+        prefix = f"LT/{run}/"
+        # Let the server flush its buffered audit rows first (see voting.audit)
+        time.sleep(getattr(settings, 'AUDIT_FLUSH_INTERVAL', 2) + 1)
+        election.delete()
+        LoginAttempt.objects.filter(matric_number__startswith=prefix).delete()
+        deleted, _ = Student.objects.filter(matric_number__startswith=prefix).delete()
+        voter_roll.invalidate_open_rolls()
+        self.stdout.write(f"Removed load test data ({deleted} rows).")
+
+    # Client flows
+
+    def pre_election_client(self, student):
+        client = {'ip': self.client_ip(student)}
+        self.login(client, student, INITIAL_PASSWORD)
+        self.call('change_password', 'POST', '/auth/change-password/', client, {
+            'matric_number': student.matric_number,
+            'old_password': INITIAL_PASSWORD,
+            'new_password': self.new_password(student),
+            'confirm_password': self.new_password(student),
+            'date_of_birth': DATE_OF_BIRTH.isoformat(),
+        })
+
+    def voting_client(self, student, candidates):
+        client = {'ip': self.client_ip(student)}
+        if not self.login(client, student, self.new_password(student)):
+            return
+        status, body = self.call('active_election', 'GET', '/elections/active/', client)
+        if status != 200:
+            return
+        votes = []
+        for position in body['data'].get('positions', []):
+            self.call('position', 'GET', f"/positions/{position['id']}/", client)
+            choices = candidates.get(str(position['id']))
+            if choices:
+                votes.append({'position': position['id'], 'student_voted_for': random.choice(choices)})
+        self.call('ballot', 'POST', '/votes/ballot/', client, {'election': body['data']['id'], 'votes': votes})
+
+    def login(self, client, student, password):
+        status, body = self.call('login', 'POST', '/auth/login/', client, {
+            'matric_number': student.matric_number,
+            'password': password,
+        })
+        if status == 200:
+            client['token'] = body['data']['access']
+            return True
+        return False
+
+    def new_password(self, student):
+        return f"Lt!{student.id.hex[:12]}#Vote"
+
+    def client_ip(self, student):
+        # A distinct address per client keeps per-IP rate limits and multi-account checks realistic
+        n = student.id.int
+        return f"10.{(n >> 16) & 255}.{(n >> 8) & 255}.{n & 255}"
+
+    def call(self, endpoint, method, path, client, payload=None):
+        headers = {'Content-Type': 'application/json', 'X-Forwarded-For': client['ip'], 'User-Agent': 'vms-loadtest'}
+        if client.get('token'):
+            headers['Authorization'] = f"Bearer {client['token']}"
+        data = json.dumps(payload).encode() if payload is not None else None
+        req = urlrequest.Request(self.base_url + path, data=data, headers=headers, method=method)
+
+        started = time.perf_counter()
+        try:
+            with urlrequest.urlopen(req, timeout=self.timeout) as resp:
+                status, raw = resp.status, resp.read()
+        except urlerror.HTTPError as e:
+            status, raw = e.code, e.read()
+        except Exception:
+            status, raw = None, b''
+        self.recorder.add(endpoint, time.perf_counter() - started, status)
+
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            body = {}
+        return status, body
+
+    # Reporting
+
+    def run_phase(self, name, client_flow, students, concurrency):
+        self.stdout.write(f"{name}: {len(students)} clients, concurrency {concurrency}...")
+        before = {endpoint: len(samples) for endpoint, samples in self.recorder.samples.items()}
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(client_flow, students))
+        elapsed = time.perf_counter() - started
+        requests = sum(len(samples) for samples in self.recorder.samples.values()) - sum(before.values())
+        self.stdout.write(f"  {requests} requests in {elapsed:.2f}s ({requests / elapsed:.1f} req/s)")
+        for endpoint in self.recorder.samples:
+            if len(self.recorder.samples[endpoint]) > before.get(endpoint, 0):
+                self.phase_seconds[endpoint] = self.phase_seconds.get(endpoint, 0) + elapsed
+
+    def report(self):
+        header = f"{'endpoint':<16}{'requests':>9}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+        self.stdout.write("")
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for endpoint, samples in self.recorder.samples.items():
+            latencies = sorted(seconds * 1000 for seconds, _ in samples)
+            errors = [status for _, status in samples if status is None or status >= 400]
+            rate = len(samples) / self.phase_seconds.get(endpoint, 1)
+            self.stdout.write(
+                f"{endpoint:<16}{len(samples):>9}{len(errors):>8}{rate:>9.1f}"
+                f"{percentile(latencies, 50):>9.1f}{percentile(latencies, 95):>9.1f}"
+                f"{percentile(latencies, 99):>9.1f}{latencies[-1]:>9.1f}"
+            )
+            if errors:
+                by_status = {}
+                for status in errors:
+                    by_status[status or 'no response'] = by_status.get(status or 'no response', 0) + 1
+                summary = ', '.join(f"{status}: {count}" for status, count in by_status.items())
+                self.stdout.write(self.style.WARNING(f"{'':<16}errors by status: {summary}"))
@@ -1,6 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.db.models import F
 from voting.models import Student
+from utils import conditional
+from voting import eligibility, voter_roll
 
 class Command(BaseCommand):
     """
@@ -21,5 +23,10 @@ class Command(BaseCommand):
             promoted_count = Student.objects.filter(level=level, status='active').update(level=F('level') + 100)
             self.stdout.write(f"Promoted {promoted_count} students from {level} to {level + 100} Level.")
             
+        # Bulk status updates bypass model signals
+        eligibility.invalidate_all()
+        voter_roll.invalidate_open_rolls()
+        conditional.bump(Student)
+
         self.stdout.write(self.style.SUCCESS("Student promotion process completed."))
         
\ No newline at end of file
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from voting.models import Election
+from voting import tally
+
+
+class Command(BaseCommand):
+    help = "Recompute the VoteTally table from the Vote table (all elections or one)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--election', type=str, help='Only rebuild tallies for this election id')
+
+    def handle(self, *args, **options):
+        election = None
+        if options.get('election'):
+            election = Election.objects.filter(id=options['election']).first()
+            if not election:
+                raise CommandError(f"Election {options['election']} not found.")
+
+        scope = f"election '{election.name}'" if election else "all elections"
+        self.stdout.write(f"Rebuilding vote tallies for {scope}...")
+        rows = tally.rebuild(election)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} tally row(s)."))
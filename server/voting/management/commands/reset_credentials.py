@@ -0,0 +1,57 @@
+import csv
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from voting.models import Election
+from voting import credentials
+
+
+class Command(BaseCommand):
+    help = (
+        "Reset the passwords of every student of a level or of an election's voter roll "
+        "(see voting.credentials). For resets too large for the reset-credentials endpoint; "
+        "set PASSWORD_HASH_WORKERS to the host's core count to hash in parallel."
+    )
+
+    def add_arguments(self, parser):
+        scope = parser.add_mutually_exclusive_group(required=True)
+        scope.add_argument('--level', type=int, help='Reset the students of this level')
+        scope.add_argument('--election', type=str, help="Reset the students of this election's voter roll")
+        parser.add_argument('--include-changed', action='store_true', help='Also reset students who set their own password')
+        parser.add_argument('--state-passwords', action='store_true', help='Make the state of origin the password again instead of a random one')
+        parser.add_argument('--output', type=str, help='CSV file for the new credentials (required for random passwords)')
+
+    def handle(self, *args, **options):
+        random_passwords = not options['state_passwords']
+        if random_passwords and not options['output']:
+            raise CommandError("--output is required: random passwords are only written there.")
+
+        now = timezone.now()
+        if Election.objects.filter(is_active=True, start_date__lte=now, end_date__gte=now).exists():
+            raise CommandError("Credentials cannot be reset while an election is ongoing.")
+
+        election = None
+        if options['election']:
+            try:
+                election = Election.objects.filter(pk=uuid.UUID(options['election'])).first()
+            except ValueError:
+                election = None
+            if election is None:
+                raise CommandError("Election not found.")
+
+        students = credentials.students_for(options['level'], election, options['include_changed'])
+        self.stdout.write(f"Resetting {students.count()} password(s)...")
+        if not random_passwords:
+            reset = credentials.reset(students, random_passwords=False)
+            self.stdout.write(self.style.SUCCESS(f"Reset {len(reset)} password(s)."))
+            return
+
+        # Opened first, so an unwritable path fails before any password changes
+        with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+            reset = credentials.reset(students)
+            writer = csv.writer(output)
+            writer.writerow(credentials.CSV_HEADER)
+            writer.writerows(reset)
+        self.stdout.write(self.style.SUCCESS(f"Reset {len(reset)} password(s); credentials written to {options['output']}."))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from voting.models import ImportJob
+from voting import imports
+
+
+class Command(BaseCommand):
+    help = (
+        "Process pending student import jobs. Use where jobs cannot run on a worker thread "
+        "(IMPORT_IN_THREAD=False, e.g. serverless hosts), from cron or a worker process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--job', type=str, help='Only process this job id')
+
+    def handle(self, *args, **options):
+        jobs = ImportJob.objects.filter(status='pending').order_by('created_at')
+        if options.get('job'):
+            jobs = jobs.filter(pk=options['job'])
+
+        processed = 0
+        for job_id in list(jobs.values_list('pk', flat=True)):
+            imports.run(job_id)
+            job = ImportJob.objects.get(pk=job_id)
+            processed += 1
+            self.stdout.write(
+                f"Import {job.file_name}: {job.status}, {job.created_count} created, {job.error_count} issue(s)."
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} import job(s)."))
@@ -1,11 +1,10 @@
 import json
 from django.http import JsonResponse
-from django.utils import timezone
 from django.core.cache import cache
 from django.conf import settings
-from datetime import timedelta
 import logging
 from .models import IPRestriction, LoginAttempt
+from . import pacing
 
 logger = logging.getLogger(__name__)
 
@@ -57,11 +56,12 @@ class SecurityMiddleware:
         if any(request.path.startswith(path) for path in skip_paths):
             return False
             
+        # Requests per IP in a fixed hourly window: one cache increment per request
         cache_key = f"rate_limit_{ip_address}"
-        requests = cache.get(cache_key, [])
-        now = timezone.now()
-        
-        requests = [req_time for req_time in requests if now - req_time < timedelta(hours=1)]
+        try:
+            count = cache.incr(cache_key)
+        except ValueError:
+            count = 1 if cache.add(cache_key, 1, 3600) else cache.incr(cache_key)
 
         # Check if rate limit exceeded (1000 requests per hour for regular endpoints)
         max_requests = 1000
@@ -70,14 +70,7 @@ class SecurityMiddleware:
         if '/api/v1/auth/' in request.path:
             max_requests = 420
 
-        if len(requests) >= max_requests:
-            return True
-            
-        # Add current request
-        requests.append(now)
-        cache.set(cache_key, requests, 3600)  # Cache for 1 hour
-        
-        return False
+        return count > max_requests
 
 
 class VotingSecurityMiddleware:
@@ -105,16 +98,9 @@ class VotingSecurityMiddleware:
         ip_address = self.get_client_ip(request)
         user_id = request.user.id
         
-        cache_key = f"vote_timing_{user_id}"
-        last_vote_time = cache.get(cache_key)
-        
-        if last_vote_time:
-            time_diff = timezone.now() - last_vote_time
-            if time_diff < timedelta(seconds=5):
-                logger.warning(f"Rapid voting detected for user {request.user.matric_number}")
-                return False
-        
-        cache.set(cache_key, timezone.now(), 300)  # Cache for 5 minutes
+        if not pacing.allow(request, user_id):
+            logger.warning(f"Rapid voting detected for user {request.user.matric_number}")
+            return False
         
         # Check for IP hopping during voting session
         session_ip_key = f"voting_session_ip_{user_id}"
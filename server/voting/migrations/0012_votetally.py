@@ -0,0 +1,40 @@
+# Generated by Django 5.1.6 on 2026-10-17 06:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_tallies(apps, schema_editor):
+    Vote = apps.get_model('voting', 'Vote')
+    VoteTally = apps.get_model('voting', 'VoteTally')
+    rows = Vote.objects.values('position_id', 'student_voted_for_id').annotate(total=Count('id'))
+    VoteTally.objects.bulk_create([
+        VoteTally(position_id=row['position_id'], candidate_id=row['student_voted_for_id'], count=row['total'])
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voting', '0011_devicefingerprint_passwordchangeattempt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoteTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField(default=0)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vote_tallies', to=settings.AUTH_USER_MODEL)),
+                ('position', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tallies', to='voting.position')),
+            ],
+            options={
+                'unique_together': {('position', 'candidate', 'shard')},
+            },
+        ),
+        migrations.RunPython(populate_tallies, migrations.RunPython.noop),
+    ]
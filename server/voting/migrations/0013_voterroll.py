@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-17 06:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voting', '0012_votetally'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoterRoll',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('student_ids', models.BinaryField()),
+                ('flags', models.BinaryField()),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('male_count', models.PositiveIntegerField(default=0)),
+                ('female_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('election', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='voter_roll', to='voting.election')),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.6 on 2026-10-17 06:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voting', '0013_voterroll'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResultSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payload', models.JSONField()),
+                ('etag', models.CharField(max_length=64)),
+                ('election_end', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('election', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='result_snapshot', to='voting.election')),
+            ],
+        ),
+    ]
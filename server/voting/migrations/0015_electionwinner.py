@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-17 06:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voting', '0014_resultsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ElectionWinner',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position_name', models.CharField(max_length=255)),
+                ('winner_name', models.CharField(max_length=255)),
+                ('picture', models.CharField(blank=True, max_length=255, null=True)),
+                ('vote_count', models.PositiveIntegerField(default=0)),
+                ('is_tie', models.BooleanField(default=False)),
+                ('election_end', models.DateTimeField(db_index=True)),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='positions_won', to=settings.AUTH_USER_MODEL)),
+                ('election', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='winners', to='voting.election')),
+                ('position', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='winners', to='voting.position')),
+            ],
+            options={
+                'ordering': ['-election_end', 'position_name'],
+                'unique_together': {('election', 'position')},
+            },
+        ),
+    ]
@@ -79,6 +79,18 @@ class Student(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'matric_number'
     REQUIRED_FIELDS = ['full_name', 'level']
 
+    # Fields the election voter rolls read (see voting.voter_roll)
+    ROLL_FIELDS = ('status', 'level', 'gender', 'has_changed_password')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Kept so saves can tell which roll fields changed without reading the row again
+        instance._loaded_roll = {
+            field: value for field, value in zip(field_names, values) if field in cls.ROLL_FIELDS
+        }
+        return instance
+
     def save(self, *args, **kwargs):
         if self.matric_number:
             self.matric_number = self.matric_number.upper()
@@ -208,6 +220,118 @@ class Vote(models.Model):
             raise ValidationError("Student is not a nominated candidate for this position.")
 
 
+class VoteTally(models.Model):
+    """
+    Running vote count per (position, candidate), updated in the same
+    transaction as every vote insert. A hot candidate's count may be spread
+    over several shard rows (settings.VOTE_TALLY_SHARDS) to reduce row-lock
+    contention; readers sum the shards.
+    """
+    position = models.ForeignKey(Position, on_delete=models.CASCADE, related_name='tallies')
+    candidate = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='vote_tallies')
+    shard = models.PositiveSmallIntegerField(default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('position', 'candidate', 'shard')
+
+    def __str__(self):
+        return f"{self.candidate_id} @ {self.position_id} [shard {self.shard}]: {self.count}"
+
+
+class VoterRoll(models.Model):
+    """
+    Students eligible to vote in an election, materialized when the election
+    is activated. ``student_ids`` packs the sorted 16-byte student UUIDs and
+    ``flags`` holds one byte per student in the same order (see voting.voter_roll).
+    """
+    election = models.OneToOneField(Election, on_delete=models.CASCADE, related_name='voter_roll')
+    student_ids = models.BinaryField()
+    flags = models.BinaryField()
+    total = models.PositiveIntegerField(default=0)
+    male_count = models.PositiveIntegerField(default=0)
+    female_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Voter roll for {self.election_id}: {self.total} students"
+
+
+class ResultSnapshot(models.Model):
+    """
+    Frozen results of a concluded election (see voting.snapshots). ``election_end``
+    records the end date the snapshot was taken for, so moving the election's
+    end date invalidates it.
+    """
+    election = models.OneToOneField(Election, on_delete=models.CASCADE, related_name='result_snapshot')
+    payload = models.JSONField()
+    etag = models.CharField(max_length=64)
+    election_end = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Results of {self.election_id} frozen at {self.created_at}"
+
+
+class ElectionWinner(models.Model):
+    """
+    Winner of each position of a concluded election, projected when the
+    election's results are frozen (see voting.snapshots) and read by the
+    recent-winners showcase. ``picture`` is a storage name.
+    """
+    election = models.ForeignKey(Election, on_delete=models.CASCADE, related_name='winners')
+    position = models.ForeignKey(Position, on_delete=models.CASCADE, related_name='winners')
+    candidate = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='positions_won')
+    position_name = models.CharField(max_length=255)
+    winner_name = models.CharField(max_length=255)
+    picture = models.CharField(max_length=255, blank=True, null=True)
+    vote_count = models.PositiveIntegerField(default=0)
+    is_tie = models.BooleanField(default=False)
+    election_end = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ('election', 'position')
+        ordering = ['-election_end', 'position_name']
+
+    def __str__(self):
+        return f"{self.winner_name} → {self.position_name}"
+
+
+class ImportJob(models.Model):
+    """
+    A student CSV import processed in the background (see voting.imports).
+    The upload is kept at ``file_path`` and rejected rows are written to the
+    error report at ``error_report_path`` as the job runs.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(Student, on_delete=models.SET_NULL, null=True, blank=True, related_name='import_jobs')
+    file_name = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=500)
+    error_report_path = models.CharField(max_length=500, blank=True)
+    options = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    processed_rows = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Import {self.file_name} ({self.status})"
+
+
 class IPRestriction(models.Model):
     ip_address = models.GenericIPAddressField(unique=True)
     is_blocked = models.BooleanField(default=False)
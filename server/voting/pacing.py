@@ -0,0 +1,50 @@
+"""
+Vote pacing.
+
+One rate limiter per voter, kept entirely in the cache and configured by
+``VOTING_SECURITY`` in ``security_config``. A voter holds ``vote_burst``
+tokens and each vote takes one until ``min_vote_interval`` seconds later.
+Every token is a cache key claimed with an atomic ``cache.add``, so with the
+default single token a pacing decision costs one cache operation and no
+database reads.
+
+The decision is memoized on the request, so the voting middleware and the
+vote serializer share it and a single request only uses one token.
+"""
+import math
+
+from django.core.cache import cache
+
+from .security_config import VOTING_SECURITY
+
+
+def _interval():
+    return max(1, math.ceil(VOTING_SECURITY.get('min_vote_interval', 10)))
+
+
+def _burst():
+    return max(1, int(VOTING_SECURITY.get('vote_burst', 1)))
+
+
+def _token_key(voter_id, slot):
+    return f"vote_pace_{voter_id}_{slot}"
+
+
+def take(voter_id):
+    """Take a pacing token for the voter. Returns True if the vote may proceed."""
+    interval = _interval()
+    for slot in range(_burst()):
+        if cache.add(_token_key(voter_id, slot), 1, interval):
+            return True
+    return False
+
+
+def allow(request, voter_id):
+    """Pacing decision for this request, taking at most one token per request."""
+    raw = getattr(request, '_request', request)
+    decision = getattr(raw, '_vote_pacing', None)
+    if decision is None:
+        decision = take(voter_id)
+        raw._vote_pacing = decision
+    return decision
+
@@ -0,0 +1,97 @@
+"""
+Vote writes.
+
+Every vote insert goes through ``insert_votes``, which relies on the
+``(voter, position)`` unique constraint instead of checking for an existing
+vote first: on PostgreSQL and SQLite it issues a single
+``INSERT ... ON CONFLICT DO NOTHING RETURNING id``, so the statement itself
+reports which votes were new and which were duplicates. No pre-check query
+and no IntegrityError handling is needed, and concurrent duplicates cannot
+slip through. A vote whose id is already taken is skipped the same way, so
+replaying a batch with fixed ids (the spool's receipts) is harmless.
+"""
+from collections import namedtuple
+
+from django.db import connection
+
+from .models import Vote
+
+CREATED = 'created'
+DUPLICATE = 'duplicate'
+
+VoteWrite = namedtuple('VoteWrite', ['vote', 'status'])
+
+_BATCH_SIZE = 500
+_RETURNING_VENDORS = {'postgresql', 'sqlite'}
+
+
+def _insert_sql(count):
+    meta = Vote._meta
+    qn = connection.ops.quote_name
+    fields = meta.concrete_fields
+    row = '(' + ', '.join(['%s'] * len(fields)) + ')'
+    return (
+        f"INSERT INTO {qn(meta.db_table)} ({', '.join(qn(f.column) for f in fields)}) "
+        f"VALUES {', '.join([row] * count)} "
+        f"ON CONFLICT DO NOTHING RETURNING {qn(meta.pk.column)}"
+    )
+
+
+def _row_params(vote):
+    params = []
+    for field in Vote._meta.concrete_fields:
+        params.append(field.get_db_prep_save(field.pre_save(vote, add=True), connection))
+    return params
+
+
+def _insert_returning(votes):
+    inserted = set()
+    pk = Vote._meta.pk
+    with connection.cursor() as cursor:
+        for start in range(0, len(votes), _BATCH_SIZE):
+            batch = votes[start:start + _BATCH_SIZE]
+            params = [param for vote in batch for param in _row_params(vote)]
+            cursor.execute(_insert_sql(len(batch)), params)
+            inserted.update(pk.to_python(row[0]) for row in cursor.fetchall())
+    return inserted
+
+
+def _insert_ignore(votes):
+    # Backends without ON CONFLICT ... RETURNING: skip conflicts, then read back the ids
+    ids = [vote.id for vote in votes]
+    existing = set(Vote.objects.filter(id__in=ids).values_list('id', flat=True))
+    Vote.objects.bulk_create(votes, batch_size=_BATCH_SIZE, ignore_conflicts=True)
+    return set(Vote.objects.filter(id__in=ids).values_list('id', flat=True)) - existing
+
+
+def insert_votes(votes):
+    """
+    Insert unsaved Vote instances, skipping any the voter already cast for
+    that position or whose id already exists. Returns a VoteWrite(vote, status) per input, in order,
+    where status is CREATED or DUPLICATE.
+    """
+    votes = list(votes)
+    if not votes:
+        return []
+    if connection.vendor in _RETURNING_VENDORS:
+        inserted = _insert_returning(votes)
+    else:
+        inserted = _insert_ignore(votes)
+
+    pk = Vote._meta.pk
+    results = []
+    for vote in votes:
+        if pk.to_python(vote.pk) in inserted:
+            vote._state.adding = False
+            results.append(VoteWrite(vote, CREATED))
+        else:
+            results.append(VoteWrite(vote, DUPLICATE))
+    return results
+
+
+def insert_vote(voter_id, position_id, candidate_id, vote_id=None):
+    """Insert one vote. Returns a VoteWrite; ``status`` is DUPLICATE if the voter had already voted."""
+    vote = Vote(voter_id=voter_id, position_id=position_id, student_voted_for_id=candidate_id)
+    if vote_id is not None:
+        vote.id = vote_id
+    return insert_votes([vote])[0]
@@ -0,0 +1,112 @@
+"""
+Election results.
+
+Vote counts, candidate names and pictures for any number of elections come
+from a single grouped query over ``VoteTally``. A candidate's picture is the
+student's picture, falling back to a nomination photo through a correlated
+subquery. Winners and ties are ranked in the same query with window functions,
+so callers never look up students or candidates row by row.
+"""
+from django.db.models import CharField, F, OuterRef, Subquery, Sum, Value, Window
+from django.db.models.functions import Coalesce, Lag, Lead, NullIf, Rank, RowNumber
+
+from .models import Candidate, Student, VoteTally
+
+
+def picture_url(name):
+    """URL of a stored student picture or candidate photo (both use the default storage)."""
+    if not name:
+        return None
+    return Student._meta.get_field('picture').storage.url(name)
+
+
+def fallback_photo(student='pk'):
+    """The student's latest nomination photo, shown when they have no picture of their own."""
+    return Subquery(
+        Candidate.objects.filter(student_id=OuterRef(student))
+        .exclude(photo__isnull=True).exclude(photo='')
+        .order_by('-updated_at').values('photo')[:1]
+    )
+
+
+def display_picture(picture='picture', student='pk'):
+    """The student's picture, else ``fallback_photo``, as a storage name."""
+    return Coalesce(NullIf(F(picture), Value('')), fallback_photo(student), output_field=CharField())
+
+
+def _rows(election_ids):
+    votes = Sum('count')
+
+    return VoteTally.objects.filter(position__election_id__in=election_ids) \
+        .values('position_id', 'candidate_id') \
+        .annotate(
+            vote_count=votes,
+            election_id=F('position__election_id'),
+            position_name=F('position__name'),
+            student_name=F('candidate__full_name'),
+            picture=display_picture('candidate__picture', 'candidate_id'),
+        ) \
+        .annotate(
+            # Added after the aggregate so the window columns stay out of GROUP BY
+            rank=Window(Rank(), partition_by=F('position_id'), order_by=votes.desc()),
+            # Neighbouring counts in rank order; equal to vote_count on either side means a tie
+            previous_count=Window(Lag(votes), partition_by=F('position_id'), order_by=votes.desc()),
+            next_count=Window(Lead(votes), partition_by=F('position_id'), order_by=votes.desc()),
+        ) \
+        .filter(vote_count__gt=0) \
+        .order_by('position_name', 'position_id', '-vote_count', 'student_name')
+
+
+def results_by_election(election_ids, resolve_pictures=True):
+    """
+    Return {election_id: [position results]} for the given elections. Each
+    position lists its candidates by descending vote count with their rank;
+    ``is_tie`` marks candidates level with another, and on the position
+    whether first place is shared. With ``resolve_pictures=False`` pictures
+    are left as storage names, for callers that store the results.
+    """
+    grouped = {}
+    for row in _rows(election_ids):
+        positions = grouped.setdefault(row['election_id'], {})
+        is_tie = row['vote_count'] in (row['previous_count'], row['next_count'])
+        position = positions.setdefault(row['position_id'], {
+            'position_id': row['position_id'],
+            'position_name': row['position_name'],
+            'is_tie': row['rank'] == 1 and is_tie,
+            'candidates': [],
+        })
+        position['candidates'].append({
+            'student_id': row['candidate_id'],
+            'student_name': row['student_name'],
+            'picture': picture_url(row['picture']) if resolve_pictures else row['picture'],
+            'vote_count': row['vote_count'],
+            'rank': row['rank'],
+            'is_tie': is_tie,
+        })
+    return {election_id: list(positions.values()) for election_id, positions in grouped.items()}
+
+
+def top_candidates(election_ids):
+    """
+    The top candidate of every position of the given elections, picked with
+    ROW_NUMBER() over votes (ties broken by name) in the same single query.
+    Pictures are storage names.
+    """
+    rows = _rows(election_ids).annotate(
+        row_number=Window(
+            RowNumber(), partition_by=F('position_id'), order_by=[Sum('count').desc(), F('student_name').asc()]
+        )
+    )
+    return list(rows.filter(row_number=1))
+
+
+def election_results(election, resolve_pictures=True):
+    return results_by_election([election.pk], resolve_pictures).get(election.pk, [])
+
+
+def winners(position_results):
+    """Top-ranked candidates of each position (several when first place is tied)."""
+    return [
+        (position, [c for c in position['candidates'] if c['rank'] == 1])
+        for position in position_results
+    ]
@@ -36,6 +36,7 @@ IP_SECURITY = {
 # Voting Security Configuration
 VOTING_SECURITY = {
     'min_vote_interval': 10,  # Minimum seconds between votes
+    'vote_burst': 1,  # Votes allowed back to back before min_vote_interval applies
     'max_votes_per_minute': 2,
     'max_rapid_votes': 3,
     'rapid_vote_window': 60,  # 1 minute
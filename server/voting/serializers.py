@@ -1,12 +1,11 @@
 from django.utils import timezone
-from django.core.cache import cache
-from datetime import timedelta
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer as DefaultTokenObtainPairSerializer
 from django.contrib.auth.password_validation import validate_password
 import logging
 
-from .models import Student, Election, Position, Candidate, Vote
+from .models import Student, Election, Position, Candidate, Vote, ImportJob
+from . import ballot_status, eligibility, pacing, results, tally, voter_roll
 
 logger = logging.getLogger(__name__)
 
@@ -37,12 +36,23 @@ class StudentSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['is_active', 'date_joined', 'is_staff', 'is_superuser', 'is_verified', 'has_changed_password']
 
+    @staticmethod
+    def with_fallback_photo(queryset):
+        """
+        Annotate each student with their latest nomination photo, the picture
+        shown when they have none, so a list resolves it without a query per student.
+        """
+        return queryset.annotate(fallback_photo=results.fallback_photo())
+
     def to_representation(self, instance):
         data = super().to_representation(instance)
         request = self.context.get('request')
         if request:
             if instance.picture:
                 data['picture'] = request.build_absolute_uri(instance.picture.url)
+            elif hasattr(instance, 'fallback_photo'):
+                if instance.fallback_photo:
+                    data['picture'] = request.build_absolute_uri(results.picture_url(instance.fallback_photo))
             else:
                 candidate = (
                     Candidate.objects
@@ -85,7 +95,13 @@ class DynamicCandidateSerializer(serializers.ModelSerializer):
         position = self.context.get('position')
         if not position:
             return None
-        return Candidate.objects.filter(student=student, position=position).first()
+        # Loaded once per position per serialization, shared by every candidate
+        memo = self.context.setdefault('enhancements', {})
+        if position.id not in memo:
+            memo[position.id] = {
+                candidate.student_id: candidate for candidate in Candidate.objects.filter(position=position)
+            }
+        return memo[position.id].get(student.id)
 
 
 class PositionSerializer(serializers.ModelSerializer):
@@ -99,17 +115,40 @@ class PositionSerializer(serializers.ModelSerializer):
         model = Position
         fields = ['id', 'name', 'candidate_count', 'vote_count', 'election_name', 'candidates', 'has_voted', 'gender_restriction', 'election', 'position_type']
 
+    @staticmethod
+    def bulk_context(positions):
+        """
+        Serializer context with the counts of many positions loaded up front
+        (one grouped query each at most), so serializing them costs a constant
+        number of queries.
+        """
+        position_ids = [position.id for position in positions]
+        eligible = eligibility.get_eligible_candidate_ids_many(position_ids)
+        return {
+            'candidate_counts': {pid: len(eligible[str(pid)]) for pid in position_ids},
+            'vote_counts': tally.position_totals(position_ids),
+        }
+
     def get_candidate_count(self, position):
-        return position.get_eligible_candidates().count()
+        counts = self.context.get('candidate_counts')
+        if counts is not None and position.id in counts:
+            return counts[position.id]
+        return len(eligibility.get_eligible_candidate_ids(position.id))
 
     def get_vote_count(self, position):
-        return position.votes.count()
+        annotated = getattr(position, 'agg_vote_count', None)
+        if annotated is not None:
+            return annotated
+        counts = self.context.get('vote_counts')
+        if counts is not None and position.id in counts:
+            return counts[position.id]
+        return tally.position_total(position)
 
     def get_candidates(self, position):
         # Only return nominated students when retrieving a single position
         if self.context.get('view') and hasattr(self.context['view'], 'action'):
             if self.context['view'].action == 'retrieve':
-                students = position.get_eligible_candidates()
+                students = Student.objects.filter(id__in=eligibility.get_eligible_candidate_ids(position.id))
                 context = self.context.copy()
                 context['position'] = position
                 return DynamicCandidateSerializer(students, many=True, context=context).data
@@ -118,7 +157,11 @@ class PositionSerializer(serializers.ModelSerializer):
     def get_has_voted(self, position):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return Vote.objects.filter(voter=request.user, position=position).exists()
+            # Loaded once per election per serialization, shared by every nested position
+            memo = self.context.setdefault('voted_positions', {})
+            if position.election_id not in memo:
+                memo[position.election_id] = ballot_status.voted_positions(request.user.id, position.election_id)
+            return position.id in memo[position.election_id]
         return False
 
 
@@ -224,22 +267,13 @@ class CandidateSerializer(serializers.ModelSerializer):
 
 class VoteSerializer(serializers.ModelSerializer):
     voter = serializers.PrimaryKeyRelatedField(read_only=True)
-    student_voted_for = serializers.PrimaryKeyRelatedField(queryset=Student.objects.none())
+    # Nomination is checked against the eligibility index in validate()
+    student_voted_for = serializers.PrimaryKeyRelatedField(queryset=Student.objects.all())
 
     class Meta:
         model = Vote
         fields = ['id', 'voter', 'position', 'student_voted_for']
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        if 'data' in kwargs and 'position' in kwargs['data']:
-            try:
-                position = Position.objects.get(id=kwargs['data']['position'])
-                # restrict to nominated students (via method)
-                self.fields['student_voted_for'].queryset = position.get_eligible_candidates()
-            except Position.DoesNotExist:
-                pass
-
     def validate(self, data):
         position = data.get('position')
         candidate = data.get('student_voted_for')
@@ -249,22 +283,15 @@ class VoteSerializer(serializers.ModelSerializer):
         if not position.election.is_active or not (position.election.start_date <= timezone.now() <= position.election.end_date):
             raise serializers.ValidationError("This election is not currently active.")
 
-        # Voter already voted for this position
-        if request and Vote.objects.filter(voter=request.user, position=position).exists():
-            raise serializers.ValidationError("You have already voted for this position.")
-
         # Candidate must be among nominated list
-        eligible_students = position.get_eligible_candidates()
-        if candidate not in eligible_students:
+        if not eligibility.is_eligible_candidate(position.id, candidate.id):
             raise serializers.ValidationError("Selected student is not nominated for this position.")
 
-        # Voter eligibility by election type
+        # Voter eligibility (election type, status) from the election's voter roll
         if request:
-            if position.election.type == 'specific' and request.user.level != 500:
-                raise serializers.ValidationError("You are not eligible to vote in this specific election.")
-            # (Optional) block inactive users
-            if request.user.status != 'active':
-                raise serializers.ValidationError("Inactive users cannot vote.")
+            roll_error = voter_roll.get_roll(position.election).voter_error(position.election, request.user.id)
+            if roll_error:
+                raise serializers.ValidationError(roll_error)
 
             self.validate_voting_pattern(request.user, position)
 
@@ -272,39 +299,25 @@ class VoteSerializer(serializers.ModelSerializer):
 
     def validate_voting_pattern(self, user, position):
         """Check for suspicious voting patterns."""
-        cache_key = f"last_vote_{user.id}"
-        last_vote_time = cache.get(cache_key)
-        
-        if last_vote_time:
-            time_diff = timezone.now() - last_vote_time
-            if time_diff < timedelta(seconds=10):
-                raise serializers.ValidationError("Please wait a moment before voting again.")
-        
-        cache.set(cache_key, timezone.now(), 60)  # Cache for 1 minute
-        
-        recent_votes = Vote.objects.filter(
-            voter=user,
-            voted_at__gte=timezone.now() - timedelta(seconds=20)
-        ).count()
-        
-        if recent_votes >= 2:
-            raise serializers.ValidationError("You are voting too quickly. Please take your time to consider each position.")
-        
-        if hasattr(self, 'initial_data') and self.initial_data and isinstance(self.initial_data, dict):
-            candidate_id = self.initial_data.get('student_voted_for')
-            if candidate_id:
-                same_candidate_votes = Vote.objects.filter(
-                    voter=user,
-                    student_voted_for_id=candidate_id,
-                    voted_at__gte=timezone.now() - timedelta(minutes=5)
-                ).count()
-                
-                if same_candidate_votes >= 2:
-                    # This might be legitimate if the candidate is running for multiple positions
-                    # but we log it for monitoring
-                    import logging
-                    logger = logging.getLogger(__name__)
-                    logger.info(f"User {user.matric_number} voting for same candidate {candidate_id} multiple times")
+        if not pacing.allow(self.context['request'], user.id):
+            raise serializers.ValidationError("Please wait a moment before voting again.")
+
+
+class BallotSelectionSerializer(serializers.Serializer):
+    position = serializers.UUIDField()
+    student_voted_for = serializers.UUIDField()
+
+
+class BallotSerializer(serializers.Serializer):
+    """Every selection for one election, submitted in a single request."""
+    election = serializers.UUIDField()
+    votes = BallotSelectionSerializer(many=True, allow_empty=False)
+
+    def validate_votes(self, value):
+        positions = [selection['position'] for selection in value]
+        if len(positions) != len(set(positions)):
+            raise serializers.ValidationError("Each position may only appear once on a ballot.")
+        return value
 
 
 class ChangePasswordSerializer(serializers.Serializer):
@@ -383,3 +396,18 @@ class ChangePasswordSerializer(serializers.Serializer):
         user.save(update_fields=['password', 'has_changed_password'])
         logger.info(f"[CHANGE_PASSWORD] Password changed successfully matric={matric}")
         return user
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    has_error_report = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id', 'file_name', 'status', 'processed_rows', 'created_count', 'error_count',
+            'has_error_report', 'message', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+    def get_has_error_report(self, job):
+        return job.error_count > 0
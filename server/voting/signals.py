@@ -0,0 +1,69 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from utils import conditional
+
+from .models import Student, Candidate, Election, Vote, Position
+from . import active_election, ballot_status, eligibility, tally, voter_roll
+
+# Versions behind the API's ETags (utils.conditional); login bookkeeping is not shown by any endpoint
+conditional.track(Election)
+conditional.track(Position)
+conditional.track(Candidate)
+conditional.track(Student, ignore_fields={'last_login', 'last_login_ip', 'failed_login_attempts', 'locked_until'})
+
+
+@receiver(pre_save, sender=Candidate)
+def candidate_moving_position(sender, instance, **kwargs):
+    """A nomination moved to another position also leaves the old position's index stale."""
+    if instance.pk:
+        previous = Candidate.objects.filter(pk=instance.pk).values_list('position_id', flat=True).first()
+        if previous and previous != instance.position_id:
+            eligibility.invalidate_positions([previous])
+
+
+@receiver(post_save, sender=Candidate)
+@receiver(post_delete, sender=Candidate)
+def candidate_changed(sender, instance, **kwargs):
+    eligibility.invalidate_positions([instance.position_id])
+    active_election.invalidate()
+
+
+@receiver(post_save, sender=Election)
+@receiver(post_delete, sender=Election)
+@receiver(post_save, sender=Position)
+@receiver(post_delete, sender=Position)
+def election_changed(sender, instance, **kwargs):
+    active_election.invalidate()
+
+
+@receiver(post_save, sender=Student)
+def student_changed(sender, instance, created=False, update_fields=None, **kwargs):
+    fields = set(Student.ROLL_FIELDS) if update_fields is None else set(update_fields) & set(Student.ROLL_FIELDS)
+    # Login bookkeeping saves name their fields and touch neither index.
+    if not fields:
+        return
+    # Compare against the values the instance was loaded with (Student.from_db)
+    loaded = getattr(instance, '_loaded_roll', None)
+    if created:
+        changed = set()
+    elif loaded is None:
+        changed = fields
+    else:
+        changed = {field for field in fields if field not in loaded or loaded[field] != getattr(instance, field)}
+    instance._loaded_roll = {**(loaded or {}), **{field: getattr(instance, field) for field in fields}}
+
+    if 'status' in changed:
+        eligibility.invalidate_student(instance.pk)
+        # Candidate counts only include nominees who are still eligible
+        active_election.invalidate()
+    if created or changed:
+        voter_roll.update_student(instance)
+
+
+@receiver(post_delete, sender=Vote)
+def vote_deleted(sender, instance, **kwargs):
+    tally.release_votes([(instance.position_id, instance.student_voted_for_id)])
+    election_id = Position.objects.filter(pk=instance.position_id).values_list('election_id', flat=True).first()
+    if election_id:
+        ballot_status.forget(instance.voter_id, election_id)
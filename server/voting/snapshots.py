@@ -0,0 +1,145 @@
+"""
+Frozen results of concluded elections.
+
+Once an election's end date has passed its results cannot change, so they are
+computed once into a ``ResultSnapshot`` (results, winners, ties and turnout)
+and served from there; each position's winner is also projected into
+``ElectionWinner`` for the recent-winners showcase. Snapshots are taken by
+the ``freeze_results`` management command at election end or lazily by the
+first results request afterwards. The payload is also kept in the shared cache, so serving a frozen
+result usually costs no query at all.
+
+A snapshot records the end date it was taken for and is retaken if the
+election's end date has since been moved. With queued vote ingestion, votes
+still waiting in the spool are committed before freezing.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import ElectionWinner, ResultSnapshot, Vote, VoterRoll
+from .serializers import ActiveElectionSerializer
+from . import ingestion, results, tally
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _cache_key(election_id):
+    return f"result_snapshot_{election_id}"
+
+
+def build_payload(election):
+    # Pictures are stored as storage names; signed storage URLs would expire
+    position_results = results.election_results(election, resolve_pictures=False)
+    roll = VoterRoll.objects.filter(election=election).values('total').first()
+    eligible = roll['total'] if roll else None
+    voted = Vote.objects.filter(position__election=election).values('voter_id').distinct().count()
+
+    payload = ActiveElectionSerializer(election).data
+    payload['results'] = position_results
+    payload['winners'] = [
+        {
+            'position_id': position['position_id'],
+            'position_name': position['position_name'],
+            'is_tie': position['is_tie'],
+            'candidates': top,
+        }
+        for position, top in results.winners(position_results)
+    ]
+    payload['turnout'] = {
+        'total_votes': tally.election_total(election),
+        'voters': voted,
+        'eligible_voters': eligible,
+        'percentage': round(voted / eligible * 100, 2) if eligible else None,
+    }
+    # Round-trip through JSON so the stored and the served payload are identical
+    return json.loads(json.dumps(payload, cls=DjangoJSONEncoder))
+
+
+def drain_spool():
+    """Commit the votes still waiting in the write-behind spool (queued ingestion)."""
+    if not ingestion.is_queued():
+        return
+    spool = ingestion.get_spool()
+    while any(ingestion.commit_pending(spool)):
+        pass
+
+
+def freeze(election):
+    """Compute and store the snapshot of a concluded election."""
+    # Spooled votes were cast before the end date; a snapshot is never retaken for them
+    drain_spool()
+    payload = build_payload(election)
+    etag = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+    with transaction.atomic():
+        snapshot, _ = ResultSnapshot.objects.update_or_create(
+            election=election,
+            defaults={'payload': payload, 'etag': etag, 'election_end': election.end_date},
+        )
+        project_winners(election)
+    cache.set(_cache_key(election.pk), snapshot, CACHE_TIMEOUT)
+    return snapshot
+
+
+def project_winners(election):
+    """Replace the election's rows in the ElectionWinner projection."""
+    ElectionWinner.objects.filter(election=election).delete()
+    ElectionWinner.objects.bulk_create([
+        ElectionWinner(
+            election=election,
+            position_id=row['position_id'],
+            candidate_id=row['candidate_id'],
+            position_name=row['position_name'],
+            winner_name=row['student_name'],
+            picture=row['picture'],
+            vote_count=row['vote_count'],
+            is_tie=row['vote_count'] in (row['previous_count'], row['next_count']),
+            election_end=election.end_date,
+        )
+        for row in results.top_candidates([election.pk])
+    ])
+
+
+def get_snapshot(election):
+    """
+    Return the election's ResultSnapshot, freezing it on first use.
+    Returns None while the election has not ended.
+    """
+    if election.end_date > timezone.now():
+        return None
+
+    snapshot = cache.get(_cache_key(election.pk))
+    if snapshot is None:
+        snapshot = ResultSnapshot.objects.filter(election=election).first()
+        if snapshot is not None:
+            cache.set(_cache_key(election.pk), snapshot, CACHE_TIMEOUT)
+    if snapshot is None or snapshot.election_end != election.end_date:
+        try:
+            return freeze(election)
+        except IntegrityError:
+            # Frozen concurrently by another request
+            return ResultSnapshot.objects.get(election=election)
+    return snapshot
+
+
+def served_payload(snapshot):
+    """The snapshot payload with picture names resolved to URLs."""
+    payload = dict(snapshot.payload)
+    for key in ('results', 'winners'):
+        payload[key] = [
+            {**position, 'candidates': [
+                {**candidate, 'picture': results.picture_url(candidate['picture'])}
+                for candidate in position['candidates']
+            ]}
+            for position in payload[key]
+        ]
+    return payload
+
+
+def invalidate(election_id):
+    ResultSnapshot.objects.filter(election_id=election_id).delete()
+    cache.delete(_cache_key(election_id))
@@ -0,0 +1,137 @@
+"""
+Incrementally maintained vote counts.
+
+Every code path that inserts votes calls ``record_votes`` inside the same
+transaction, so ``VoteTally`` always matches the Vote table and results or
+counts never need to aggregate votes. ``rebuild`` recomputes the tallies from
+scratch (see the ``rebuild_tallies`` management command).
+
+Each committed change bumps a version number in the shared cache, which lets
+watchers such as the live results stream notice new votes without querying.
+"""
+import random
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.db.models import Count, F, OuterRef, Subquery, Sum, IntegerField
+from django.db.models.functions import Coalesce
+
+from utils import conditional
+
+from .models import Vote, VoteTally
+
+
+VERSION_KEY = 'vote_tally_version'
+
+
+def version():
+    """Current tally version; changes after every committed tally update."""
+    return conditional.versions([VERSION_KEY])[0]
+
+
+def _announce():
+    transaction.on_commit(lambda: conditional.bump_key(VERSION_KEY))
+
+
+def _shard_count():
+    return max(1, int(getattr(settings, 'VOTE_TALLY_SHARDS', 1)))
+
+
+def record_votes(pairs):
+    """Add votes to the tally. ``pairs`` is an iterable of (position_id, candidate_id)."""
+    shards = _shard_count()
+    counts = Counter(pairs)
+    if counts:
+        _announce()
+    for (position_id, candidate_id), n in counts.items():
+        shard = random.randrange(shards)
+        row = VoteTally.objects.filter(position_id=position_id, candidate_id=candidate_id, shard=shard)
+        if row.update(count=F('count') + n):
+            continue
+        try:
+            with transaction.atomic():
+                VoteTally.objects.create(position_id=position_id, candidate_id=candidate_id, shard=shard, count=n)
+        except IntegrityError:
+            # Another transaction created the shard row first
+            row.update(count=F('count') + n)
+
+
+def release_votes(pairs):
+    """Remove deleted votes from the tally."""
+    _announce()
+    for (position_id, candidate_id), n in Counter(pairs).items():
+        while n:
+            row = (
+                VoteTally.objects
+                .filter(position_id=position_id, candidate_id=candidate_id, count__gt=0)
+                .order_by('-count')
+                .first()
+            )
+            if not row:
+                break
+            taken = min(n, row.count)
+            VoteTally.objects.filter(pk=row.pk).update(count=F('count') - taken)
+            n -= taken
+
+
+def rebuild(election=None):
+    """Recompute tallies from the Vote table, optionally for a single election."""
+    votes = Vote.objects.all()
+    tallies = VoteTally.objects.all()
+    if election is not None:
+        votes = votes.filter(position__election=election)
+        tallies = tallies.filter(position__election=election)
+    rows = votes.values('position_id', 'student_voted_for_id').annotate(total=Count('id'))
+    with transaction.atomic():
+        tallies.delete()
+        created = VoteTally.objects.bulk_create([
+            VoteTally(position_id=row['position_id'], candidate_id=row['student_voted_for_id'], count=row['total'])
+            for row in rows
+        ], batch_size=1000)
+        _announce()
+    return len(created)
+
+
+def _total_subquery(tallies, group_by):
+    return Coalesce(
+        Subquery(
+            tallies.order_by().values(group_by).annotate(total=Sum('count')).values('total')[:1],
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def position_votes_subquery():
+    """Annotation: total votes for the outer Position."""
+    return _total_subquery(VoteTally.objects.filter(position=OuterRef('pk')), 'position')
+
+
+def election_votes_subquery():
+    """Annotation: total votes for the outer Election."""
+    return _total_subquery(VoteTally.objects.filter(position__election=OuterRef('pk')), 'position__election')
+
+
+def candidate_votes_subquery():
+    """Annotation: votes received by the outer Candidate (nomination) in its position."""
+    return _total_subquery(
+        VoteTally.objects.filter(position=OuterRef('position'), candidate=OuterRef('student')),
+        'position'
+    )
+
+
+def position_total(position):
+    return VoteTally.objects.filter(position=position).aggregate(total=Sum('count'))['total'] or 0
+
+
+def position_totals(position_ids):
+    """{position_id: total votes} for many positions in one grouped query."""
+    rows = VoteTally.objects.filter(position_id__in=position_ids) \
+        .values('position_id').annotate(total=Sum('count')).order_by()
+    totals = {row['position_id']: row['total'] for row in rows}
+    return {pid: totals.get(pid, 0) for pid in position_ids}
+
+
+def election_total(election):
+    return VoteTally.objects.filter(position__election=election).aggregate(total=Sum('count'))['total'] or 0
@@ -1,3 +1,994 @@
-from django.test import TestCase
+import csv
+import io
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory
+
+from utils import conditional, counting
+from utils.pagination import KeysetPaginator
+
+from .management.commands import loadtest
+from .serializers import DynamicCandidateSerializer, PositionSerializer
+from .models import Candidate, Election, ElectionWinner, ImportJob, LoginAttempt, Position, Student, Vote, VoteAttempt, VoterRoll, VoteTally
+from . import active_election, audit, ballot_status, credentials, eligibility, hashing, ingestion, live, pacing, repository, results, snapshots, tally, voter_roll
+
+PASSWORD = make_password('pw')
+
+
+def make_student(matric, **extra):
+    fields = {
+        'full_name': f"Student {matric}",
+        'level': 500,
+        'state_of_origin': 'Lagos',
+        'password': PASSWORD,
+        'has_changed_password': True,
+        'date_of_birth': date(2000, 1, 1),
+    }
+    fields.update(extra)
+    return Student.objects.create(matric_number=matric, **fields)
+
+
+def client_for(student=None):
+    client = APIClient()
+    if student is not None:
+        client.force_authenticate(student)
+    return client
+
+
+# Pictures resolve to local URLs instead of signed S3 links
+LOCAL_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+@contextmanager
+def queued_ingestion():
+    """Queued vote ingestion with a fresh spool."""
+    path = os.path.join(tempfile.mkdtemp(), 'spool.sqlite3')
+    with override_settings(VOTE_INGESTION_MODE='queued', VOTE_SPOOL_PATH=path), mock.patch.object(ingestion, '_spool', None):
+        yield
+
+
+class ElectionTestCase(TestCase):
+    """An ongoing election with two positions, three nominees on each and three voters."""
+
+    def setUp(self):
+        cache.clear()
+        now = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.election = Election.objects.create(
+                name='General', start_date=now - timedelta(hours=1), end_date=now + timedelta(hours=2), is_active=True
+            )
+            self.nominees = [make_student(f'C{i}', gender='male' if i % 2 else 'female') for i in range(3)]
+            self.voters = [make_student(f'V{i}') for i in range(3)]
+            self.positions = [Position.objects.create(name=f'Position {i}', election=self.election) for i in range(2)]
+            for position in self.positions:
+                for nominee in self.nominees:
+                    Candidate.objects.create(student=nominee, position=position)
+
+    def vote(self, voter, position, nominee):
+        with self.captureOnCommitCallbacks(execute=True):
+            return client_for(voter).post(
+                '/api/v1/votes/', {'position': str(position.pk), 'student_voted_for': str(nominee.pk)}, format='json'
+            )
+
+    def cast_ballot(self, voter, selections):
+        with self.captureOnCommitCallbacks(execute=True):
+            return client_for(voter).post('/api/v1/votes/ballot/', {
+                'election': str(self.election.pk),
+                'votes': [{'position': str(p.pk), 'student_voted_for': str(n.pk)} for p, n in selections],
+            }, format='json')
+
+
+class BallotTests(ElectionTestCase):
+
+    def test_ballot_casts_every_selection(self):
+        response = self.cast_ballot(self.voters[0], [(self.positions[0], self.nominees[0]), (self.positions[1], self.nominees[1])])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['data']['accepted'], 2)
+        self.assertEqual(Vote.objects.filter(voter=self.voters[0]).count(), 2)
+        self.assertEqual(tally.position_total(self.positions[1]), 1)
+
+    def test_ballot_rejects_repeated_and_invalid_selections(self):
+        self.vote(self.voters[0], self.positions[0], self.nominees[0])
+        cache.delete(pacing._token_key(self.voters[0].pk, 0))
+        outsider = make_student('OUT')
+        response = self.cast_ballot(self.voters[0], [(self.positions[0], self.nominees[1]), (self.positions[1], outsider)])
+        self.assertEqual(response.status_code, 400)
+        data = response.json()['data']
+        self.assertEqual((data['accepted'], data['rejected']), (0, 2))
+        self.assertEqual(Vote.objects.filter(voter=self.voters[0]).count(), 1)
+
+    def test_token_clients_are_paced(self):
+        self.assertEqual(self.vote(self.voters[0], self.positions[0], self.nominees[0]).status_code, 201)
+        response = self.cast_ballot(self.voters[0], [(self.positions[1], self.nominees[1])])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Vote.objects.filter(voter=self.voters[0]).count(), 1)
+
+
+class EligibilityIndexTests(ElectionTestCase):
+
+    def test_votes_read_the_cached_index(self):
+        position = self.positions[0]
+        self.assertEqual(
+            eligibility.get_eligible_candidate_ids(position.pk), frozenset(n.pk for n in self.nominees)
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.vote(self.voters[0], position, self.nominees[0]).status_code, 201)
+        self.assertFalse([q for q in queries.captured_queries if 'voting_candidate' in q['sql']])
+
+    def test_withdrawn_nominee_is_rejected(self):
+        position = self.positions[0]
+        eligibility.build_election_index(self.election)
+        with self.captureOnCommitCallbacks(execute=True):
+            Candidate.objects.get(position=position, student=self.nominees[0]).delete()
+        self.assertFalse(eligibility.is_eligible_candidate(position.pk, self.nominees[0].pk))
+        self.assertEqual(self.vote(self.voters[0], position, self.nominees[0]).status_code, 400)
+        self.assertEqual(self.vote(self.voters[0], position, self.nominees[1]).status_code, 201)
+
+
+class RateLimitTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_requests_are_counted_per_ip(self):
+        client = client_for()
+        self.assertEqual(client.get('/api/v1/elections/', REMOTE_ADDR='10.0.0.1').status_code, 200)
+        self.assertEqual(cache.get('rate_limit_10.0.0.1'), 1)
+        cache.set('rate_limit_10.0.0.1', 1000, 3600)
+        self.assertEqual(client.get('/api/v1/elections/', REMOTE_ADDR='10.0.0.1').status_code, 429)
+        self.assertEqual(client.get('/api/v1/elections/', REMOTE_ADDR='10.0.0.2').status_code, 200)
+
+
+class VoteIngestionTests(ElectionTestCase):
+
+    def test_queued_votes_are_committed_by_the_worker(self):
+        with queued_ingestion():
+            client = client_for(self.voters[0])
+            response = self.vote(self.voters[0], self.positions[0], self.nominees[0])
+            self.assertEqual(response.status_code, 202)
+            receipt = response.json()['data']['receipt_id']
+            self.assertEqual(self.vote(self.voters[0], self.positions[0], self.nominees[1]).status_code, 400)
+            self.assertEqual(client.get(f'/api/v1/votes/receipts/{receipt}/').json()['data']['status'], ingestion.PENDING)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command('commit_votes', once=True, stdout=io.StringIO())
+            self.assertEqual(client.get(f'/api/v1/votes/receipts/{receipt}/').json()['data']['status'], ingestion.COMMITTED)
+        self.assertTrue(Vote.objects.filter(pk=receipt, student_voted_for=self.nominees[0]).exists())
+        self.assertEqual(tally.position_total(self.positions[0]), 1)
+
+    def test_rejected_votes_are_set_aside_and_the_rest_drain(self):
+        insert_votes = repository.insert_votes
+
+        def reject_first_nominee(votes):
+            votes = list(votes)
+            if any(str(vote.student_voted_for_id) == str(self.nominees[0].pk) for vote in votes):
+                raise IntegrityError('candidate deleted')
+            return insert_votes(votes)
+
+        with queued_ingestion():
+            receipts = [
+                self.vote(voter, self.positions[0], nominee).json()['data']['receipt_id']
+                for voter, nominee in zip(self.voters, [self.nominees[1], self.nominees[0], self.nominees[2]])
+            ]
+            spool = ingestion.get_spool()
+            with mock.patch.object(repository, 'insert_votes', reject_first_nominee), \
+                    self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(ingestion.commit_pending(spool), (2, 0, 1))
+            self.assertEqual([spool.status(r)['status'] for r in receipts],
+                             [ingestion.COMMITTED, ingestion.FAILED, ingestion.COMMITTED])
+            self.assertEqual(ingestion.commit_pending(spool), (0, 0, 0))
+        self.assertEqual(tally.position_total(self.positions[0]), 2)
+
+    def test_replayed_receipts_are_not_committed_twice(self):
+        with queued_ingestion():
+            receipt = self.vote(self.voters[0], self.positions[0], self.nominees[0]).json()['data']['receipt_id']
+            spool = ingestion.get_spool()
+            with self.captureOnCommitCallbacks(execute=True):
+                ingestion.commit_pending(spool)
+            # A crash after the database commit leaves the receipt pending
+            spool.connection.execute("UPDATE vote_spool SET status = ?", (ingestion.PENDING,))
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(ingestion.commit_pending(spool), (1, 0, 0))
+            self.assertEqual(spool.status(receipt)['status'], ingestion.COMMITTED)
+        self.assertEqual(tally.position_total(self.positions[0]), 1)
+        self.assertEqual(VoteAttempt.objects.filter(voter=self.voters[0]).count(), 1)
+
+
+class VoteRepositoryTests(ElectionTestCase):
+
+    def test_second_vote_for_a_position_is_a_duplicate(self):
+        voter, position = self.voters[0], self.positions[0]
+        first = repository.insert_vote(voter.pk, position.pk, self.nominees[0].pk)
+        second = repository.insert_vote(voter.pk, position.pk, self.nominees[1].pk)
+        self.assertEqual((first.status, second.status), (repository.CREATED, repository.DUPLICATE))
+        self.assertEqual(list(Vote.objects.filter(voter=voter).values_list('pk', 'student_voted_for')), [(first.vote.pk, self.nominees[0].pk)])
+
+    def test_batch_reports_status_in_order(self):
+        voter = self.voters[1]
+        repository.insert_vote(voter.pk, self.positions[0].pk, self.nominees[0].pk)
+        writes = repository.insert_votes([
+            Vote(voter=voter, position=position, student_voted_for=self.nominees[2]) for position in self.positions
+        ])
+        self.assertEqual([w.status for w in writes], [repository.DUPLICATE, repository.CREATED])
+        self.assertEqual(Vote.objects.filter(voter=voter).count(), 2)
+
+
+class KeysetPaginationTests(ElectionTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.admin = make_student('ADMIN', is_staff=True)
+        voted_at = timezone.now()
+        for voter in self.voters:
+            for position in self.positions:
+                repository.insert_vote(voter.pk, position.pk, self.nominees[0].pk)
+        # Identical timestamps: the id breaks the tie
+        Vote.objects.update(voted_at=voted_at)
+
+    def logs(self, **params):
+        response = client_for(self.admin).get('/api/v1/votes/voting_logs/', {'page_size': 4, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_cursor_walk_visits_every_row_once(self):
+        expected = [str(pk) for pk in Vote.objects.order_by('-voted_at', '-id').values_list('pk', flat=True)]
+        first = self.logs(cursor='')
+        second = self.logs(cursor=first['next_cursor'])
+        self.assertEqual([v['id'] for v in first['data'] + second['data']], expected)
+        self.assertNotIn('next_cursor', second)
+        self.assertEqual(self.logs(cursor=second['previous_cursor'])['data'], first['data'])
+        # Page-number requests hand out cursors too
+        self.assertEqual(self.logs()['next_cursor'], first['next_cursor'])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = client_for(self.admin).get('/api/v1/votes/voting_logs/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_pages_are_range_conditions(self):
+        paginator = KeysetPaginator(('-voted_at', '-id'))
+        _, cursor, _ = paginator.page(Vote.objects.all(), 2)
+        with CaptureQueriesContext(connection) as queries:
+            paginator.page(Vote.objects.all(), 2, cursor)
+        self.assertNotIn('OFFSET', queries.captured_queries[-1]['sql'])
+
+    def test_position_search_pages_by_cursor(self):
+        client = client_for(self.admin)
+        first = client.get('/api/v1/positions/search/', {'limit': 1, 'cursor': ''}).json()
+        with CaptureQueriesContext(connection) as queries:
+            second = client.get('/api/v1/positions/search/', {'limit': 1, 'cursor': first['next_cursor']}).json()
+        self.assertEqual(
+            [r['label'] for r in first['data']['results'] + second['data']['results']],
+            ['Position 0 - General', 'Position 1 - General'],
+        )
+        self.assertFalse(second['data']['has_next'])
+        self.assertNotIn('page', second['data'])
+        self.assertFalse([q for q in queries.captured_queries if 'voting_position' in q['sql'] and 'OFFSET' in q['sql']])
+        self.assertEqual(client.get('/api/v1/positions/search/').json()['data']['page'], 1)
+
+
+class CountingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        for i in range(3):
+            make_student(f'S{i}')
+
+    def test_counts_are_cached_per_query(self):
+        levels = Student.objects.filter(level=500)
+        self.assertEqual(counting.total(levels), counting.Total(3, False))
+        make_student('S3')
+        # Served from the cache until COUNT_CACHE_TIMEOUT passes
+        self.assertEqual(counting.total(Student.objects.filter(level=500)).count, 3)
+        self.assertEqual(counting.total(levels, cached=False).count, 4)
+        self.assertEqual(counting.total(Student.objects.filter(level=400)).count, 0)
+        self.assertEqual(counting.total(Student.objects.none()), counting.Total(0, False))
+
+    def test_huge_unfiltered_tables_are_estimated(self):
+        with mock.patch.object(counting, 'estimate', return_value=250000) as estimate:
+            self.assertEqual(counting.total(Student.objects.all()), counting.Total(250000, True))
+            self.assertEqual(counting.total(Student.objects.filter(level=500)), counting.Total(3, False))
+        estimate.assert_called_once()
+        self.assertIsNone(counting.estimate(Student))
+
+    def test_paginated_envelope_flags_estimates(self):
+        admin = make_student('ADMIN', is_staff=True)
+        with mock.patch.object(counting, 'estimate', return_value=250000):
+            data = client_for(admin).get('/api/v1/votes/voting_logs/').json()
+        self.assertEqual((data['count'], data['count_approximate']), (250000, True))
+        data = client_for(admin).get('/api/v1/votes/voting_logs/', {'count': 'false'}).json()
+        self.assertNotIn('count', data)
+
+
+class VotePacingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_one_token_per_interval(self):
+        self.assertTrue(pacing.take('voter'))
+        self.assertFalse(pacing.take('voter'))
+        self.assertTrue(pacing.take('other'))
+
+    def test_burst_allows_back_to_back_votes(self):
+        with mock.patch.dict(pacing.VOTING_SECURITY, vote_burst=2):
+            self.assertEqual([pacing.take('voter') for _ in range(3)], [True, True, False])
+
+    def test_decision_is_shared_within_a_request(self):
+        request = mock.Mock(spec=[])
+        self.assertTrue(pacing.allow(request, 'voter'))
+        self.assertTrue(pacing.allow(request, 'voter'))
+        self.assertFalse(pacing.allow(mock.Mock(spec=[]), 'voter'))
+
+
+class LoadTestCommandTests(TestCase):
+
+    def test_refuses_to_run_during_an_election(self):
+        now = timezone.now()
+        Election.objects.create(name='Live', start_date=now - timedelta(hours=1), end_date=now + timedelta(hours=1), is_active=True)
+        with self.assertRaises(CommandError):
+            call_command('loadtest', students=1, stdout=io.StringIO())
+
+    @override_settings(AUDIT_FLUSH_INTERVAL=0)
+    def test_reports_every_endpoint_and_removes_its_data(self):
+        out = io.StringIO()
+        # Nothing listens on port 9: every login fails and is recorded as an error
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('loadtest', url='http://127.0.0.1:9/api/v1', students=3, positions=1, candidates=1,
+                         concurrency=2, timeout=1, stdout=out)
+        self.assertIn('login', out.getvalue())
+        self.assertIn('errors by status: no response: 6', out.getvalue())
+        self.assertFalse(Student.objects.filter(matric_number__startswith='LT/').exists())
+        self.assertFalse(Election.objects.exists())
+
+    def test_percentile(self):
+        self.assertEqual(loadtest.percentile([], 50), 0.0)
+        self.assertEqual(loadtest.percentile([1, 2, 3, 4], 50), 2)
+        self.assertEqual(loadtest.percentile([1, 2, 3, 4], 99), 4)
+
+
+class VoterRollTests(ElectionTestCase):
+
+    def test_roll_counts_eligible_voters(self):
+        make_student('NEW', has_changed_password=False)
+        roll = voter_roll.get_roll(self.election)
+        self.assertEqual(roll.eligible_count(), 7)
+        self.assertIsNone(roll.voter_error(self.election, self.voters[0].pk))
+        self.assertEqual(
+            roll.voter_error(self.election, Student.objects.get(matric_number='NEW').pk), "You ARE NOT eligible to vote."
+        )
+
+    def test_saves_that_leave_roll_fields_alone_keep_the_roll(self):
+        voter_roll.get_roll(self.election)
+        admin = make_student('ADMIN', is_staff=True)
+        voter_roll.get_roll(self.election)
+        client = client_for(admin)
+        client.post(f'/api/v1/students/{self.voters[0].pk}/reset_password/', {'new_password': 'changed'}, format='json')
+        client.patch(f'/api/v1/students/{self.voters[1].pk}/toggle_status/')
+        student = Student.objects.get(pk=self.voters[2].pk)
+        student.full_name = 'Renamed'
+        student.save()
+        self.assertTrue(VoterRoll.objects.filter(election=self.election).exists())
+
+    def test_student_saves_patch_the_roll_in_place(self):
+        voter_roll.get_roll(self.election)
+        roll_pk = VoterRoll.objects.get(election=self.election).pk
+        with self.captureOnCommitCallbacks(execute=True):
+            make_student('NEW', has_changed_password=False, gender='female')
+        student = Student.objects.get(matric_number='NEW')
+        with self.captureOnCommitCallbacks(execute=True):
+            student.has_changed_password = True
+            student.save(update_fields=['has_changed_password'])
+        with CaptureQueriesContext(connection) as queries:
+            roll = voter_roll.get_roll(self.election)
+        self.assertEqual(roll.eligible_count(), 7)
+        self.assertEqual(roll.eligible_count('female'), 3)
+        self.assertIsNone(roll.voter_error(self.election, student.pk))
+        self.assertFalse([q for q in queries if 'voting_student' in q['sql']])
+        self.assertEqual(VoterRoll.objects.get(election=self.election).pk, roll_pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            student.status = 'graduated'
+            student.save()
+        roll = voter_roll.get_roll(self.election)
+        self.assertEqual(roll.eligible_count(), 6)
+        self.assertEqual(roll.eligible_count('female'), 2)
+        self.assertEqual(roll.voter_error(self.election, student.pk), "Inactive users cannot vote.")
+        self.assertEqual(VoterRoll.objects.get(election=self.election).pk, roll_pk)
+
+    def test_student_saves_do_not_reread_the_row(self):
+        student = Student.objects.get(pk=self.voters[0].pk)
+        student.full_name = 'Renamed'
+        with CaptureQueriesContext(connection) as queries:
+            student.save()
+        self.assertFalse([q for q in queries if q['sql'].startswith('SELECT') and 'voting_student' in q['sql']])
+
+
+class AuditWriterTests(ElectionTestCase):
+
+    def test_attempts_are_written_with_the_request_by_default(self):
+        self.vote(self.voters[0], self.positions[0], self.nominees[0])
+        self.assertTrue(VoteAttempt.objects.filter(voter=self.voters[0], success=True).exists())
+
+        client = client_for(self.voters[1])
+        response = client.post(
+            '/api/v1/votes/', {'position': '00000000-0000-0000-0000-000000000000', 'student_voted_for': str(self.nominees[0].pk)},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(VoteAttempt.objects.filter(voter=self.voters[1]).exists())
+
+    def test_only_raw_position_ids_are_looked_up(self):
+        writer = audit.AuditWriter(size=1)
+        with CaptureQueriesContext(connection) as queries:
+            writer.record(VoteAttempt(voter=self.voters[0], ip_address='127.0.0.1', position=self.positions[0], success=True))
+        self.assertFalse([q for q in queries.captured_queries if 'FROM "voting_position"' in q['sql']])
+
+        unknown = '00000000-0000-0000-0000-000000000000'
+        writer = audit.AuditWriter(size=3, interval=60)
+        for position_id in (self.positions[1].pk, unknown):
+            writer.record(VoteAttempt(voter=self.voters[1], ip_address='127.0.0.1', position_id=position_id, success=False))
+        writer.record(VoteAttempt(voter=self.voters[1], ip_address='127.0.0.1', position=self.positions[0], success=True))
+        self.assertEqual(
+            set(VoteAttempt.objects.filter(voter=self.voters[1]).values_list('position_id', flat=True)),
+            {self.positions[0].pk, self.positions[1].pk},
+        )
+
+    def test_buffered_writer_flushes_in_batches(self):
+        writer = audit.AuditWriter(size=3, interval=60)
+        for _ in range(2):
+            writer.record(LoginAttempt(matric_number='V0', ip_address='127.0.0.1', success=False))
+        self.assertEqual(LoginAttempt.objects.count(), 0)
+        writer.record(LoginAttempt(matric_number='V0', ip_address='127.0.0.1', success=True))
+        self.assertEqual(LoginAttempt.objects.count(), 3)
+
+
+class BallotStatusTests(ElectionTestCase):
+
+    def test_status_follows_votes_and_deletions(self):
+        voter, position = self.voters[0], self.positions[0]
+        self.assertEqual(ballot_status.voted_positions(voter.pk, self.election.pk), frozenset())
+        self.vote(voter, position, self.nominees[0])
+        self.assertTrue(ballot_status.has_voted(voter.pk, position))
+        self.assertFalse(ballot_status.has_voted(voter.pk, self.positions[1]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Vote.objects.filter(voter=voter).delete()
+        self.assertFalse(ballot_status.has_voted(voter.pk, position))
+
+    def test_cached_status_answers_without_vote_queries(self):
+        voter = self.voters[0]
+        self.vote(voter, self.positions[0], self.nominees[0])
+        ballot_status.voted_positions(voter.pk, self.election.pk)
+        with CaptureQueriesContext(connection) as queries:
+            ballot_status.voted_positions(voter.pk, self.election.pk)
+        self.assertFalse([q for q in queries.captured_queries if 'voting_vote' in q['sql']])
+
+    def test_concurrent_commits_keep_every_position(self):
+        voter = self.voters[0]
+        self.assertEqual(ballot_status.voted_positions(voter.pk, self.election.pk), frozenset())
+        # Both writers read the status before either commits
+        stale = cache.get(ballot_status._cache_key(self.election.pk, voter.pk))
+        self.vote(voter, self.positions[0], self.nominees[0])
+        cache.delete(pacing._token_key(voter.pk, 0))
+        self.cast_ballot(voter, [(self.positions[1], self.nominees[1])])
+        cache.set(ballot_status._cache_key(self.election.pk, voter.pk), stale)
+        self.assertEqual(
+            ballot_status.voted_positions(voter.pk, self.election.pk), {self.positions[0].pk, self.positions[1].pk}
+        )
+
+
+class VoteTallyTests(ElectionTestCase):
+
+    @override_settings(VOTE_TALLY_SHARDS=4)
+    def test_sharded_tally_follows_votes(self):
+        position, nominee = self.positions[0], self.nominees[0]
+        for voter in self.voters:
+            self.assertEqual(self.vote(voter, position, nominee).status_code, 201)
+        self.assertEqual(tally.position_total(position), 3)
+        self.assertEqual(
+            sum(VoteTally.objects.filter(position=position, candidate=nominee).values_list('count', flat=True)), 3
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Vote.objects.filter(voter=self.voters[0]).delete()
+        self.assertEqual(tally.position_total(position), 2)
+
+        VoteTally.objects.all().delete()
+        tally.rebuild(self.election)
+        self.assertEqual(tally.position_total(position), 2)
+
+    def test_version_changes_across_cache_flush(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            tally.record_votes([(self.positions[0].pk, self.nominees[0].pk)])
+        before = tally.version()
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            tally.record_votes([(self.positions[0].pk, self.nominees[0].pk)])
+        self.assertNotEqual(tally.version(), before)
+
+
+class ElectionResultsTests(ElectionTestCase):
+
+    def test_ranks_and_ties_in_one_query(self):
+        first, second = self.positions
+        c0, c1, c2 = self.nominees
+        self.cast_ballot(self.voters[0], [(first, c0), (second, c1)])
+        self.cast_ballot(self.voters[1], [(first, c0), (second, c2)])
+        self.cast_ballot(self.voters[2], [(first, c1)])
+
+        with self.assertNumQueries(1):
+            positions = {p['position_id']: p for p in results.election_results(self.election, resolve_pictures=False)}
+        outright, tied = positions[first.pk], positions[second.pk]
+        self.assertEqual(
+            [(c['student_id'], c['vote_count'], c['rank'], c['is_tie']) for c in outright['candidates']],
+            [(c0.pk, 2, 1, False), (c1.pk, 1, 2, False)],
+        )
+        self.assertFalse(outright['is_tie'])
+        self.assertTrue(tied['is_tie'])
+        self.assertEqual({c['student_id'] for c in tied['candidates'] if c['rank'] == 1}, {c1.pk, c2.pk})
+        self.assertEqual([len(top) for _, top in results.winners([outright, tied])], [1, 2])
+
+
+class LiveResultsTests(ElectionTestCase):
+
+    def test_delta_carries_only_changed_counts(self):
+        first, second = self.positions
+        c0, c1, _ = self.nominees
+        self.cast_ballot(self.voters[0], [(first, c0), (second, c1)])
+        before = live.load_state(self.election.pk)
+        self.assertEqual(before['total_votes'], 2)
+        self.assertEqual(before['turnout']['voters'], 1)
+        self.assertEqual(len(live.snapshot_event(before)['tallies']), 2)
+        self.assertIsNone(live.delta_event(before, live.load_state(self.election.pk)))
+
+        self.cast_ballot(self.voters[1], [(first, c0)])
+        delta = live.delta_event(before, live.load_state(self.election.pk))
+        self.assertEqual(delta['tallies'], [{'position': str(first.pk), 'candidate': str(c0.pk), 'votes': 2, 'delta': 1}])
+        self.assertEqual((delta['total_votes'], delta['turnout']['voters']), (3, 2))
+
+    def test_removed_votes_are_reported_at_zero(self):
+        first = self.positions[0]
+        self.cast_ballot(self.voters[0], [(first, self.nominees[0])])
+        before = live.load_state(self.election.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            Vote.objects.filter(voter=self.voters[0]).delete()
+        delta = live.delta_event(before, live.load_state(self.election.pk))
+        self.assertEqual(delta['tallies'], [{'position': str(first.pk), 'candidate': str(self.nominees[0].pk), 'votes': 0, 'delta': -1}])
+
+    def test_format_event(self):
+        self.assertEqual(live.format_event('delta', {'total_votes': 1}), 'event: delta\ndata: {"total_votes": 1}\n\n')
+
+
+class ResultSnapshotTests(ElectionTestCase):
+
+    def end_election(self):
+        Election.objects.filter(pk=self.election.pk).update(end_date=timezone.now() - timedelta(minutes=1))
+        self.election.refresh_from_db()
+
+    def test_results_are_private_and_revalidated_with_url_window(self):
+        self.vote(self.voters[0], self.positions[0], self.nominees[0])
+        self.end_election()
+        client = client_for(self.voters[0])
+        response = client.get(f'/api/v1/elections/{self.election.pk}/results/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['turnout']['total_votes'], 1)
+        self.assertTrue(response['Cache-Control'].startswith('private, max-age='))
+        window, seconds_left = conditional.url_window()
+        self.assertLessEqual(int(response['Cache-Control'].split('=')[1]), seconds_left)
+        self.assertTrue(response['ETag'].endswith(f'-{window}"'))
+        again = client.get(f'/api/v1/elections/{self.election.pk}/results/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+        with mock.patch.object(conditional.time, 'time', return_value=time.time() + 3600):
+            later = client.get(f'/api/v1/elections/{self.election.pk}/results/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(later.status_code, 200)
+
+    def test_spooled_votes_are_committed_before_freezing(self):
+        with queued_ingestion():
+            self.assertEqual(self.vote(self.voters[0], self.positions[0], self.nominees[1]).status_code, 202)
+            self.assertEqual(Vote.objects.count(), 0)
+            self.end_election()
+            snapshot = snapshots.get_snapshot(self.election)
+        self.assertEqual(Vote.objects.count(), 1)
+        self.assertEqual(snapshot.payload['turnout']['total_votes'], 1)
+
+    @override_settings(STORAGES=LOCAL_STORAGES)
+    def test_recent_winners_come_from_the_frozen_projection(self):
+        first, second = self.positions
+        c0, c1, c2 = self.nominees
+        self.cast_ballot(self.voters[0], [(first, c0), (second, c1)])
+        self.cast_ballot(self.voters[1], [(first, c0), (second, c2)])
+        self.end_election()
+        self.assertFalse(ElectionWinner.objects.exists())
+
+        response = client_for().get('/api/v1/elections/recent-winners/')
+        self.assertEqual(response.status_code, 200)
+        winners = {w['position_name']: w for w in response.json()['data']}
+        self.assertEqual((winners[first.name]['winner_name'], winners[first.name]['vote_count']), (c0.full_name, 2))
+        self.assertFalse(winners[first.name]['is_tie'])
+        self.assertTrue(winners[second.name]['is_tie'])
+        self.assertEqual(ElectionWinner.objects.filter(election=self.election).count(), 2)
+
+        # Later requests read the projection without re-aggregating
+        with CaptureQueriesContext(connection) as queries:
+            client_for().get('/api/v1/elections/recent-winners/')
+        self.assertFalse([q for q in queries.captured_queries if 'voting_votetally' in q['sql']])
+
+
+class PositionSerializerTests(ElectionTestCase):
+
+    def render_queries(self):
+        # The index is built when the election is activated
+        election = Election.objects.get(pk=self.election.pk)
+        eligibility.build_election_index(election)
+        with CaptureQueriesContext(connection) as queries:
+            active_election.render(election)
+        return len(queries)
+
+    def test_bulk_context_counts(self):
+        self.vote(self.voters[0], self.positions[0], self.nominees[0])
+        context = PositionSerializer.bulk_context(self.positions)
+        self.assertEqual(context['candidate_counts'][self.positions[0].pk], 3)
+        self.assertEqual(context['vote_counts'][self.positions[0].pk], 1)
+        self.assertEqual(context['vote_counts'].get(self.positions[1].pk, 0), 0)
+
+    def test_active_election_queries_do_not_grow_with_positions(self):
+        baseline = self.render_queries()
+        for i in range(3):
+            position = Position.objects.create(name=f'Extra {i}', election=self.election)
+            Candidate.objects.create(student=self.nominees[0], position=position)
+        self.assertEqual(self.render_queries(), baseline)
+
+
+class DynamicCandidateSerializerTests(ElectionTestCase):
+
+    def test_enhancements_load_once_per_position(self):
+        position = self.positions[0]
+        for i, candidate in enumerate(Candidate.objects.filter(position=position).order_by('student__matric_number')):
+            Candidate.objects.filter(pk=candidate.pk).update(bio=f'Bio {i}', alias=f'Alias {i}')
+        outsider = make_student('OUT')
+        context = {'request': APIRequestFactory().get('/'), 'position': position}
+        with self.assertNumQueries(1):
+            data = DynamicCandidateSerializer(self.nominees + [outsider], many=True, context=context).data
+        self.assertEqual([(row['bio'], row['alias']) for row in data], [
+            ('Bio 0', 'Alias 0'), ('Bio 1', 'Alias 1'), ('Bio 2', 'Alias 2'), ('', ''),
+        ])
+
+    def test_position_candidates_take_fixed_queries(self):
+        client = client_for(self.voters[0])
+        url = f'/api/v1/positions/{self.positions[0].pk}/candidates/'
+        client.get(url)
+        with CaptureQueriesContext(connection) as few:
+            client.get(url)
+        for i in range(5):
+            Candidate.objects.create(student=make_student(f'N{i}'), position=self.positions[0])
+        cache.clear()
+        client.get(url)
+        with CaptureQueriesContext(connection) as many:
+            self.assertEqual(len(client.get(url).json()['data']), 8)
+        self.assertEqual(len(many.captured_queries), len(few.captured_queries))
+
+
+@override_settings(STORAGES=LOCAL_STORAGES)
+class FallbackPhotoTests(ElectionTestCase):
+
+    def setUp(self):
+        super().setUp()
+        Candidate.objects.filter(student=self.nominees[0], position=self.positions[0]).update(photo='candidates/c0.jpg')
+        Student.objects.filter(pk=self.nominees[1].pk).update(picture='students/c1.jpg')
+
+    def test_student_list_uses_the_nomination_photo(self):
+        admin = make_student('ADMIN', is_staff=True)
+        response = client_for(admin).get('/api/v1/students/')
+        pictures = {row['matric_number']: row['picture'] for row in response.json()['results']}
+        self.assertTrue(pictures['C0'].endswith('candidates/c0.jpg'))
+        self.assertTrue(pictures['C1'].endswith('students/c1.jpg'))
+        self.assertIsNone(pictures['C2'])
+
+    def test_results_and_listings_share_the_fallback(self):
+        self.vote(self.voters[0], self.positions[0], self.nominees[0])
+        self.vote(self.voters[1], self.positions[0], self.nominees[1])
+        candidates = results.election_results(self.election, resolve_pictures=False)[0]['candidates']
+        self.assertEqual(
+            {c['student_name']: c['picture'] for c in candidates},
+            {self.nominees[0].full_name: 'candidates/c0.jpg', self.nominees[1].full_name: 'students/c1.jpg'},
+        )
+        rows = client_for().get('/api/v1/students/qualified-candidates/').json()['data']
+        pictures = {row['matric_number']: row['picture'] for row in rows}
+        self.assertTrue(pictures['C0'].endswith('candidates/c0.jpg'))
+
+
+class ActiveElectionTests(ElectionTestCase):
+
+    def test_public_body_and_personal_ballot_status(self):
+        client = client_for(self.voters[0])
+        response = client.get('/api/v1/elections/active/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['id'], str(self.election.pk))
+        self.assertNotIn('has_voted', response.json()['data']['positions'][0])
+        self.assertEqual(client.get('/api/v1/elections/active/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        self.vote(self.voters[0], self.positions[0], self.nominees[0])
+        status = client.get('/api/v1/elections/active/ballot-status/').json()['data']
+        self.assertEqual(status['voted_positions'], [str(self.positions[0].pk)])
+
+    def test_votes_refresh_the_body_only_after_the_counts_ttl(self):
+        client = client_for(self.voters[0])
+        etag = client.get('/api/v1/elections/active/')['ETag']
+        self.vote(self.voters[1], self.positions[0], self.nominees[0])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(client.get('/api/v1/elections/active/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertFalse([q for q in queries.captured_queries if 'voting_election' in q['sql'] or 'voting_votetally' in q['sql']])
+
+        # The counts TTL runs out: re-rendered, with the new count and a new ETag
+        cache.delete(active_election._keys()[1])
+        response = client.get('/api/v1/elections/active/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        counts = {p['id']: p['vote_count'] for p in response.json()['data']['positions']}
+        self.assertEqual(counts[str(self.positions[0].pk)], 1)
+
+        # A re-render with unchanged counts keeps the ETag
+        cache.delete(active_election._keys()[1])
+        self.assertEqual(client.get('/api/v1/elections/active/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_cache_flush_does_not_revive_old_etag(self):
+        client = client_for(self.voters[0])
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.election.save()
+        etag = client.get('/api/v1/elections/active/')['ETag']
+
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            Position.objects.filter(pk=self.positions[1].pk).update(name='Renamed')
+            self.election.save()
+        self.assertEqual(client.get('/api/v1/elections/active/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class QualifiedListingTests(ElectionTestCase):
+
+    def listing(self, path, student=None, **params):
+        response = client_for(student).get(path, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_students_are_paged_projections(self):
+        first = self.listing('/api/v1/students/qualified-candidates/', page_size=4)
+        self.assertEqual(first['count'], 6)
+        self.assertEqual(len(first['data']), 4)
+        self.assertEqual(set(first['data'][0]), {'id', 'full_name', 'matric_number', 'gender', 'picture'})
+        rest = self.listing('/api/v1/students/qualified-candidates/', page_size=4, cursor=first['next_cursor'])
+        self.assertEqual(len(rest['data']), 2)
+        male = self.listing('/api/v1/students/qualified-candidates/', gender='male')
+        self.assertEqual({row['matric_number'] for row in male['data']}, {'C1'})
+
+    def test_pages_are_cached_until_students_change(self):
+        self.listing('/api/v1/students/qualified-candidates/')
+        with CaptureQueriesContext(connection) as queries:
+            self.listing('/api/v1/students/qualified-candidates/', unrelated='x')
+        self.assertFalse([q for q in queries.captured_queries if 'voting_student' in q['sql']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_student('NEW')
+        self.assertEqual(self.listing('/api/v1/students/qualified-candidates/')['count'], 7)
+
+    def test_nominations(self):
+        data = self.listing('/api/v1/candidates/qualified/', self.voters[0], page_size=50)
+        self.assertEqual(data['count'], 6)
+        self.assertEqual({row['position_name'] for row in data['data']}, {p.name for p in self.positions})
+
+
+class ConditionalResponseTests(ElectionTestCase):
+
+    def test_vote_changes_position_list_etag(self):
+        client = client_for(self.voters[0])
+        first = client.get('/api/v1/positions/')
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+        self.assertEqual(client.get('/api/v1/positions/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.assertEqual(self.vote(self.voters[1], self.positions[0], self.nominees[0]).status_code, 201)
+
+        after = client.get('/api/v1/positions/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(after.status_code, 200)
+        self.assertNotEqual(after['ETag'], etag)
+        self.assertEqual(Vote.objects.count(), 1)
+
+
+    def test_student_list_revalidates_without_reading_students(self):
+        client = client_for(self.voters[0])
+        first = client.get('/api/v1/students/')
+        etag = first['ETag']
+        self.assertEqual(first['Cache-Control'], 'private, no-cache')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(client.get('/api/v1/students/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertFalse([q for q in queries.captured_queries if 'voting_student' in q['sql']])
+
+        # Login bookkeeping is not shown by any response
+        student = self.nominees[0]
+        student.last_login = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            student.save(update_fields=['last_login'])
+        self.assertEqual(client.get('/api/v1/students/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        student.full_name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            student.save()
+        self.assertEqual(client.get('/api/v1/students/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_signed_url_responses_change_etag_with_the_window(self):
+        client = client_for(self.voters[0])
+        etag = client.get('/api/v1/students/')['ETag']
+        self.assertEqual(client.get('/api/v1/students/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with mock.patch.object(conditional.time, 'time', return_value=time.time() + 3600):
+            later = client.get('/api/v1/students/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(later.status_code, 200)
+        self.assertNotEqual(later['ETag'], etag)
+
+    def test_anonymous_responses_are_public(self):
+        response = client_for().get('/api/v1/students/qualified-candidates/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Cache-Control'].startswith('public, max-age='))
+        self.assertLessEqual(int(response['Cache-Control'].split('=')[1]), conditional.url_window()[1])
+        self.assertIn('Authorization', response['Vary'])
+
+
+@override_settings(IMPORT_CHUNK_SIZE=2)
+class StudentImportTests(TestCase):
+    HEADER = 'matric_number,full_name,level,gender,state_of_origin,date_of_birth\n'
+
+    def setUp(self):
+        cache.clear()
+        self.admin = make_student('ADMIN', is_staff=True)
+        make_student('EXISTING')
+
+    def upload(self, rows, **data):
+        upload = SimpleUploadedFile('students.csv', (self.HEADER + rows).encode(), content_type='text/csv')
+        with self.captureOnCommitCallbacks(execute=True):
+            return client_for(self.admin).post('/api/v1/students/bulk_import/', {'file': upload, **data}, format='multipart')
+
+    def test_inline_import_in_chunks(self):
+        response = self.upload(
+            'a1,Ada,400,female,Oyo,2001-02-03\n'
+            'existing,Old,500,male,Lagos,2001-02-03\n'
+            'A1,Ada Again,400,female,Oyo,2001-02-03\n'
+            'a2,Bola,500,male,Kano,\n'
+            ',Nobody,500,male,Kano,\n'
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual((data['created_count'], data['skipped']), (2, 3))
+        self.assertEqual(len(data['errors']), 3)
+        student = Student.objects.get(matric_number='A1')
+        self.assertEqual((student.full_name, student.level, student.date_of_birth), ('Ada', 400, date(2001, 2, 3)))
+        self.assertTrue(student.check_password('Oyo'))
+
+    def test_rows_in_another_date_format_still_parse(self):
+        self.upload(
+            'm1,Ada,500,female,Oyo,2001-02-03\n'
+            'm2,Bola,500,male,Kano,2002-03-04\n'
+            'm3,Chi,500,female,Imo,05/06/2003\n'
+        )
+        self.assertEqual(Student.objects.get(matric_number='M3').date_of_birth, date(2003, 6, 5))
+
+    def test_missing_columns_reject_the_file(self):
+        upload = SimpleUploadedFile('students.csv', b'matric_number,full_name\nA1,Ada\n', content_type='text/csv')
+        response = client_for(self.admin).post('/api/v1/students/bulk_import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Student.objects.filter(matric_number='A1').exists())
+
+    def test_background_job_is_processed_by_the_command(self):
+        with override_settings(IMPORT_IN_THREAD=False, IMPORT_DIR=tempfile.mkdtemp()):
+            response = self.upload('b1,Bayo,500,male,Ogun,03/02/2001\nb1,Twice,500,male,Ogun,03/02/2001\nb2,Chi,500,female,Imo,31/12/2001\n', background='true')
+            self.assertEqual(response.status_code, 202)
+            job_id = response.json()['data']['id']
+            self.assertEqual(ImportJob.objects.get(pk=job_id).status, 'pending')
+
+            out = io.StringIO()
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command('run_import_jobs', stdout=out)
+            self.assertIn('Processed 1 import job(s).', out.getvalue())
+
+            client = client_for(self.admin)
+            job = client.get(f'/api/v1/students/import-jobs/{job_id}/').json()['data']
+            self.assertEqual((job['status'], job['processed_rows'], job['created_count'], job['error_count']), ('completed', 3, 2, 1))
+            report = client.get(f'/api/v1/students/import-jobs/{job_id}/errors/')
+            rows = list(csv.reader(io.StringIO(b''.join(report.streaming_content).decode())))
+            report.close()
+        self.assertEqual(rows, [['row', 'matric_number', 'error'], ['3', 'B1', 'Duplicate matric number B1 in file']])
+        self.assertEqual(Student.objects.get(matric_number='B2').date_of_birth, date(2001, 12, 31))
+
+
+    def test_dry_run_reports_issues_without_writing(self):
+        before = Student.objects.count()
+        response = self.upload(
+            'd1,Dayo,500,male,Oyo,2001-02-03\n'
+            'd2,Efe,450,alien,Edo,2001-02-03\n'
+            'D1,Again,500,male,Oyo,2001-02-03\n'
+            'existing,Old,abc,male,Lagos,2001-02-03\n'
+            'd3,,500,male,Oyo,\n'
+            'd4,Fola,500,male,Oyo,03/02/2001\n'
+            'd5,Gbenga,500,male,Oyo,2001-13-45\n',
+            dry_run='true', strict_dates='true',
+        )
+        self.assertEqual(response.status_code, 200)
+        summary = response.json()['data']
+        self.assertEqual(Student.objects.count(), before)
+        self.assertEqual(
+            (summary['total_rows'], summary['valid_rows'], summary['rejected_rows'], summary['warning_count']), (7, 3, 4, 4)
+        )
+        self.assertEqual(summary['date_format'], 'YYYY-MM-DD')
+        self.assertEqual(summary['issue_counts'], {
+            'unknown_level': 1, 'unknown_gender': 1, 'duplicate_in_file': 1, 'invalid_level': 1,
+            'already_exists': 1, 'missing_field': 1, 'mixed_date_format': 1, 'invalid_date': 1,
+        })
+        self.assertEqual(
+            [(issue['row'], issue['field'], issue['code'], issue['severity']) for issue in summary['issues'] if issue['row'] == 5],
+            [(5, 'level', 'invalid_level', 'warning'), (5, 'matric_number', 'already_exists', 'error')],
+        )
+
+
+class CredentialResetTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admin = make_student('ADMIN', is_staff=True)
+        self.students = [make_student(f'R{i}', level=400, has_changed_password=False) for i in range(5)]
+
+    def test_reset_returns_new_credentials(self):
+        response = client_for(self.admin).post('/api/v1/students/reset-credentials/', {'level': 400}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'no-store')
+        rows = list(csv.reader(io.StringIO(response.content.decode())))[1:]
+        self.assertEqual(len(rows), 5)
+        for matric, _, password in rows:
+            self.assertTrue(check_password(password, Student.objects.get(matric_number=matric).password))
+        self.assertTrue(check_password('pw', self.admin.password))
+
+    @override_settings(CREDENTIAL_RESET_MAX=3)
+    def test_large_resets_run_with_the_command(self):
+        response = client_for(self.admin).post('/api/v1/students/reset-credentials/', {'level': 400}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(check_password('pw', self.students[0].password))
+
+        path = os.path.join(tempfile.mkdtemp(), 'credentials.csv')
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('reset_credentials', level=400, output=path, stdout=io.StringIO())
+        with open(path, newline='') as output:
+            rows = list(csv.reader(output))
+        self.assertEqual(rows[0], credentials.CSV_HEADER)
+        self.assertEqual(len(rows), 6)
+        for matric, _, password in rows[1:]:
+            self.assertTrue(check_password(password, Student.objects.get(matric_number=matric).password))
+
+    def test_interrupted_reset_keeps_old_passwords(self):
+        calls = []
+
+        def fail_second_chunk(passwords, executor=None):
+            calls.append(passwords)
+            if len(calls) == 2:
+                raise RuntimeError("worker killed")
+            return [make_password(password) for password in passwords]
+
+        with mock.patch.object(credentials, 'CHUNK_SIZE', 2), \
+                mock.patch.object(hashing, 'hash_passwords', side_effect=fail_second_chunk):
+            with self.assertRaises(RuntimeError):
+                credentials.reset(Student.objects.filter(level=400))
+        for student in Student.objects.filter(level=400):
+            self.assertTrue(check_password('pw', student.password))
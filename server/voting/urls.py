@@ -5,7 +5,7 @@ from rest_framework_simplejwt.views import TokenVerifyView
 from .views import (
     ObtainTokenPairView, RefreshTokenView, LogoutView, CurrentUserView,
     StudentViewSet, ElectionViewSet, VoteViewSet, PositionViewSet, 
-    CandidateViewSet, AdminDashboardView, ChangePasswordView
+    CandidateViewSet, AdminDashboardView, ChangePasswordView, election_live
 )
 
 router = DefaultRouter()
@@ -34,4 +34,7 @@ urlpatterns = [
     path('elections/<uuid:pk>/toggle_status/', 
          ElectionViewSet.as_view({'patch': 'toggle_status'}), 
          name='election_toggle_status'),
+
+    # Live tally/turnout stream (server-sent events, ASGI only)
+    path('elections/<uuid:pk>/live/', election_live, name='election_live'),
 ]
@@ -15,10 +15,10 @@ that makes it possible for clients to communicate with the legalX application.
 import csv
 import io
 from typing import cast
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
-from django.db.models import Count, Q
-from django.db.models.functions import ExtractHour
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Coalesce, ExtractHour
 from django.contrib.auth.hashers import make_password
 from django.conf import settings
 from rest_framework import status, viewsets, mixins
@@ -28,19 +28,27 @@ from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
+from asgiref.sync import sync_to_async
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.core.cache import cache
-from datetime import timedelta, datetime
-import csv, io, logging, time
-from django.db import transaction, IntegrityError
+from datetime import timedelta, datetime, timezone as dt_timezone
+import csv, io, logging, os, time, uuid
+from django.db import transaction
 import logging
 
-from .models import Election, Vote, Candidate, Student, Position, LoginAttempt, IPRestriction, VoteAttempt
+from .models import Election, Vote, Candidate, Student, Position, LoginAttempt, IPRestriction, VoteAttempt, VoteTally, ElectionWinner, ImportJob
 from .serializers import (
     ChangePasswordSerializer, TokenObtainPairSerializer, ActiveElectionSerializer, VoteSerializer,
-    StudentSerializer, CandidateSerializer, PositionSerializer, DynamicCandidateSerializer
+    StudentSerializer, CandidateSerializer, PositionSerializer, DynamicCandidateSerializer, BallotSerializer,
+    ImportJobSerializer
 )
+from .ballot import BallotSnapshot
+from . import active_election, audit, ballot_status, credentials, eligibility, imports, ingestion, listings, live, pacing, repository, results, snapshots, tally, voter_roll
+from utils.conditional import ConditionalResponseMixin, url_window
+from utils.pagination import InvalidCursor, paginate
 from utils.response import ResponseMixin
 from .middleware import SecurityMiddleware
 
@@ -105,12 +113,12 @@ class ObtainTokenPairView(TokenObtainPairView, ResponseMixin):
         
         response = super().post(request, *args, **kwargs)
         
-        LoginAttempt.objects.create(
+        audit.record(LoginAttempt(
             ip_address=ip_address,
             user_agent=user_agent,
             matric_number=matric_number,
             success=response.status_code == 200
-        )
+        ))
         
         if response.status_code == 200:
             try:
@@ -275,26 +283,30 @@ class CurrentUserView(APIView, ResponseMixin):
         return self.response(data=serializer.data, message="Current user retrieved successfully.")
     
 
-class StudentViewSet(viewsets.ReadOnlyModelViewSet, ResponseMixin):
+class StudentViewSet(ConditionalResponseMixin, viewsets.ReadOnlyModelViewSet, ResponseMixin):
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
     permission_classes = [IsAuthenticated]
+    conditional_actions = ('list', 'retrieve', 'qualified_candidates')
+    # Students without a picture show their nomination photo
+    conditional_models = (Student, Candidate)
+    conditional_signed_urls = True
+
+    def get_queryset(self):
+        return StudentSerializer.with_fallback_photo(super().get_queryset())
 
     @action(detail=False, methods=['get'], url_path='qualified-candidates', permission_classes=[AllowAny])
     def qualified_candidates(self, request):
         """
-        Returns a list of all students who are eligible to run for positions.
-        Optionally filter by gender for specific position.
+        Returns a page of the students who are eligible to run for positions.
+        Optionally filter by gender for specific position; paged like the other
+        lists (?page= or ?cursor=, ?page_size= up to 200).
         """
-        queryset = self.queryset.filter(level=500, status='active')
-        
-        # Optional gender filter
-        gender = request.query_params.get('gender')
-        if gender and gender in ['male', 'female']:
-            queryset = queryset.filter(gender=gender)
-            
-        serializer = self.get_serializer(queryset, many=True)
-        return self.response(data=serializer.data, message="List of all qualified candidates.")
+        try:
+            data, pagination = listings.qualified_students(request)
+        except InvalidCursor:
+            return self.response(error={"detail": "Invalid cursor."}, status_code=400)
+        return self.response(data=data, message="List of all qualified candidates.", **pagination)
 
     ### ADMIN ONLY ROUTES
     @action(detail=False, methods=['post'], permission_classes=[IsAdminUser], parser_classes=[MultiPartParser, FormParser])
@@ -304,12 +316,16 @@ class StudentViewSet(viewsets.ReadOnlyModelViewSet, ResponseMixin):
         Expected columns (case‑insensitive):
           matric_number, full_name, level, gender(optional), state_of_origin, email(optional), phone_number(optional), date_of_birth(YYYY-MM-DD optional)
 
-        Optimizations:
-          * Single pass read (no full file kept as giant string unless small)
-          * Pre-collect matric numbers -> one DB query for existing
-          * Cache hashed default passwords per unique state_of_origin
-          * bulk_create with batching (no per-row INSERT)
-          * Minimal per-row validation & typed casting
+        Rows are streamed and imported in chunks (see voting.imports): one
+        existence query and one bulk_create per chunk. The initial password is
+        the state_of_origin, hashed once per state.
+
+        With background=true the upload is saved and imported as an ImportJob;
+        the response is 202 with the job, whose progress and error report are
+        served by import-jobs/<id>/ and import-jobs/<id>/errors/.
+
+        With dry_run=true nothing is written: the file is validated and every
+        problem the import would hit is returned by row, field and code.
         """
         start_time = time.perf_counter()
         try:
@@ -320,126 +336,58 @@ class StudentViewSet(viewsets.ReadOnlyModelViewSet, ResponseMixin):
             if not csv_file.name.lower().endswith('.csv'):
                 return self.response(error={"detail": "File must be a CSV."}, status_code=400)
 
-            ### Stream decode to avoid unnecessary copies
             try:
-                decoded = io.TextIOWrapper(csv_file.file, encoding='utf-8')
-            except Exception:
-                decoded = io.StringIO(csv_file.read().decode('utf-8'))
-
-            reader = csv.DictReader(decoded)
-            rows = list(reader)
-            total_rows = len(rows)
-            if total_rows == 0:
-                return self.response(data={'created_count': 0, 'errors': []}, message="Empty CSV provided.")
+                options = imports.parse_options(request.data)
+            except ValueError:
+                return self.response(error={"detail": "default_level must be a number."}, status_code=400)
+
+            if str(request.data.get('dry_run', 'false')).lower() in {'1', 'true', 'yes'}:
+                decoded = io.TextIOWrapper(csv_file.file, encoding='utf-8', newline='')
+                try:
+                    summary = imports.validate(decoded, options)
+                except imports.ImportFileError as e:
+                    return self.response(error={"detail": str(e)}, status_code=400)
+                summary['time_seconds'] = round(time.perf_counter() - start_time, 3)
+                return self.response(
+                    data=summary,
+                    message=f"Dry run: {summary['valid_rows']} of {summary['total_rows']} rows would be imported."
+                )
 
-            required_fields = {'matric_number', 'full_name', 'state_of_origin'}
-            default_level = int(request.data.get('default_level', 500))
-            strict_dates = str(request.data.get('strict_dates', 'false')).lower() in {'1','true','yes'}
-            accepted_date_formats = ['%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%d.%m.%Y']
+            if str(request.data.get('background', 'false')).lower() in {'1', 'true', 'yes'}:
+                job = imports.create_job(csv_file, request.user, options)
+                imports.start(job)
+                return self.response(
+                    data=ImportJobSerializer(job).data,
+                    message="Import queued.",
+                    status_code=202
+                )
 
-            header = {h.lower().strip(): h for h in (reader.fieldnames or [])}
-            missing_required = [f for f in required_fields if f not in header]
-            if missing_required:
-                return self.response(error={"detail": f"Missing required columns: {', '.join(missing_required)}"}, status_code=400)
+            ### Stream decode to avoid unnecessary copies
+            decoded = io.TextIOWrapper(csv_file.file, encoding='utf-8', newline='')
 
-            matric_numbers = []
-            normalized_rows = []
             errors = []
+            def report(line, matric, message):
+                errors.append(f"Row {line}: {message}")
 
-            for idx, raw in enumerate(rows, start=2):
-                try:
-                    norm = {k.lower().strip(): (v.strip() if isinstance(v, str) else v) for k, v in raw.items()}
-                    missing = [f for f in required_fields if not norm.get(f)]
-                    if missing:
-                        errors.append(f"Row {idx}: Missing required field(s): {', '.join(missing)}")
-                        continue
-                    matric = norm['matric_number'].upper()
-                    norm['matric_number'] = matric
-                    level_raw = norm.get('level')
-                    if level_raw:
-                        try:
-                            norm['level'] = int(level_raw)
-                        except ValueError:
-                            errors.append(f"Row {idx}: Invalid level '{level_raw}' -> using default {default_level}")
-                            norm['level'] = default_level
-                    else:
-                        norm['level'] = default_level
-                    gender = (norm.get('gender') or 'other').lower()
-                    if gender not in {'male', 'female', 'other'}:
-                        gender = 'other'
-                    norm['gender'] = gender
-                    dob_raw = norm.get('date_of_birth') or ''
-                    dob_val = None
-                    if dob_raw:
-                        parsed = False
-                        for fmt in accepted_date_formats:
-                            try:
-                                dob_val = datetime.strptime(dob_raw, fmt).date()
-                                parsed = True
-                                break
-                            except ValueError:
-                                continue
-                        if not parsed:
-                            msg = f"Row {idx}: Unrecognized date_of_birth '{dob_raw}' (accepted: YYYY-MM-DD, DD-MM-YYYY, DD/MM/YYYY)"
-                            if strict_dates:
-                                errors.append(msg)
-                                continue
-                            else:
-                                errors.append(msg + ' -> stored as NULL')
-                                dob_val = None
-                    norm['date_of_birth'] = dob_val
-                    normalized_rows.append((idx, norm))
-                    matric_numbers.append(matric)
-                except Exception as e:
-                    errors.append(f"Row {idx}: {str(e)}")
-
-            if not normalized_rows:
-                elapsed = time.perf_counter() - start_time
-                return self.response(data={'created_count': 0, 'errors': errors[:25], 'time_seconds': round(elapsed,3)}, message="No valid rows to import.")
-
-            existing_set = set(
-                Student.objects.filter(matric_number__in=matric_numbers).values_list('matric_number', flat=True)
-            )
+            progress = imports.Progress(0, 0, 0)
+            try:
+                for progress in imports.import_rows(decoded, options, report):
+                    pass
+            except imports.ImportFileError as e:
+                return self.response(error={"detail": str(e)}, status_code=400)
 
-            to_create = []
-            hashed_cache = {}
-            default_password_fallback = make_password('password123')
-
-            for idx, norm in normalized_rows:
-                if norm['matric_number'] in existing_set:
-                    errors.append(f"Row {idx}: Student {norm['matric_number']} already exists")
-                    continue
-                state = norm.get('state_of_origin') or 'password123'
-                if state not in hashed_cache:
-                    hashed_cache[state] = make_password(state)
-                pwd = hashed_cache.get(state, default_password_fallback)
-                to_create.append(Student(
-                    matric_number=norm['matric_number'],
-                    full_name=norm['full_name'],
-                    level=norm['level'],
-                    gender=norm['gender'],
-                    state_of_origin=norm.get('state_of_origin') or '',
-                    email=(norm.get('email') or None) or None,
-                    phone_number=(norm.get('phone_number') or None) or None,
-                    password=pwd,
-                    date_of_birth=norm['date_of_birth'],
-                ))
-
-            created_count = 0
-            if to_create:
-                try:
-                    with transaction.atomic():
-                        Student.objects.bulk_create(to_create, batch_size=1000)
-                    created_count = len(to_create)
-                except Exception as e:
-                    logger.error(f"Bulk create failed: {str(e)}")
-                    errors.append(f"Bulk create failed: {str(e)}")
+            if progress.rows == 0:
+                return self.response(data={'created_count': 0, 'errors': []}, message="Empty CSV provided.")
 
+            created_count = progress.created
             elapsed = time.perf_counter() - start_time
+            if not created_count and len(errors) >= progress.rows:
+                return self.response(data={'created_count': 0, 'errors': errors[:25], 'time_seconds': round(elapsed,3)}, message="No valid rows to import.")
+
             return self.response(
                 data={
                     'created_count': created_count,
-                    'skipped': total_rows - created_count,
+                    'skipped': progress.rows - created_count,
                     'errors': errors[:25],
                     'time_seconds': round(elapsed, 3),
                     'avg_ms_per_created': round((elapsed / created_count * 1000), 2) if created_count else None
@@ -450,6 +398,27 @@ class StudentViewSet(viewsets.ReadOnlyModelViewSet, ResponseMixin):
             logger.error(f"Bulk import fatal error: {str(e)}")
             return self.response(error={"detail": "Import failed."}, status_code=500)
 
+    @action(detail=False, methods=['get'], url_path=r'import-jobs/(?P<job_id>[0-9a-f-]+)', permission_classes=[IsAdminUser])
+    def import_job(self, request, job_id=None):
+        """Progress of a background import job."""
+        job = ImportJob.objects.filter(pk=job_id).first()
+        if job is None:
+            return self.response(error={"detail": "Import job not found."}, status_code=404)
+        return self.response(data=ImportJobSerializer(job).data, message="Import job retrieved successfully.")
+
+    @action(detail=False, methods=['get'], url_path=r'import-jobs/(?P<job_id>[0-9a-f-]+)/errors', permission_classes=[IsAdminUser])
+    def import_job_errors(self, request, job_id=None):
+        """Download the error report (row, matric_number, error) of a background import job."""
+        job = ImportJob.objects.filter(pk=job_id).first()
+        if job is None:
+            return self.response(error={"detail": "Import job not found."}, status_code=404)
+        if not job.error_report_path or not os.path.exists(job.error_report_path):
+            return self.response(error={"detail": "No error report available yet."}, status_code=404)
+        return FileResponse(
+            open(job.error_report_path, 'rb'), as_attachment=True,
+            filename=f"import_errors_{job.pk}.csv", content_type='text/csv'
+        )
+
     @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
     def export(self, request):
         """
@@ -490,7 +459,7 @@ class StudentViewSet(viewsets.ReadOnlyModelViewSet, ResponseMixin):
             student = self.get_object()
             new_password = request.data.get('new_password', 'password123')
             student.set_password(new_password)
-            student.save()
+            student.save(update_fields=['password'])
             
             return self.response(
                 data={'matric_number': student.matric_number},
@@ -501,6 +470,83 @@ class StudentViewSet(viewsets.ReadOnlyModelViewSet, ResponseMixin):
             logger.error(f"Password reset failed: {str(e)}")
             return self.response(error={"detail": "Password reset failed."}, status_code=500)
 
+    @action(detail=False, methods=['post'], url_path='reset-credentials', permission_classes=[IsAdminUser])
+    def reset_credentials(self, request):
+        """
+        Reset the passwords of every student of a `level` or of an `election`'s
+        voter roll (see voting.credentials). Students who already set their own
+        password are skipped unless include_changed=true. By default each
+        student gets a random password and the response is a CSV of the new
+        credentials (the only copy); with random=false the state of origin
+        becomes the password again and the response reports the count.
+        Resets of more than CREDENTIAL_RESET_MAX students are refused: they
+        run with the reset_credentials command instead.
+        """
+        try:
+            level = request.data.get('level')
+            election_id = request.data.get('election')
+            if bool(level) == bool(election_id):
+                return self.response(error={"detail": "Provide either level or election."}, status_code=400)
+
+            now = timezone.now()
+            if Election.objects.filter(is_active=True, start_date__lte=now, end_date__gte=now).exists():
+                return self.response(
+                    error={"detail": "Credentials cannot be reset while an election is ongoing."},
+                    status_code=409
+                )
+
+            if level:
+                try:
+                    level = int(level)
+                except (TypeError, ValueError):
+                    return self.response(error={"detail": "level must be a number."}, status_code=400)
+                election = None
+                scope = f"level_{level}"
+            else:
+                try:
+                    election = Election.objects.filter(pk=uuid.UUID(str(election_id))).first()
+                except ValueError:
+                    election = None
+                if election is None:
+                    return self.response(error={"detail": "Election not found."}, status_code=404)
+                scope = f"election_{election.pk}"
+
+            include_changed = str(request.data.get('include_changed', 'false')).lower() in {'1', 'true', 'yes'}
+            students = credentials.students_for(level, election, include_changed)
+            random_passwords = str(request.data.get('random', 'true')).lower() in {'1', 'true', 'yes'}
+
+            selected = students.count()
+            if selected > settings.CREDENTIAL_RESET_MAX:
+                return self.response(
+                    error={"detail": (
+                        f"{selected} students selected; resets of more than {settings.CREDENTIAL_RESET_MAX} "
+                        f"students run with `manage.py reset_credentials`."
+                    )},
+                    status_code=400
+                )
+
+            start_time = time.perf_counter()
+            reset = credentials.reset(students, random_passwords=random_passwords)
+            logger.info(
+                f"[CREDENTIALS] {request.user.matric_number} reset {len(reset)} password(s) for {scope} "
+                f"in {time.perf_counter() - start_time:.1f}s"
+            )
+
+            if not random_passwords:
+                return self.response(data={'reset_count': len(reset)}, message=f"{len(reset)} password(s) reset.")
+
+            response = HttpResponse(content_type='text/csv')
+            response['Content-Disposition'] = f'attachment; filename="credentials_{scope}_{now.strftime("%Y%m%d%H%M")}.csv"'
+            response['Cache-Control'] = 'no-store'
+            writer = csv.writer(response)
+            writer.writerow(credentials.CSV_HEADER)
+            writer.writerows(reset)
+            return response
+
+        except Exception as e:
+            logger.error(f"Credential reset failed: {str(e)}")
+            return self.response(error={"detail": "Credential reset failed."}, status_code=500)
+
     @action(detail=True, methods=['patch'], permission_classes=[IsAdminUser])
     def toggle_status(self, request, pk=None):
         """
@@ -509,7 +555,7 @@ class StudentViewSet(viewsets.ReadOnlyModelViewSet, ResponseMixin):
         try:
             student = self.get_object()
             student.is_active = not student.is_active
-            student.save()
+            student.save(update_fields=['is_active'])
             
             return self.response(
                 data={'is_active': student.is_active},
@@ -556,20 +602,22 @@ class StudentViewSet(viewsets.ReadOnlyModelViewSet, ResponseMixin):
 
     @action(detail=False, methods=['get'], url_path='search', permission_classes=[IsAuthenticated])
     def search(self, request):
-        """Lightweight search for students (for dropdowns). Supports ?q= & ?level= & ?limit= & ?page=."""
+        """
+        Lightweight search for students (for dropdowns).
+        Supports ?q= & ?level= & ?limit= & ?page= (or ?cursor=) & ?count=false.
+        """
         try:
             q = request.query_params.get('q', '').strip()
             level = request.query_params.get('level')
             page = max(int(request.query_params.get('page', 1)), 1)
-            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
             qs = self.queryset.filter(is_active=True)
             if level and level.isdigit():
                 qs = qs.filter(level=int(level))
             if q:
                 qs = qs.filter(Q(full_name__icontains=q) | Q(matric_number__icontains=q))
-            total = qs.count()
-            start = (page - 1) * limit
-            items = qs.order_by('full_name')[start:start+limit]
+            items, pagination = paginate(
+                request, qs, ('full_name', 'id'), page_size=10, max_page_size=50, size_param='limit'
+            )
             data = [
                 {
                     'id': s.id,
@@ -580,21 +628,35 @@ class StudentViewSet(viewsets.ReadOnlyModelViewSet, ResponseMixin):
                     'picture': self.request.build_absolute_uri(s.picture.url) if s.picture else None
                 } for s in items
             ]
-            return self.response(data={
+            body = {
                 'results': data,
-                'page': page,
-                'total': total,
-                'has_next': start + limit < total
-            })
+                'total': pagination['count'],
+                'has_next': pagination['next_cursor'] is not None,
+            }
+            if 'cursor' not in request.query_params:
+                body['page'] = page
+            return self.response(
+                data=body,
+                next_cursor=pagination['next_cursor'],
+                previous_cursor=pagination['previous_cursor'],
+            )
+        except InvalidCursor:
+            return self.response(error={'detail': 'Invalid cursor.'}, status_code=400)
         except Exception as e:
             logger.error(f"Student search failed: {str(e)}")
             return self.response(error={'detail': 'Search failed.'}, status_code=500)
         
 
-class ElectionViewSet(viewsets.ModelViewSet, ResponseMixin):  # Changed from ReadOnlyModelViewSet
+class ElectionViewSet(ConditionalResponseMixin, viewsets.ModelViewSet, ResponseMixin):  # Changed from ReadOnlyModelViewSet
     queryset = Election.objects.all().order_by('-start_date')
     serializer_class = ActiveElectionSerializer
     permission_classes = [AllowAny]
+    # Nested positions carry candidate and vote counts and the caller's has_voted flags
+    conditional_models = (Election, Position, Candidate, Student)
+    conditional_version_keys = (tally.VERSION_KEY,)
+    conditional_per_user = True
+    conditional_signed_urls = True
+    conditional_max_age = 15
 
     def get_permissions(self):
         """
@@ -602,6 +664,8 @@ class ElectionViewSet(viewsets.ModelViewSet, ResponseMixin):  # Changed from Rea
         """
         if self.action in ['create', 'update', 'partial_update', 'destroy', 'toggle_status']:
             permission_classes = [IsAdminUser]
+        elif self.action == 'active_ballot_status':
+            permission_classes = [IsAuthenticated]
         else:
             permission_classes = [AllowAny]
         return [permission() for permission in permission_classes]
@@ -676,6 +740,10 @@ class ElectionViewSet(viewsets.ModelViewSet, ResponseMixin):  # Changed from Rea
             
             election.is_active = not election.is_active
             election.save()
+
+            if election.is_active:
+                eligibility.build_election_index(election)
+                voter_roll.materialize(election)
             
             return self.response(
                 data={'is_active': election.is_active},
@@ -693,8 +761,9 @@ class ElectionViewSet(viewsets.ModelViewSet, ResponseMixin):  # Changed from Rea
           type: general|specific
           is_active: true|false
           ordering: name,-name,start_date,-start_date,end_date,-end_date,positions_count,-positions_count,is_active,-is_active (default -start_date)
-          page (default 1)
+          page (default 1), or cursor (empty for the first page) for keyset paging
           page_size (default 20, max 100)
+          count: false to skip the total count
         """
         qp = request.query_params
         qs = self.get_queryset()
@@ -722,42 +791,17 @@ class ElectionViewSet(viewsets.ModelViewSet, ResponseMixin):  # Changed from Rea
         allowed = {'name','-name','start_date','-start_date','end_date','-end_date','positions_count','-positions_count','is_active','-is_active'}
         if ordering not in allowed:
             ordering = '-start_date'
-        qs = qs.order_by(ordering, 'id')
 
-        # Pagination
-        try:
-            page = max(int(qp.get('page', 1)), 1)
-        except ValueError:
-            page = 1
         try:
-            page_size = int(qp.get('page_size', 20))
-        except ValueError:
-            page_size = 20
-        page_size = max(1, min(page_size, 100))
-        total = qs.count()
-        start = (page - 1) * page_size
-        end = start + page_size
-        items = list(qs[start:end])
+            items, pagination = paginate(request, qs, (ordering, 'id'))
+        except InvalidCursor:
+            return self.response(error={"detail": "Invalid cursor."}, status_code=400)
 
         serializer = self.get_serializer(items, many=True)
-
-        base_url = request.build_absolute_uri(request.path)
-        def build_url(p):
-            if p < 1 or (p-1)*page_size >= total:
-                return None
-            params = request.GET.copy()
-            params['page'] = str(p)
-            params['page_size'] = str(page_size)
-            return f"{base_url}?{params.urlencode()}"
-        next_url = build_url(page + 1)
-        prev_url = build_url(page - 1) if page > 1 else None
-
         return self.response(
             data=serializer.data,
             message="Elections retrieved successfully.",
-            count=total,
-            next=next_url,
-            previous=prev_url
+            **pagination
         )
 
     def retrieve(self, request, *args, **kwargs):
@@ -771,14 +815,43 @@ class ElectionViewSet(viewsets.ModelViewSet, ResponseMixin):  # Changed from Rea
 
     @action(detail=False, methods=['get'], url_path='active')
     def active_election(self, request):
+        """
+        The running election, identical for every visitor and served from a
+        pre-rendered cached body; per-voter flags come from ``active/ballot-status``.
+        """
         try:
-            active = Election.objects.prefetch_related('positions') \
-                                      .get(is_active=True, start_date__lte=timezone.now(), end_date__gte=timezone.now())
-        except Election.DoesNotExist:
+            entry = active_election.lookup()
+        except Election.MultipleObjectsReturned:
+            return self.response(error={"detail": "Multiple active elections found."}, status_code=500)
+        if entry['election_id'] is None:
             return self.response(error={"detail": "No active election found."}, status_code=404)
+
+        if entry['etag'] in request.headers.get('If-None-Match', ''):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = HttpResponse(entry['body'], content_type='application/json')
+        response['ETag'] = entry['etag']
+        # Vote counts move while the election runs: always revalidate
+        response['Cache-Control'] = 'public, no-cache'
+        return response
+
+    @action(detail=False, methods=['get'], url_path='active/ballot-status', permission_classes=[IsAuthenticated])
+    def active_ballot_status(self, request):
+        """The positions of the running election the current voter has voted on."""
+        try:
+            entry = active_election.lookup()
         except Election.MultipleObjectsReturned:
             return self.response(error={"detail": "Multiple active elections found."}, status_code=500)
-        return self.response(data=self.get_serializer(active).data)
+        if entry['election_id'] is None:
+            return self.response(error={"detail": "No active election found."}, status_code=404)
+
+        voted = ballot_status.voted_positions(request.user.id, entry['election_id'])
+        response = self.response(data={
+            'election_id': entry['election_id'],
+            'voted_positions': sorted(str(position_id) for position_id in voted),
+        })
+        response['Cache-Control'] = 'private, no-store'
+        return response
 
     @action(detail=True, methods=['get'], url_path='results', permission_classes=[IsAuthenticated])
     def results(self, request, pk=None):
@@ -789,38 +862,32 @@ class ElectionViewSet(viewsets.ModelViewSet, ResponseMixin):  # Changed from Rea
         if election.id in { 'd9d3b854-e262-4d85-a1aa-636ab0ab506b' }:
             return self.response(error={"detail": "Results not available for this specific election yet 🥲."}, status_code=403)
 
-        vote_data = Vote.objects.filter(position__election=election) \
-            .select_related('student_voted_for') \
-            .values('position__id', 'position__name', 'student_voted_for__id', 'student_voted_for__full_name') \
-            .annotate(vote_count=Count('id')).order_by('position__name', '-vote_count')
-
-        grouped = {}
-        for vote in vote_data:
-            pid = vote['position__id']
-            
-            # Get the actual student object to access the picture URL properly
-            student = Student.objects.get(id=vote['student_voted_for__id'])
-            if student.picture:
-                picture_url = student.picture.url
-            else:
-                candidate = Candidate.objects.filter(student=vote['student_voted_for__id']).first()
-                picture_url = candidate.photo.url if candidate and candidate.photo else None
-
-            grouped.setdefault(pid, {
-            'position_id': pid,
-            'position_name': vote['position__name'],
-            'candidates': []
-            })['candidates'].append({
-            'student_id': vote['student_voted_for__id'],
-            'student_name': vote['student_voted_for__full_name'],
-            'picture': picture_url,
-            'vote_count': vote['vote_count']
-            })
+        snapshot = snapshots.get_snapshot(election)
+        if snapshot:
+            return self.snapshot_response(request, snapshot, "Election results retrieved successfully.", max_age=3600)
 
+        # Staff watching an election that has not ended get live results
         election_data = self.get_serializer(election).data
-        election_data['results'] = list(grouped.values())
+        election_data['results'] = results.election_results(election)
         
         return self.response(data=election_data, message="Election results retrieved successfully.")
+
+    def snapshot_response(self, request, snapshot, message, max_age):
+        """
+        Serve a frozen result with an ETag, answering a matching If-None-Match
+        with 304. The payload embeds signed picture URLs, so the ETag changes
+        and the response expires with the signed-URL window (see
+        utils.conditional.url_window). Results need authentication: private only.
+        """
+        window, seconds_left = url_window()
+        etag = f'"{snapshot.etag}-{window}"'
+        if etag in request.headers.get('If-None-Match', ''):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = self.response(data=snapshots.served_payload(snapshot), message=message)
+        response['ETag'] = etag
+        response['Cache-Control'] = f'private, max-age={min(max_age, seconds_left)}'
+        return response
     
     @action(detail=False, methods=['get'], url_path='recent-winners')
     def recent_winners(self, request):
@@ -828,47 +895,29 @@ class ElectionViewSet(viewsets.ModelViewSet, ResponseMixin):  # Changed from Rea
         Returns recent winners from concluded elections for the showcase.
         """
         try:
-            raise
             # Get the most recent concluded elections
-            concluded_elections = Election.objects.filter(
+            concluded_elections = list(Election.objects.filter(
                 end_date__lt=timezone.now()
-            ).order_by('-end_date')[:3]  # Last 3 elections
-            
-            winners_data = []
-            
+            ).order_by('-end_date')[:3])  # Last 3 elections
+
+            # Freezing an election's results projects its winners
             for election in concluded_elections:
-                # Get winners (top vote getters) from each position
-                vote_data = Vote.objects.filter(position__election=election) \
-                    .select_related('student_voted_for', 'position') \
-                    .values('position__id', 'position__name', 'student_voted_for__id', 'student_voted_for__full_name') \
-                    .annotate(vote_count=Count('id')).order_by('position__name', '-vote_count')
-                
-                # Group by position and get the top candidate for each position
-                position_winners = {}
-                for vote in vote_data:
-                    pid = vote['position__id']
-                    if pid not in position_winners:
-                        student = Student.objects.get(id=vote['student_voted_for__id'])
-                        picture_url = student.picture.url if student.picture else None
-                        candidate = Candidate.objects.filter(student=vote['student_voted_for__id']).first()
-                        if not picture_url and candidate and candidate.photo:
-                            picture_url = candidate.photo.url
-                        
-                        position_winners[pid] = {
-                            'position_name': vote['position__name'],
-                            'winner_name': vote['student_voted_for__full_name'],
-                            'winner_picture': picture_url,
-                            'vote_count': vote['vote_count'],
-                            'election_name': election.name,
-                            'election_year': election.end_date.year
-                        }
-                
-                # Add position winners to the showcase
-                for winner in position_winners.values():
-                    winners_data.append(winner)
-            
+                snapshots.get_snapshot(election)
+
             # Limit to 8 most recent winners for the showcase
-            winners_data = winners_data[:8]
+            winners = ElectionWinner.objects.filter(election__in=concluded_elections).select_related('election')[:8]
+            winners_data = [
+                {
+                    'position_name': winner.position_name,
+                    'winner_name': winner.winner_name,
+                    'winner_picture': results.picture_url(winner.picture),
+                    'vote_count': winner.vote_count,
+                    'is_tie': winner.is_tie,
+                    'election_name': winner.election.name,
+                    'election_year': winner.election_end.year
+                }
+                for winner in winners
+            ]
             
             return self.response(data=winners_data, message="Recent winners retrieved successfully.") 
         except Exception as e:
@@ -888,49 +937,26 @@ class ElectionViewSet(viewsets.ModelViewSet, ResponseMixin):  # Changed from Rea
             if not concluded_election:
                 return self.response(error={"detail": "No concluded election found."}, status_code=404)
             
-            # Get results for the concluded election
-            vote_data = Vote.objects.filter(position__election=concluded_election) \
-                .select_related('student_voted_for') \
-                .values('position__id', 'position__name', 'student_voted_for__id', 'student_voted_for__full_name') \
-                .annotate(vote_count=Count('id')).order_by('position__name', '-vote_count')
-
-            grouped = {}
-            for vote in vote_data:
-                pid = vote['position__id']
-                
-                # Get the actual student object to access the picture URL properly
-                student = Student.objects.get(id=vote['student_voted_for__id'])
-                if student.picture:
-                    picture_url = student.picture.url
-                else:
-                    candidate = Candidate.objects.filter(student=vote['student_voted_for__id']).first()
-                    picture_url = candidate.photo.url if candidate and candidate.photo else None
-                
-                grouped.setdefault(pid, {
-                    'position_id': pid,
-                    'position_name': vote['position__name'],
-                    'candidates': []
-                })['candidates'].append({
-                    'student_id': vote['student_voted_for__id'],
-                    'student_name': vote['student_voted_for__full_name'],
-                    'picture': picture_url,
-                    'vote_count': vote['vote_count']
-                })
-
-            election_data = self.get_serializer(concluded_election).data
-            election_data['results'] = list(grouped.values())
-            
-            return self.response(data=election_data, message="Last concluded election results retrieved successfully.")
+            snapshot = snapshots.get_snapshot(concluded_election)
+            # Short max-age: the next election to end replaces this one
+            return self.snapshot_response(
+                request, snapshot, "Last concluded election results retrieved successfully.", max_age=300
+            )
             
         except Exception as e:
             logger.error(f"Error retrieving last concluded election: {str(e)}")
             return self.response(error={"detail": "An error occurred while retrieving the election results."}, status_code=500)
 
 
-class PositionViewSet(viewsets.ReadOnlyModelViewSet, ResponseMixin):
+class PositionViewSet(ConditionalResponseMixin, viewsets.ReadOnlyModelViewSet, ResponseMixin):
     queryset = Position.objects.all()
     serializer_class = PositionSerializer
     permission_classes = [AllowAny]
+    conditional_models = (Position, Election, Candidate, Student)
+    conditional_version_keys = (tally.VERSION_KEY,)
+    conditional_per_user = True
+    conditional_signed_urls = True
+    conditional_max_age = 15
 
     def list(self, request, *args, **kwargs):
         """Server-side filtered & paginated positions list.
@@ -940,8 +966,9 @@ class PositionViewSet(viewsets.ReadOnlyModelViewSet, ResponseMixin):
           position_type: senior|junior
           gender_restriction: any|male|female
           ordering: one of name,-name,created_at,-created_at,candidate_count,-candidate_count,vote_count,-vote_count
-          page (default 1)
+          page (default 1), or cursor (empty for the first page) for keyset paging
           page_size (default 30, max 100)
+          count: false to skip the total count
         """
         qp = request.query_params
         qs = self.queryset.select_related('election')
@@ -961,7 +988,7 @@ class PositionViewSet(viewsets.ReadOnlyModelViewSet, ResponseMixin):
         # Annotate counts once (cheap aggregation vs N+1 in serializer)
         qs = qs.annotate(
             agg_candidate_count=Count('candidates', distinct=True),
-            agg_vote_count=Count('votes', distinct=True)
+            agg_vote_count=tally.position_votes_subquery()
         )
 
         ordering = qp.get('ordering', 'name')
@@ -976,47 +1003,24 @@ class PositionViewSet(viewsets.ReadOnlyModelViewSet, ResponseMixin):
             '-vote_count': '-agg_vote_count'
         }
         ordering_actual = order_map.get(ordering, ordering)
-        qs = qs.order_by(ordering_actual, 'id')  # stable secondary ordering
 
-        # Pagination
-        try:
-            page = max(int(qp.get('page', 1)), 1)
-        except ValueError:
-            page = 1
         try:
-            page_size = int(qp.get('page_size', 30))
-        except ValueError:
-            page_size = 30
-        page_size = max(1, min(page_size, 100))
-        total = qs.count()
-        start = (page - 1) * page_size
-        end = start + page_size
-        items = list(qs[start:end])
+            # 'id' gives a stable secondary ordering
+            items, pagination = paginate(request, qs, (ordering_actual, 'id'), page_size=30)
+        except InvalidCursor:
+            return self.response(error={"detail": "Invalid cursor."}, status_code=400)
 
         serializer = self.get_serializer(items, many=True)
-
-        base_url = request.build_absolute_uri(request.path)
-        def build_url(p):
-            if p < 1 or (p-1)*page_size >= total:
-                return None
-            params = request.GET.copy()
-            params['page'] = str(p)
-            return f"{base_url}?{params.urlencode()}"
-        next_url = build_url(page + 1)
-        prev_url = build_url(page - 1) if page > 1 else None
-
         return self.response(
             data=serializer.data,
             message="Positions retrieved successfully.",
-            count=total,
-            next=next_url,
-            previous=prev_url
+            **pagination
         )
 
     @action(detail=True, methods=['get'], url_path='candidates')
     def candidates(self, request, pk=None):
         position = self.get_object()
-        students = position.get_eligible_candidates()
+        students = Student.objects.filter(id__in=eligibility.get_eligible_candidate_ids(position.id))
         context = self.get_serializer_context()
         context['position'] = position
         serializer = DynamicCandidateSerializer(students, many=True, context=context)
@@ -1026,25 +1030,27 @@ class PositionViewSet(viewsets.ReadOnlyModelViewSet, ResponseMixin):
         instance = self.get_object()
         serializer = self.get_serializer(instance)
         data = serializer.data
-        data['candidate_count'] = instance.get_eligible_candidates().count()
+        data['candidate_count'] = len(eligibility.get_eligible_candidate_ids(instance.id))
         return self.response(data=data, message="Position details retrieved successfully.")
 
     @action(detail=False, methods=['get'], url_path='search', permission_classes=[IsAuthenticated])
     def search(self, request):
-        """Lightweight search for positions (for dropdowns). Supports ?q= & ?election= & ?limit= & ?page=."""
+        """
+        Lightweight search for positions (for dropdowns).
+        Supports ?q= & ?election= & ?limit= & ?page= (or ?cursor=) & ?count=false.
+        """
         try:
             q = request.query_params.get('q', '').strip()
             election_id = request.query_params.get('election')
             page = max(int(request.query_params.get('page', 1)), 1)
-            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
-            qs = self.queryset
+            qs = self.queryset.select_related('election')
             if election_id:
                 qs = qs.filter(election_id=election_id)
             if q:
                 qs = qs.filter(name__icontains=q)
-            total = qs.count()
-            start = (page - 1) * limit
-            items = qs.order_by('name')[start:start+limit]
+            items, pagination = paginate(
+                request, qs, ('name', 'id'), page_size=10, max_page_size=50, size_param='limit'
+            )
             data = [
                 {
                     'id': p.id,
@@ -1055,12 +1061,20 @@ class PositionViewSet(viewsets.ReadOnlyModelViewSet, ResponseMixin):
                     'position_type': p.position_type
                 } for p in items
             ]
-            return self.response(data={
+            body = {
                 'results': data,
-                'page': page,
-                'total': total,
-                'has_next': start + limit < total
-            })
+                'total': pagination['count'],
+                'has_next': pagination['next_cursor'] is not None,
+            }
+            if 'cursor' not in request.query_params:
+                body['page'] = page
+            return self.response(
+                data=body,
+                next_cursor=pagination['next_cursor'],
+                previous_cursor=pagination['previous_cursor'],
+            )
+        except InvalidCursor:
+            return self.response(error={'detail': 'Invalid cursor.'}, status_code=400)
         except Exception as e:
             logger.error(f"Position search failed: {str(e)}")
             return self.response(error={'detail': 'Search failed.'}, status_code=500)
@@ -1112,11 +1126,17 @@ class PositionViewSet(viewsets.ReadOnlyModelViewSet, ResponseMixin):
             position = self.get_object()
             
             # Vote breakdown by candidate
-            vote_breakdown = Vote.objects.filter(position=position) \
-                .select_related('student_voted_for') \
-                .values('student_voted_for__full_name', 'student_voted_for__gender') \
-                .annotate(vote_count=Count('id')) \
+            vote_breakdown = VoteTally.objects.filter(position=position) \
+                .values('candidate__full_name', 'candidate__gender') \
+                .annotate(vote_count=Sum('count')) \
                 .order_by('-vote_count')
+            vote_breakdown = [
+                {
+                    'student_voted_for__full_name': row['candidate__full_name'],
+                    'student_voted_for__gender': row['candidate__gender'],
+                    'vote_count': row['vote_count']
+                } for row in vote_breakdown
+            ]
             
             vote_timeline = (
                 Vote.objects.filter(position=position)
@@ -1130,25 +1150,11 @@ class PositionViewSet(viewsets.ReadOnlyModelViewSet, ResponseMixin):
                 .values('voter__gender') \
                 .annotate(count=Count('id'))
             
-            total_votes = Vote.objects.filter(position=position).count()
-            eligible_voters = Student.objects.filter(level=500, status='active').count()
-            
-            # If no gender restriction, use all 500L active students
-            if position.gender_restriction != 'any':
-                eligible_voters = Student.objects.filter(
-                    level=500, 
-                    status='active', 
-                    gender=position.gender_restriction
-                ).count()
-            
-            # Determine eligible voters by election type + gender
-            if position.election.type == 'specific':
-                base = Student.objects.filter(level=500, status='active')
-            else:
-                base = Student.objects.filter(status='active')
-            if position.gender_restriction != 'any':
-                base = base.filter(gender=position.gender_restriction)
-            eligible_voters = base.count()
+            total_votes = tally.position_total(position)
+
+            # Eligible voters by election type + gender, from the election's voter roll
+            roll = voter_roll.get_roll(position.election)
+            eligible_voters = roll.eligible_count(position.gender_restriction)
             
             return self.response(
                 data={
@@ -1173,17 +1179,6 @@ class VoteViewSet(viewsets.GenericViewSet, mixins.CreateModelMixin, ResponseMixi
     serializer_class = VoteSerializer
     permission_classes = [IsAuthenticated]
 
-    def get_serializer(self, *args, **kwargs):
-        serializer = super().get_serializer(*args, **kwargs)
-        # Update queryset for student_voted_for based on position
-        if hasattr(serializer, 'initial_data') and 'position' in serializer.initial_data:
-            try:
-                position = Position.objects.get(id=serializer.initial_data['position'])
-                serializer.fields['student_voted_for'].queryset = position.get_eligible_candidates()
-            except Position.DoesNotExist:
-                pass
-        return serializer
-
     def create(self, request, *args, **kwargs):
         ip_address = self.get_client_ip(request)
         user_agent = request.META.get('HTTP_USER_AGENT', '')
@@ -1220,31 +1215,26 @@ class VoteViewSet(viewsets.GenericViewSet, mixins.CreateModelMixin, ResponseMixi
                     status_code=400
                 )
 
-            from .models import VoteAttempt
             position = serializer.validated_data['position']
 
-            try:
-                with transaction.atomic():
-                    self.perform_create(serializer)
-            except IntegrityError:
-                logger.warning(f"[VOTE][RACE] Duplicate concurrent vote prevented user={request.user.matric_number} position={position.id}")
-                existing = Vote.objects.filter(voter=request.user, position=position).first()
-                if existing:
-                    data = serializer.data
-                    return self.response(
-                        data=data,
-                        message="Duplicate vote ignored: you had already voted for this position.",
-                        status_code=200
-                    )
-                raise
+            if ingestion.is_queued():
+                receipt_id = self.perform_enqueue(serializer, ip_address, user_agent)
+                return self.response(
+                    data={'receipt_id': receipt_id, 'position': position.id, 'status': ingestion.PENDING},
+                    message="Vote received and queued for counting.",
+                    status_code=202
+                )
+
+            with transaction.atomic():
+                self.perform_create(serializer)
 
-            VoteAttempt.objects.create(
+            audit.record(VoteAttempt(
                 voter=request.user,
                 ip_address=ip_address,
                 position=position,
                 success=True,
                 user_agent=user_agent
-            )
+            ))
 
             return self.response(
                 data=serializer.data,
@@ -1256,17 +1246,16 @@ class VoteViewSet(viewsets.GenericViewSet, mixins.CreateModelMixin, ResponseMixi
             position = request.data.get('position')
             if position:
                 try:
-                    from .models import VoteAttempt
-                    position_obj = Position.objects.get(id=position)
-                    VoteAttempt.objects.create(
+                    # Unknown positions are dropped by the audit writer at flush time
+                    audit.record(VoteAttempt(
                         voter=request.user,
                         ip_address=ip_address,
-                        position=position_obj,
+                        position_id=uuid.UUID(str(position)),
                         success=False,
                         reason=str(e),
                         user_agent=user_agent
-                    )
-                except Position.DoesNotExist:
+                    ))
+                except ValueError:
                     pass
 
             print(f"Validation error during voting: {str(e)}")
@@ -1344,18 +1333,29 @@ class VoteViewSet(viewsets.GenericViewSet, mixins.CreateModelMixin, ResponseMixi
             ip = request.META.get('REMOTE_ADDR')
         return ip
 
-    def perform_create(self, serializer):
-        from typing import cast
+    def perform_enqueue(self, serializer, ip_address, user_agent):
+        """Spool a validated vote for the commit_votes worker and return its receipt id."""
         voter = cast(Student, self.request.user)
         position = serializer.validated_data['position']
-        if position.election.type == 'specific' and voter.level != 500:
-            raise ValidationError("You are not eligible to vote in this specific election.")
-        if voter.status != 'active':
-            raise ValidationError("Inactive users cannot vote.")
-        if not voter.has_changed_password:
-            raise ValidationError("You ARE NOT eligible to vote.")
-        if Vote.objects.filter(voter=voter, position=position).exists():
+        # Queued votes are only inserted later, so committed ones are screened here
+        if ballot_status.has_voted(voter.id, position):
+            raise ValidationError("You have already voted for this position.")
+        receipt_id = ingestion.get_spool().enqueue(
+            voter_id=voter.id,
+            position_id=position.id,
+            candidate_id=serializer.validated_data['student_voted_for'].id,
+            ip_address=ip_address,
+            user_agent=user_agent
+        )
+        if not receipt_id:
             raise ValidationError("You have already voted for this position.")
+        # The spool guarantees this position is settled for the voter either way
+        ballot_status.mark_voted(voter.id, position.election_id, [position.id])
+        return receipt_id
+
+    def perform_create(self, serializer):
+        voter = cast(Student, self.request.user)
+        position = serializer.validated_data['position']
 
         # Additional abuse safeguard: prevent casting vote if another account already voted from same IP (race condition fallback)
         # ip_address = self.get_client_ip(self.request)
@@ -1363,7 +1363,130 @@ class VoteViewSet(viewsets.GenericViewSet, mixins.CreateModelMixin, ResponseMixi
         #     window_start = timezone.now() - timedelta(hours=IP_VOTE_WINDOW_HOURS)
         #     if VoteAttempt.objects.filter(ip_address=ip_address, success=True, timestamp__gte=window_start).exclude(voter=voter).exists():
         #         raise ValidationError("Voting from multiple accounts is prohibited. A further attempt will block you out forever.")
-        serializer.save(voter=voter)
+        vote, status = repository.insert_vote(
+            voter_id=voter.id,
+            position_id=position.id,
+            candidate_id=serializer.validated_data['student_voted_for'].id
+        )
+        if status == repository.DUPLICATE:
+            raise ValidationError("You have already voted for this position.")
+        tally.record_votes([(vote.position_id, vote.student_voted_for_id)])
+        ballot_status.mark_voted(voter.id, position.election_id, [vote.position_id])
+        serializer.instance = vote
+
+    @action(detail=False, methods=['get'], url_path=r'receipts/(?P<receipt_id>[^/.]+)')
+    def receipt(self, request, receipt_id=None):
+        """
+        Report whether a vote receipt has been committed.
+        Status is one of pending | committed | duplicate.
+        """
+        try:
+            receipt_id = str(uuid.UUID(receipt_id))
+        except ValueError:
+            return self.response(error={"detail": "Receipt not found."}, status_code=404)
+
+        record = ingestion.get_spool().status(receipt_id) if ingestion.is_queued() else None
+        if record and record['voter_id'] == str(request.user.id):
+            committed_at = record['committed_at']
+            return self.response(data={
+                'receipt_id': receipt_id,
+                'position': record['position_id'],
+                'status': record['status'],
+                'queued_at': datetime.fromtimestamp(record['queued_at'], tz=dt_timezone.utc),
+                'committed_at': datetime.fromtimestamp(committed_at, tz=dt_timezone.utc) if committed_at else None,
+            }, message="Receipt status retrieved successfully.")
+
+        # Settled receipts may have been purged from the spool; the vote itself carries the receipt id
+        vote = Vote.objects.filter(id=receipt_id, voter=request.user).values('position_id', 'voted_at').first()
+        if not vote:
+            return self.response(error={"detail": "Receipt not found."}, status_code=404)
+        return self.response(data={
+            'receipt_id': receipt_id,
+            'position': vote['position_id'],
+            'status': ingestion.COMMITTED,
+            'queued_at': None,
+            'committed_at': vote['voted_at'],
+        }, message="Receipt status retrieved successfully.")
+
+    @action(detail=False, methods=['post'], url_path='ballot')
+    def ballot(self, request):
+        """
+        Cast every selection for an election in one request.
+        Payload: {"election": <uuid>, "votes": [{"position": <uuid>, "student_voted_for": <uuid>}, ...]}
+
+        All selections are validated in memory against a single snapshot of the
+        election, then written with one bulk insert of votes and vote attempts.
+        """
+        ip_address = self.get_client_ip(request)
+        user_agent = request.META.get('HTTP_USER_AGENT', '')
+        voter = cast(Student, request.user)
+
+        serializer = BallotSerializer(data=request.data)
+        if not serializer.is_valid():
+            return self.response(data={"errors": serializer.errors}, message="Invalid ballot.", status_code=400)
+
+        # The middleware only paces session users; token clients are authenticated by DRF here
+        if not pacing.allow(request, voter.id):
+            return self.response(error={"detail": "Please wait a moment before voting again."}, status_code=400)
+
+        snapshot = BallotSnapshot.load(serializer.validated_data['election'], voter)
+        if snapshot is None:
+            return self.response(error={"detail": "Election not found."}, status_code=404)
+
+        selections = serializer.validated_data['votes']
+        voter_error = snapshot.voter_error(voter)
+
+        results, pending = [], []
+        for selection in selections:
+            position_id = selection['position']
+            candidate_id = selection['student_voted_for']
+            error = voter_error or snapshot.selection_error(position_id, candidate_id)
+            if error:
+                results.append({'position': position_id, 'status': 'rejected', 'reason': error})
+            else:
+                result = {'position': position_id, 'status': 'accepted'}
+                pending.append((result, Vote(voter=voter, position_id=position_id, student_voted_for_id=candidate_id)))
+                results.append(result)
+
+        try:
+            with transaction.atomic():
+                # Positions voted on concurrently since the snapshot come back as duplicates
+                writes = repository.insert_votes([vote for _, vote in pending])
+                votes = []
+                for (result, _), (vote, status) in zip(pending, writes):
+                    if status == repository.CREATED:
+                        result['vote_id'] = vote.id
+                        votes.append(vote)
+                    else:
+                        result.update(status='rejected', reason="You have already voted for this position.")
+                tally.record_votes([(vote.position_id, vote.student_voted_for_id) for vote in votes])
+                ballot_status.mark_voted(voter.id, snapshot.election.id, [vote.position_id for vote in votes])
+                VoteAttempt.objects.bulk_create([
+                    VoteAttempt(
+                        voter=voter,
+                        ip_address=ip_address,
+                        position_id=result['position'],
+                        success=result['status'] == 'accepted',
+                        reason=result.get('reason', ''),
+                        user_agent=user_agent
+                    )
+                    for result in results if result['position'] in snapshot.positions
+                ])
+        except Exception as e:
+            logger.error(f"Ballot error for user {voter.matric_number}: {str(e)}")
+            return self.response(data={}, message="An error occurred while processing your ballot.", status_code=500)
+
+        accepted = len(votes)
+        return self.response(
+            data={
+                'election': snapshot.election.id,
+                'accepted': accepted,
+                'rejected': len(results) - accepted,
+                'results': results
+            },
+            message=f"{accepted} of {len(results)} vote(s) cast successfully.",
+            status_code=201 if accepted else 400
+        )
 
     # ADMIN ONLY ROUTES
     @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
@@ -1389,14 +1512,8 @@ class VoteViewSet(viewsets.GenericViewSet, mixins.CreateModelMixin, ResponseMixi
             if date_to:
                 queryset = queryset.filter(voted_at__date__lte=date_to)
             
-            # Pagination
-            page_size = int(request.query_params.get('page_size', 50))
-            page = int(request.query_params.get('page', 1))
-            start = (page - 1) * page_size
-            end = start + page_size
-            
-            total_count = queryset.count()
-            votes = queryset[start:end]
+            # Newest first; ?cursor= pages by keyset so deep pages cost the same as the first
+            votes, pagination = paginate(request, queryset, ('-voted_at', '-id'), page_size=50, max_page_size=500)
             
             vote_data = []
             for vote in votes:
@@ -1413,10 +1530,12 @@ class VoteViewSet(viewsets.GenericViewSet, mixins.CreateModelMixin, ResponseMixi
             
             return self.response(
                 data=vote_data,
-                count=total_count,
-                message="Voting logs retrieved successfully."
+                message="Voting logs retrieved successfully.",
+                **pagination
             )
             
+        except InvalidCursor:
+            return self.response(error={"detail": "Invalid cursor."}, status_code=400)
         except Exception as e:
             logger.error(f"Voting logs failed: {str(e)}")
             return self.response(error={"detail": "Voting logs retrieval failed."}, status_code=500)
@@ -1458,11 +1577,16 @@ class VoteViewSet(viewsets.GenericViewSet, mixins.CreateModelMixin, ResponseMixi
             return self.response(error={"detail": "Vote export failed."}, status_code=500)
         
 
-class CandidateViewSet(viewsets.ModelViewSet, ResponseMixin):
+class CandidateViewSet(ConditionalResponseMixin, viewsets.ModelViewSet, ResponseMixin):
     queryset = Candidate.objects.select_related('student', 'position', 'position__election')
     serializer_class = CandidateSerializer
     parser_classes = [MultiPartParser, FormParser]
     permission_classes = [IsAuthenticated]
+    # Non-staff users only see their own nominations
+    conditional_actions = ('list', 'qualified_candidates')
+    conditional_models = (Candidate, Student, Position, Election)
+    conditional_per_user = True
+    conditional_signed_urls = True
 
     def get_queryset(self):
         qs = self.queryset
@@ -1497,7 +1621,7 @@ class CandidateViewSet(viewsets.ModelViewSet, ResponseMixin):
                 return self.response(error={"detail": "Override student not found."}, status_code=404)
 
         # Eligibility (admins can override eligibility check if they choose)
-        if not request.user.is_staff and target_student not in position.get_eligible_candidates():
+        if not request.user.is_staff and not eligibility.is_eligible_candidate(position.id, target_student.id):
             msg = "You are not eligible for this position."
             if position.gender_restriction != 'any':
                 msg += f" Restricted to {position.gender_restriction} candidates."
@@ -1538,41 +1662,21 @@ class CandidateViewSet(viewsets.ModelViewSet, ResponseMixin):
         allowed_order = {'created_at','-created_at','alias','-alias'}
         if ordering not in allowed_order:
             ordering = '-created_at'
-        queryset = queryset.order_by(ordering)
+        if ordering.lstrip('-') == 'alias':
+            # Keyset paging needs a non-null sort key
+            queryset = queryset.annotate(alias_key=Coalesce('alias', Value('')))
+            ordering = ordering.replace('alias', 'alias_key')
 
-        # Pagination
         try:
-            page = max(int(qp.get('page', 1)), 1)
-        except ValueError:
-            page = 1
-        try:
-            page_size = int(qp.get('page_size', 20))
-        except ValueError:
-            page_size = 20
-        page_size = max(1, min(page_size, 100))
-        total = queryset.count()
-        start = (page - 1) * page_size
-        end = start + page_size
-        items = queryset[start:end]
-        serializer = self.get_serializer(items, many=True)
-
-        # Build next / previous links
-        base_url = request.build_absolute_uri(request.path)
-        def build_url(p):
-            if p < 1 or (p-1)*page_size >= total:
-                return None
-            params = request.GET.copy()
-            params['page'] = str(p)
-            return f"{base_url}?{params.urlencode()}"
-        next_url = build_url(page + 1)
-        prev_url = build_url(page - 1) if page > 1 else None
+            items, pagination = paginate(request, queryset, (ordering, 'id'))
+        except InvalidCursor:
+            return self.response(error={"detail": "Invalid cursor."}, status_code=400)
 
+        serializer = self.get_serializer(items, many=True)
         return self.response(
             data=serializer.data,
             message="Candidates retrieved successfully.",
-            count=total,
-            next=next_url,
-            previous=prev_url
+            **pagination
         )
 
     def update(self, request, *args, **kwargs):
@@ -1646,12 +1750,11 @@ class CandidateViewSet(viewsets.ModelViewSet, ResponseMixin):
 
     @action(detail=False, methods=['get'], url_path='qualified', permission_classes=[IsAuthenticated])
     def qualified_candidates(self, request):
-        queryset = self.queryset.filter(student__level=500, student__status='active')
-        gender = request.query_params.get('gender')
-        if gender and gender in ['male','female']:
-            queryset = queryset.filter(student__gender=gender)
-        serializer = self.get_serializer(queryset, many=True)
-        return self.response(data=serializer.data, message="List of all qualified candidates.")
+        try:
+            data, pagination = listings.qualified_nominations(request)
+        except InvalidCursor:
+            return self.response(error={"detail": "Invalid cursor."}, status_code=400)
+        return self.response(data=data, message="List of all qualified candidates.", **pagination)
 
     # ADMIN ONLY ROUTES
     @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
@@ -1712,7 +1815,7 @@ class AdminDashboardView(APIView, ResponseMixin):
             active_students = Student.objects.filter(is_active=True).count()
             total_elections = Election.objects.count()
             active_elections = Election.objects.filter(is_active=True).count()
-            total_votes = Vote.objects.count()
+            total_votes = VoteTally.objects.aggregate(total=Sum('count'))['total'] or 0
             
             # Recent activity (last 7 days)
             from datetime import timedelta
@@ -1727,12 +1830,8 @@ class AdminDashboardView(APIView, ResponseMixin):
             current_election_data = None
             
             if current_election:
-                election_votes = Vote.objects.filter(position__election=current_election).count()
-                if current_election.type == 'specific':
-                    voter_pool = Student.objects.filter(level=500, status='active')
-                else:
-                    voter_pool = Student.objects.filter(status='active')
-                eligible_voters = voter_pool.count()
+                election_votes = tally.election_total(current_election)
+                eligible_voters = voter_roll.get_roll(current_election).total
                 positions_count = Position.objects.filter(election=current_election).count()
                 
                 participation_rate = 0
@@ -1811,3 +1910,42 @@ class ChangePasswordView(APIView, ResponseMixin):
                 status_code=500
             )
     
+
+
+async def _stream_user(request):
+    """Authenticate a streaming request by JWT from the Authorization header or a ?token= parameter."""
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    raw_token = auth.get_raw_token(header) if header else request.GET.get('token', '').encode() or None
+    if not raw_token:
+        return None
+    try:
+        validated = auth.get_validated_token(raw_token)
+        return await sync_to_async(auth.get_user)(validated)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+async def election_live(request, pk):
+    """
+    Server-sent events with an election's tally and turnout (staff only).
+    Sends a ``snapshot`` event first, then ``delta`` events as votes are
+    committed. Needs an ASGI server; EventSource clients, which cannot set
+    headers, pass the access token as ``?token=``.
+    """
+    user = await _stream_user(request)
+    if not user or not user.is_staff:
+        return JsonResponse(
+            {"message": "", "data": None, "status": 403, "error": {"detail": "Staff access token required."}},
+            status=403
+        )
+    if not await Election.objects.filter(pk=pk).aexists():
+        return JsonResponse(
+            {"message": "", "data": None, "status": 404, "error": {"detail": "Election not found."}},
+            status=404
+        )
+
+    response = StreamingHttpResponse(live.stream(pk), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
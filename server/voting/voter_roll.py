@@ -0,0 +1,202 @@
+"""
+Frozen voter roll per election.
+
+When an election is activated the eligible students (active, and 500 level
+for ``specific`` elections) are materialized into a ``VoterRoll`` row as a
+sorted array of packed UUIDs plus one flag byte per student. Each process
+unpacks a roll once into a dict, so eligibility checks are O(1) and turnout
+denominators come from precomputed counts instead of Student queries.
+
+A cache token per election lets every process notice when a roll has been
+rebuilt or patched without touching the database. Saving one student patches
+that student's entry in place; only bulk roster changes drop the rolls.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Election, Student, VoterRoll
+
+FLAG_MALE = 0x01
+FLAG_FEMALE = 0x02
+FLAG_PASSWORD_CHANGED = 0x04
+
+_GENDER_FLAGS = {'male': FLAG_MALE, 'female': FLAG_FEMALE}
+_TOKEN_TIMEOUT = 60 * 60 * 24 * 7
+
+_loaded = {}  # {election_id: (token, Roll)}
+
+
+def _token_key(election_id):
+    return f"voter_roll_token_{election_id}"
+
+
+class Roll:
+    def __init__(self, record):
+        ids = bytes(record.student_ids)
+        flags = bytes(record.flags)
+        self.election_id = record.election_id
+        self.total = record.total
+        self.male_count = record.male_count
+        self.female_count = record.female_count
+        self._members = {ids[i * 16:(i + 1) * 16]: flags[i] for i in range(record.total)}
+
+    def flags_for(self, student_id):
+        if not isinstance(student_id, uuid.UUID):
+            student_id = uuid.UUID(str(student_id))
+        return self._members.get(student_id.bytes)
+
+    def __contains__(self, student_id):
+        return self.flags_for(student_id) is not None
+
+    def eligible_count(self, gender=None):
+        if gender == 'male':
+            return self.male_count
+        if gender == 'female':
+            return self.female_count
+        return self.total
+
+    def voter_error(self, election, student_id):
+        """Return why the student may not vote in ``election``, or None."""
+        flags = self.flags_for(student_id)
+        if flags is None:
+            if election.type == 'specific':
+                return "You are not eligible to vote in this specific election."
+            return "Inactive users cannot vote."
+        if not flags & FLAG_PASSWORD_CHANGED:
+            return "You ARE NOT eligible to vote."
+        return None
+
+
+def eligible_students(election):
+    """Students on ``election``'s roll: active, and 500 level for specific elections."""
+    students = Student.objects.filter(status='active')
+    if election.type == 'specific':
+        students = students.filter(level=500)
+    return students
+
+
+def _flags(gender, changed):
+    return _GENDER_FLAGS.get(gender, 0) | (FLAG_PASSWORD_CHANGED if changed else 0)
+
+
+def _on_roll(election, student):
+    return student.status == 'active' and (election.type != 'specific' or student.level == 500)
+
+
+def _publish(record):
+    token = uuid.uuid4().hex
+    cache.set(_token_key(record.election_id), token, _TOKEN_TIMEOUT)
+    _loaded[record.election_id] = (token, Roll(record))
+
+
+def materialize(election):
+    """Snapshot the eligible students of ``election`` into its VoterRoll."""
+    students = eligible_students(election)
+
+    rows = sorted(
+        (student_id.bytes, gender, changed)
+        for student_id, gender, changed in students.values_list('id', 'gender', 'has_changed_password')
+    )
+    flags = bytearray(len(rows))
+    male = female = 0
+    for i, (_, gender, changed) in enumerate(rows):
+        flags[i] = _flags(gender, changed)
+        male += gender == 'male'
+        female += gender == 'female'
+
+    record, _ = VoterRoll.objects.update_or_create(
+        election=election,
+        defaults={
+            'student_ids': b''.join(row[0] for row in rows),
+            'flags': bytes(flags),
+            'total': len(rows),
+            'male_count': male,
+            'female_count': female,
+        },
+    )
+    _publish(record)
+    return _loaded[election.pk][1]
+
+
+def get_roll(election):
+    """Return the election's Roll, materializing it on first use."""
+    token = cache.get(_token_key(election.pk))
+    loaded = _loaded.get(election.pk)
+    if token and loaded and loaded[0] == token:
+        return loaded[1]
+
+    record = VoterRoll.objects.filter(election=election).first()
+    if record is None:
+        return materialize(election)
+    if not token:
+        token = uuid.uuid4().hex
+        cache.set(_token_key(election.pk), token, _TOKEN_TIMEOUT)
+    _loaded[election.pk] = (token, Roll(record))
+    return _loaded[election.pk][1]
+
+
+def invalidate_open_rolls():
+    """Drop rolls of elections that have not ended so they are rebuilt from the current roster."""
+    open_ids = list(Election.objects.filter(end_date__gte=timezone.now()).values_list('id', flat=True))
+    VoterRoll.objects.filter(election_id__in=open_ids).delete()
+    cache.delete_many([_token_key(pk) for pk in open_ids])
+    for pk in open_ids:
+        _loaded.pop(pk, None)
+
+
+def _patch(record, student):
+    """Insert, update or remove ``student`` in ``record``; return whether anything changed."""
+    ids = bytes(record.student_ids)
+    flags = bytearray(record.flags)
+    key = uuid.UUID(str(student.pk)).bytes
+
+    lo, hi = 0, record.total
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if ids[mid * 16:(mid + 1) * 16] < key:
+            lo = mid + 1
+        else:
+            hi = mid
+    present = lo < record.total and ids[lo * 16:(lo + 1) * 16] == key
+    new = _flags(student.gender, student.has_changed_password) if _on_roll(record.election, student) else None
+    old = flags[lo] if present else None
+    if new == old:
+        return False
+
+    if old is not None:
+        record.male_count -= bool(old & FLAG_MALE)
+        record.female_count -= bool(old & FLAG_FEMALE)
+    if new is not None:
+        record.male_count += bool(new & FLAG_MALE)
+        record.female_count += bool(new & FLAG_FEMALE)
+
+    if present and new is not None:
+        flags[lo] = new
+    elif present:
+        ids = ids[:lo * 16] + ids[(lo + 1) * 16:]
+        del flags[lo]
+    else:
+        ids = ids[:lo * 16] + key + ids[lo * 16:]
+        flags.insert(lo, new)
+    record.student_ids = ids
+    record.flags = bytes(flags)
+    record.total = len(flags)
+    return True
+
+
+def update_student(student):
+    """Patch one student's entry on the rolls of elections that have not ended."""
+    patched = []
+    with transaction.atomic():
+        records = (VoterRoll.objects.select_for_update()
+                   .select_related('election')
+                   .filter(election__end_date__gte=timezone.now()))
+        for record in records:
+            if _patch(record, student):
+                record.save(update_fields=['student_ids', 'flags', 'total', 'male_count', 'female_count'])
+                patched.append(record)
+    for record in patched:
+        transaction.on_commit(lambda record=record: _publish(record))